@@ -17,3 +17,8 @@ my_console.write()
 # Read from the console
 output = my_console.read()
 print(output)
+
+# Process the output as it arrives instead of waiting for the whole command to finish
+my_console.write("search type:exploit")
+for chunk in my_console.stream_output(timeout=30):
+    print(chunk, end="")
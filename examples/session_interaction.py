@@ -18,9 +18,18 @@ filtered_sessions = client.sessions.filter(SessionInformation(via_payload="pytho
 output = my_session.execute("ps aux", 10)
 print(output)
 
-# Execute a command, but always in the shell
+# Execute a command, but always in the shell (Meterpreter sessions return the process ID, standard and error output,
+# and exit code separately)
 output = my_session.execute_in_shell("ps", ["aux"], 10)
-print(output)
+print(output, my_session.last_exit_code)
+
+# Execute multiple commands at once, each result is returned as soon as its command finishes
+for result in my_session.execute_batch(["id", "uname -a", "cat /etc/passwd"], 30):
+    print(result.command, result.exit_code, result.output)
 
 # Upgrade the session to a Meterpreter session
 my_session.upgrade_to_meterpreter("localhost", 6666)
+
+# Execute a command in multiple sessions at once, results are returned as soon as each session finishes
+for result in client.sessions.execute_many(all_sessions.keys(), "whoami", 10):
+    print(result.session_id, result.output if result.error is None else result.error)
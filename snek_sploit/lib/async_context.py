@@ -0,0 +1,453 @@
+import asyncio
+import ssl as _ssl
+import time
+from collections import deque
+from typing import Union, Deque, Tuple, Optional, List, Callable, Awaitable, Any
+
+from snek_sploit.lib.context import (
+    BaseContext,
+    RPCResponse,
+    Batch,
+    CallResult,
+    HEALTH_CHECK,
+    AUTH_LOGIN,
+    AUTH_TOKEN_ADD,
+    MSGPACK_CONTENT_TYPE,
+)
+from snek_sploit.util import constants, exceptions
+from snek_sploit.util.circuit import CircuitBreaker
+from snek_sploit.util.decoding import ResponseSchema
+from snek_sploit.util.enums import CircuitState
+
+
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+# Errors raised in case a call fails without a response
+CONNECTION_ERRORS = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError)
+
+
+class _RequestNotSentError(ConnectionError):
+    """
+    The request couldn't be written to the connection, so the server can't have processed it.
+    """
+
+
+class _HTTPConnectionPool:
+    def __init__(
+        self, host: str, port: int, uri: str, ssl_context: Optional[_ssl.SSLContext], headers: dict, maxsize: int
+    ):
+        """
+        Minimal HTTP/1.1 client that keeps a pool of keep-alive connections to a single host.
+        :param host: Server host
+        :param port: Server port
+        :param uri: Uri the requests are sent to
+        :param ssl_context: SSL context used for the connections (None for plain HTTP)
+        :param headers: Headers sent with each request
+        :param maxsize: Maximum number of connections open at the same time
+        """
+        self._host = host
+        self._port = port
+        self._ssl_context = ssl_context
+        self._maxsize = maxsize
+        # The connections and the semaphore belong to the loop they were created in
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._idle: Deque[Connection] = deque()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+        request_headers = {"Host": f"{host}:{port}", "Connection": "keep-alive", **headers}
+        self._request_head = f"POST {uri} HTTP/1.1\r\n" + "".join(
+            f"{key}: {value}\r\n" for key, value in request_headers.items()
+        )
+
+    async def _connect(self, timeout: Optional[float]) -> Connection:
+        """
+        Open a new connection.
+        :param timeout: Connect timeout
+        :return: Connection reader and writer
+        """
+        return await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=self._ssl_context), timeout=timeout
+        )
+
+    @staticmethod
+    def _close_connection(connection: Connection) -> None:
+        connection[1].close()
+
+    @staticmethod
+    def _is_closed(connection: Connection) -> bool:
+        """
+        Check whether the server already closed an idle connection.
+        :param connection: Connection to check
+        :return: True if the connection can't be used
+        """
+        reader, writer = connection
+        return reader.at_eof() or writer.is_closing()
+
+    async def _exchange(self, connection: Connection, body: bytes) -> Tuple[bytes, bool]:
+        """
+        Send the request and read the whole response.
+        :param connection: Connection to use
+        :param body: Request body
+        :return: Response body and whether the connection can be reused
+        :raise HTTPError: In case the response isn't an MSF RPC one (e.g. an error page of a proxy)
+        """
+        reader, writer = connection
+        try:
+            writer.write(f"{self._request_head}Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+        except ConnectionError as ex:
+            raise _RequestNotSentError(*ex.args) from ex
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip().lower()
+
+        reusable = headers.get("connection") != "close" and not status_line.startswith(b"HTTP/1.0")
+        if headers.get("transfer-encoding") == "chunked":
+            chunks = []
+            while chunk_size := int((await reader.readline()).split(b";", 1)[0], 16):
+                chunks.append(await reader.readexactly(chunk_size))
+                await reader.readline()
+            await reader.readline()
+            content = b"".join(chunks)
+        elif "content-length" in headers:
+            content = await reader.readexactly(int(headers["content-length"]))
+        else:
+            content = await reader.read()
+            reusable = False
+
+        # MSF reports the errors with a status code and a serialized body, other responses come from elsewhere
+        status = status_line.split(maxsplit=2)[1:2]
+        if status != [b"200"] and not headers.get("content-type", "").startswith(MSGPACK_CONTENT_TYPE):
+            raise exceptions.HTTPError(f"Unexpected response: {status_line.decode('latin-1').strip()}")
+
+        return content, reusable
+
+    async def request(self, body: bytes, timeout: Union[float, tuple] = None) -> bytes:
+        """
+        Send a POST request using a pooled connection.
+        :param body: Request body
+        :param timeout: Timeout for the request, either a single value or a (connect, read) tuple
+        :return: Response body
+        """
+        connect_timeout, read_timeout = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # The connections of the previous loop can't be used (nor closed) in this one
+            self._loop = loop
+            self._idle.clear()
+            self._semaphore = asyncio.Semaphore(self._maxsize)
+
+        async with self._semaphore:
+            while self._idle:
+                # The server might have closed the idle connection in the meantime, in such case try another one. Once
+                # the request is written, it might have been processed, so it's up to the caller to repeat it.
+                connection = self._idle.popleft()
+                if self._is_closed(connection):
+                    self._close_connection(connection)
+                    continue
+                try:
+                    return await self._request(connection, body, read_timeout)
+                except _RequestNotSentError:
+                    continue
+
+            return await self._request(await self._connect(connect_timeout), body, read_timeout)
+
+    async def _request(self, connection: Connection, body: bytes, timeout: Optional[float]) -> bytes:
+        """
+        Send the request over the connection and return the connection to the pool if possible.
+        :param connection: Connection to use
+        :param body: Request body
+        :param timeout: Read timeout
+        :return: Response body
+        """
+        try:
+            content, reusable = await asyncio.wait_for(self._exchange(connection, body), timeout=timeout)
+        except BaseException:
+            self._close_connection(connection)
+            raise
+
+        if reusable:
+            self._idle.append(connection)
+        else:
+            self._close_connection(connection)
+
+        return content
+
+    async def close(self) -> None:
+        """
+        Close all idle connections.
+        :return: None
+        """
+        while self._idle:
+            self._close_connection(self._idle.popleft())
+
+
+class AsyncContext(BaseContext):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        host: str = "127.0.0.1",
+        port: int = 55553,
+        uri: str = "/api/",
+        ssl: bool = True,
+        certificate: str = "",
+        token: str = "",
+        timeout: Union[float, tuple] = None,
+        verbose: bool = False,
+        pool_maxsize: int = 10,
+        standby: List[Tuple[str, int]] = None,
+        circuit_breaker: CircuitBreaker = None,
+    ):
+        """
+        Asynchronous context holds information used for authentication and communication with MSF RPC.
+        :param username: Username used for authentication
+        :param password: Password used for authentication
+        :param host: MSF RPC Host
+        :param port: MSF RPC Port
+        :param uri: API uri
+        :param ssl: Whether the server is using SSL(TLS) or not
+        :param certificate: Path to the certificate used for SSL(TLS)
+        :param token: Token used for authentication
+        :param timeout: Timeout for the RPC
+        :param verbose: Whether to print the raw RPC response
+        :param pool_maxsize: Maximum number of keep-alive connections (and thus in-flight calls) to the server
+        :param standby: Hosts and ports of the standby servers, used once the circuit breaker of the primary one opens
+        :param circuit_breaker: Circuit breaker of the primary server, each standby server gets a copy of it
+            (disabled if None and there are no standby servers)
+        """
+        super().__init__(
+            username, password, host, port, uri, ssl, certificate, token, timeout, verbose, standby, circuit_breaker
+        )
+
+        ssl_context = None
+        if ssl:
+            if self._certificate:
+                ssl_context = _ssl.create_default_context(cafile=self._certificate)
+            else:  # MSF's self-signed certificate
+                ssl_context = _ssl.create_default_context()
+                ssl_context.check_hostname = False
+                ssl_context.verify_mode = _ssl.CERT_NONE
+
+        self.pool_maxsize = pool_maxsize
+        # Created lazily to bind to the running loop
+        self._login_lock: Optional[asyncio.Lock] = None
+        self._login_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pools = [
+            _HTTPConnectionPool(server_host, server_port, uri, ssl_context, self._headers, pool_maxsize)
+            for server_host, server_port in self._servers
+        ]
+
+    async def close(self) -> None:
+        """
+        Close the pooled connections.
+        :return: None
+        """
+        for pool in self._pools:
+            await pool.close()
+
+    async def __aenter__(self) -> "AsyncContext":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    def batch(self, max_workers: int = None) -> "AsyncBatch":
+        """
+        Create a batch of independent calls, that will be dispatched concurrently.
+        :param max_workers: Maximum number of calls in flight (by default the size of the connection pool)
+        :return: Empty batch
+        """
+        return AsyncBatch(self, max_workers)
+
+    async def call(
+        self,
+        endpoint: str,
+        arguments: list = None,
+        use_token: bool = True,
+        timeout: Union[float, tuple] = None,
+        schema: ResponseSchema = None,
+    ) -> RPCResponse:
+        """
+        Create a call to an endpoint.
+        Calls that fail without a response are retried according to `retry_policy` (only read-only ones by default).
+        Calls rejected because of an expired token are replayed after logging in again.
+        :param endpoint: Endpoint name
+        :param arguments: Arguments that will be processed and passed to the endpoint
+        :param use_token: Whether to use the context token or not
+        :param timeout: Timeout for the call
+        :param schema: Schema used to decode the response, by default the response is returned as is
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
+        :raise RPCError: In case the response contains errors
+        :raise CircuitOpenError: In case no server is available (only if the circuit breakers are enabled)
+        """
+        if timeout is None:
+            timeout = self.timeout
+
+        self.retry_policy.record_call()
+        token = self.token
+        try:
+            return await self._call(endpoint, self._create_request(endpoint, arguments, use_token), timeout, schema)
+        except exceptions.RPCError as ex:
+            if not self._is_token_rejected(ex, use_token):
+                raise
+
+        await self.refresh_token(token)
+
+        return await self._call(endpoint, self._create_request(endpoint, arguments, use_token), timeout, schema)
+
+    async def _call(
+        self, endpoint: str, data: bytes, timeout: Union[float, tuple], schema: ResponseSchema
+    ) -> RPCResponse:
+        """
+        Make a call, retry it according to `retry_policy` if it fails without a response.
+        :param endpoint: Endpoint name
+        :param data: Serialized call
+        :param timeout: Timeout for the call
+        :param schema: Schema used to decode the response
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
+        :raise RPCError: In case the response contains errors
+        """
+        attempt = 0
+        while True:
+            try:
+                return await self._send(endpoint, data, timeout, schema)
+            except CONNECTION_ERRORS:
+                delay = self._retry_delay(endpoint, attempt)
+                if delay is None:
+                    raise
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def refresh_token(self, rejected_token: str = None) -> None:
+        """
+        Log in again and make the new token permanent (like `AsyncAuth.login`).
+        Only a single login is made at a time, callers that find out the same token was rejected wait for it.
+        :param rejected_token: Token that was rejected, the login is skipped if the token was replaced in the meantime
+        :return: None
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._login_loop:
+            self._login_loop = loop
+            self._login_lock = asyncio.Lock()
+
+        async with self._login_lock:
+            if rejected_token is not None and self.token != rejected_token:
+                return
+
+            response = await self.call(AUTH_LOGIN, [self.username, self.password], use_token=False)
+            self.token = response[constants.B_TOKEN].decode()
+            # Not replayed on rejection, since the login lock is held
+            data = self._create_request(AUTH_TOKEN_ADD, [self.token], True)
+            await self._call(AUTH_TOKEN_ADD, data, self.timeout, None)
+
+    async def _send(
+        self, endpoint: str, data: bytes, timeout: Union[float, tuple], schema: ResponseSchema
+    ) -> RPCResponse:
+        """
+        Make a single attempt of a call, using the first available server.
+        :param endpoint: Endpoint name
+        :param data: Serialized call
+        :param timeout: Timeout for the call
+        :param schema: Schema used to decode the response
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
+        :raise RPCError: In case the response contains errors
+        :raise CircuitOpenError: In case no server is available
+        """
+        if self.circuit_breakers is None:
+            return await self._send_to(0, endpoint, data, timeout, schema)
+
+        for server, breaker in enumerate(self.circuit_breakers):
+            state = breaker.before_call()
+            if state is CircuitState.OPEN or (state is CircuitState.HALF_OPEN and not await self._probe(server)):
+                continue
+
+            start = time.perf_counter()
+            try:
+                response = await self._send_to(server, endpoint, data, timeout, schema)
+            except CONNECTION_ERRORS:
+                breaker.record_failure()
+                raise
+            except exceptions.RPCError:
+                breaker.record_success(time.perf_counter() - start)
+                raise
+
+            breaker.record_success(time.perf_counter() - start)
+            return response
+
+        raise exceptions.CircuitOpenError("No server is available, all circuit breakers are open")
+
+    async def _probe(self, server: int) -> bool:
+        """
+        Check whether a server recovered and close or reopen its circuit breaker accordingly.
+        :param server: Index of the server
+        :return: Whether the server is healthy
+        """
+        healthy = False
+        try:
+            response = await self._send_to(
+                server, HEALTH_CHECK, self._create_request(HEALTH_CHECK, None, False), self.probe_timeout, None
+            )
+            healthy = isinstance(response, dict) and response.get(constants.STATUS) == constants.B_UP
+        except Exception:  # Whatever went wrong, the server isn't healthy
+            pass
+        finally:
+            # The breaker must leave the half-open state, otherwise the server would never be probed again
+            if healthy:
+                self.circuit_breakers[server].record_success()
+            else:
+                self.circuit_breakers[server].record_failure()
+
+        return healthy
+
+    async def _send_to(
+        self, server: int, endpoint: str, data: bytes, timeout: Union[float, tuple], schema: ResponseSchema
+    ) -> RPCResponse:
+        """
+        Make a single attempt of a call to a specific server.
+        :param server: Index of the server
+        :param endpoint: Endpoint name
+        :param data: Serialized call
+        :param timeout: Timeout for the call
+        :param schema: Schema used to decode the response
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
+        :raise RPCError: In case the response contains errors
+        """
+        if self.metrics is None:
+            return self._process_response(await self._pools[server].request(data, timeout), schema)
+
+        with self.metrics.measure(endpoint, len(data)) as measurement:
+            content = await self._pools[server].request(data, timeout)
+            measurement.response_bytes = len(content)
+
+            return self._process_response(content, schema)
+
+
+class AsyncBatch(Batch):
+    """
+    Asynchronous version of `Batch`.
+    """
+
+    @staticmethod
+    async def _run(function: Callable[[], Awaitable[Any]]) -> CallResult:
+        start = time.time()
+        try:
+            return CallResult(await function(), None, time.time() - start)
+        except Exception as ex:
+            return CallResult(None, ex, time.time() - start)
+
+    async def execute(self) -> List[CallResult]:
+        calls, self._calls = self._calls, []
+        semaphore = asyncio.Semaphore(self._max_workers)
+
+        async def run(function: Callable[[], Awaitable[Any]]) -> CallResult:
+            async with semaphore:
+                return await self._run(function)
+
+        return list(await asyncio.gather(*(run(function) for function in calls)))
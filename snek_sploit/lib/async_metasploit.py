@@ -0,0 +1,158 @@
+from typing import Union, Optional, List, Tuple
+
+from snek_sploit.lib.async_context import AsyncContext, AsyncBatch
+from snek_sploit.lib.context import RPCResponse
+from snek_sploit.lib.async_rpc.auth import AsyncAuth
+from snek_sploit.lib.async_rpc.consoles import AsyncConsoles
+from snek_sploit.lib.async_rpc.core import AsyncCore
+from snek_sploit.lib.async_rpc.db import AsyncDB
+from snek_sploit.lib.async_rpc.health import AsyncHealth
+from snek_sploit.lib.async_rpc.jobs import AsyncJobs
+from snek_sploit.lib.async_rpc.modules import AsyncModules
+from snek_sploit.lib.async_rpc.plugins import AsyncPlugins
+from snek_sploit.lib.async_rpc.sessions import AsyncSessions
+from snek_sploit.util.circuit import CircuitBreaker
+from snek_sploit.util.metrics import MetricsRegistry
+from snek_sploit.util.retry import RetryPolicy
+
+
+class AsyncMetasploitClient:
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        host: str = "127.0.0.1",
+        port: int = 55553,
+        uri: str = "/api/",
+        ssl: bool = True,
+        certificate: str = "",
+        log_in: bool = True,
+        token: str = "",
+        timeout: Union[float, tuple] = None,
+        verbose: bool = False,
+        pool_maxsize: int = 10,
+        module_cache_directory: str = None,
+        metrics: MetricsRegistry = None,
+        retry_policy: RetryPolicy = None,
+        standby: List[Tuple[str, int]] = None,
+        circuit_breaker: CircuitBreaker = None,
+        session_cache_ttl: float = 0,
+    ):
+        """
+        Asynchronous client used for communication with MSF RPC.
+        All calls share a single pool of keep-alive connections, so one event loop can multiplex many in-flight calls.
+        Since the login is a call as well, it happens once the client is entered (`async with`) or `login` is awaited.
+        :param username: Username used for authentication
+        :param password: Password used for authentication
+        :param host: MSF RPC Host
+        :param port: MSF RPC Port
+        :param uri: API uri
+        :param ssl: Whether the server is using SSL(TLS) or not
+        :param certificate: Path to the certificate used for SSL(TLS)
+        :param log_in: Whether to automatically login when entering the client
+        :param token: Token used for authentication
+        :param timeout: Timeout for the RPC
+        :param verbose: Whether to print the raw RPC response
+        :param pool_maxsize: Maximum number of keep-alive connections (and thus in-flight calls) to the server
+        :param module_cache_directory: Directory used to persist the module catalog (`modules.catalog`) between runs
+        :param metrics: Registry used to record per-endpoint call metrics (nothing is recorded if None)
+        :param retry_policy: Policy deciding which failed calls are retried (by default, only read-only calls are)
+        :param standby: Hosts and ports of the standby servers, used once the circuit breaker of the primary one opens
+            (the token must be valid on them as well)
+        :param circuit_breaker: Circuit breaker of the primary server, each standby server gets a copy of it
+            (disabled if None and there are no standby servers)
+        :param session_cache_ttl: The maximum age of the cached session list in seconds (`sessions.registry`), with 0
+            only the concurrent calls share a single request
+        """
+        self._context = AsyncContext(
+            username,
+            password,
+            host,
+            port,
+            uri,
+            ssl,
+            certificate,
+            token,
+            timeout,
+            verbose,
+            pool_maxsize,
+            standby,
+            circuit_breaker,
+        )
+        self._context.metrics = metrics
+        if retry_policy is not None:
+            self._context.retry_policy = retry_policy
+        self._log_in = log_in
+
+        self.auth = AsyncAuth(self._context)
+        self.consoles = AsyncConsoles(self._context)
+        self.core = AsyncCore(self._context)
+        self.db = AsyncDB(self._context)
+        self.health = AsyncHealth(self._context)
+        self.jobs = AsyncJobs(self._context)
+        self.modules = AsyncModules(self._context, module_cache_directory)
+        self.plugins = AsyncPlugins(self._context)
+        self.sessions = AsyncSessions(self._context, session_cache_ttl)
+
+    @property
+    def metrics(self) -> Optional[MetricsRegistry]:
+        """
+        Registry with per-endpoint call metrics (None if the metrics are disabled).
+        :return: Metrics registry
+        """
+        return self._context.metrics
+
+    async def login(self) -> None:
+        """
+        Login.
+        :return: None
+        """
+        await self.auth.login()
+
+    async def logout(self) -> None:
+        """
+        Logout.
+        :return: None
+        """
+        await self.auth.rpc.logout(self._context.token)
+
+    async def close(self) -> None:
+        """
+        Persist the module catalog, stop the session watcher and the module result waiter, and close the pooled
+        connections.
+        :return: None
+        """
+        try:
+            self.modules.catalog.save()
+        finally:
+            # The background tasks and the connections must be closed even if the catalog can't be written
+            await self.sessions.watcher.stop()
+            await self.modules.waiter.stop()
+            await self._context.close()
+
+    async def __aenter__(self) -> "AsyncMetasploitClient":
+        if self._log_in:
+            await self.login()
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    def pipeline(self, max_workers: int = None) -> AsyncBatch:
+        """
+        Wrapper for `self.context.batch`.
+        :param max_workers: Maximum number of calls in flight (by default the size of the connection pool)
+        :return: Empty batch of calls
+        """
+        return self._context.batch(max_workers)
+
+    async def call(self, endpoint: str, arguments: list = None, **kwargs) -> RPCResponse:
+        """
+        Wrapper for `self.context.call`.
+        :param endpoint: Endpoint name
+        :param arguments: Arguments that will be processed and passed to the endpoint
+        :param kwargs: use_token, timeout
+        :return: Raw RPC response
+        """
+        return await self._context.call(endpoint, arguments, **kwargs)
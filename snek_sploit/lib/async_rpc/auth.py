@@ -0,0 +1,53 @@
+from typing import List
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.auth import RPCAuthBase
+from snek_sploit.util import constants
+
+
+class AsyncRPCAuth(RPCAuthBase):
+    """
+    Asynchronous version of `RPCAuth`.
+    """
+
+    async def login(self, username: str, password: str) -> str:
+        response = await self._context.call(self.LOGIN, [username, password], use_token=False)
+
+        return response[constants.B_TOKEN].decode()
+
+    async def logout(self, token: str) -> bool:
+        response = await self._context.call(self.LOGOUT, [token])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def token_add(self, token: str) -> bool:
+        response = await self._context.call(self.TOKEN_ADD, [token])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def token_remove(self, token: str) -> bool:
+        response = await self._context.call(self.TOKEN_REMOVE, [token])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def token_list(self) -> List[str]:
+        response = await self._context.call(self.TOKEN_LIST)
+
+        return [token.decode() for token in response[constants.B_TOKENS]]
+
+    async def token_generate(self) -> str:
+        response = await self._context.call(self.TOKEN_GENERATE)
+
+        return response[constants.B_TOKEN].decode()
+
+
+class AsyncAuth(ContextBase):
+    def __init__(self, context: AsyncContext):
+        super().__init__(context)
+        self.rpc = AsyncRPCAuth(context)
+
+    async def login(self):
+        token = await self.rpc.login(self._context.username, self._context.password)
+        self._context.token = token
+        await self.rpc.token_add(token)
@@ -0,0 +1,458 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import Iterable, List, Optional, AsyncIterator
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.consoles import (
+    RPCConsolesBase,
+    ConsoleInfo,
+    ConsoleData,
+    ConsoleOptions,
+    ConsoleCommandResult,
+    ConsolePool,
+)
+from snek_sploit.util import constants, exceptions
+from snek_sploit.util.matching import StreamMatcher, SuccessFlags, generate_flag, EchoMarker, CommandDemultiplexer
+from snek_sploit.util.polling import PollingStrategy, PollingStatistics, FixedDelay, ExponentialBackoff, Poller
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRPCConsoles(RPCConsolesBase):
+    """
+    Asynchronous version of `RPCConsoles`.
+    """
+
+    async def create(self, options: ConsoleOptions = None) -> ConsoleInfo:
+        options = asdict(options) if options is not None else {}
+
+        response = await self._context.call(self.CREATE, [options])
+
+        return self._parse_console_info(response)
+
+    async def destroy(self, console_id: int) -> bool:
+        response = await self._context.call(self.DESTROY, [console_id])
+
+        if response[constants.B_RESULT] == constants.B_FAILURE:
+            raise exceptions.InputError("Invalid console ID")
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def list_consoles(self) -> List[ConsoleInfo]:
+        response = await self._context.call(self.LIST)
+
+        return [self._parse_console_info(console) for console in response[constants.B_CONSOLES]]
+
+    async def read(self, console_id: int) -> ConsoleData:
+        response = await self._context.call(self.READ, [console_id])
+
+        if response.get(constants.B_RESULT) == constants.B_FAILURE:
+            raise exceptions.InputError("Invalid console ID")
+
+        return self._parse_console_data(response)
+
+    async def write(self, console_id: int, data: str, add_new_line: bool = True) -> int:
+        if add_new_line:
+            data += "\r\n"
+
+        response = await self._context.call(self.WRITE, [console_id, data])
+
+        if response.get(constants.B_RESULT) == constants.B_FAILURE:
+            raise exceptions.InputError("Invalid console ID")
+
+        return response[constants.B_WROTE]
+
+    async def tabs(self, console_id: int, line: str) -> List[str]:
+        response = await self._context.call(self.TABS, [console_id, line])
+
+        if response.get(constants.B_RESULT) == constants.B_FAILURE:
+            raise exceptions.InputError("Invalid console ID")
+
+        return [tab.decode() for tab in response[constants.B_TABS]]
+
+    async def session_kill(self, console_id: int) -> bool:
+        response = await self._context.call(self.SESSION_KILL, [console_id])
+
+        if response[constants.B_RESULT] == constants.B_FAILURE:
+            raise exceptions.InputError("Invalid console ID")
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def session_detach(self, console_id: int) -> bool:
+        response = await self._context.call(self.SESSION_DETACH, [console_id])
+
+        if response[constants.B_RESULT] == constants.B_FAILURE:
+            raise exceptions.InputError("Invalid console ID")
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+
+class AsyncConsole:
+    """
+    Asynchronous version of `Console`.
+    """
+
+    def __init__(self, rpc: AsyncRPCConsoles, console_id: int):
+        self._rpc = rpc
+        self.id = console_id
+        self.last_polling_statistics: Optional[PollingStatistics] = None
+
+    async def read(self) -> ConsoleData:
+        return await self._rpc.read(self.id)
+
+    async def write(self, data: str, add_new_line: bool = True) -> None:
+        await self._rpc.write(self.id, data, add_new_line)
+
+    async def destroy(self) -> bool:
+        return await self._rpc.destroy(self.id)
+
+    async def tabs(self, line: str) -> List[str]:
+        return await self._rpc.tabs(self.id, line)
+
+    async def stream_output(
+        self,
+        timeout: float = None,
+        reading_delay: float = 1,
+        success_flags: Optional[SuccessFlags] = None,
+        success_flag_hard_stop: bool = False,
+        polling: PollingStrategy = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield output from the console as it arrives.
+        Statistics of the gathering are stored in `last_polling_statistics`.
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined), with `success_flags` the
+            delay starts at a few milliseconds and grows up to it while no data arrives
+        :param success_flags: Flags or regular expressions (e.g. a prompt) indicating the gathered output is enough
+            (one flag == stop gathering), matches split between the readings are found as well
+        :param success_flag_hard_stop: Whether to exit once a success_flag is found
+        :param polling: Strategy deciding the delay between the readings (`reading_delay` is used if not defined)
+        :return: Output chunks
+        """
+        matcher = StreamMatcher(success_flags or [])
+        if polling is None:
+            # The end of the output is recognized by a flag, so the first readings can come right after each other
+            polling = ExponentialBackoff(maximum=reading_delay) if matcher else FixedDelay(reading_delay)
+        poller = Poller(polling, timeout)
+        self.last_polling_statistics = poller.statistics
+
+        received = False
+        end_is_nigh = False
+        while True:
+            console = await self.read()
+            poller.record(len(console.data))
+            if not (console.busy or console.data or not received or (matcher and not end_is_nigh)):
+                break
+
+            if console.data:
+                received = True
+                yield console.data
+
+            if matcher and matcher.feed(console.data) is not None:
+                if success_flag_hard_stop:
+                    break
+                end_is_nigh = True  # In case the console is still busy, continue to gather the data
+
+            if poller.expired():
+                break
+
+            await poller.async_wait()
+
+    async def gather_output(
+        self,
+        timeout: float = None,
+        reading_delay: float = 1,
+        success_flags: Optional[SuccessFlags] = None,
+        success_flag_hard_stop: bool = False,
+        polling: PollingStrategy = None,
+    ) -> str:
+        """
+        Gather output from the console.
+        See `stream_output` for more information.
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings
+        :param success_flags: Flags or regular expressions (e.g. a prompt) indicating the gathered output is enough
+            (one flag == stop gathering), matches split between the readings are found as well
+        :param success_flag_hard_stop: Whether to exit once a success_flag is found
+        :param polling: Strategy deciding the delay between the readings (`reading_delay` is used if not defined)
+        :return: Gathered output
+        """
+        return "".join(
+            [
+                chunk
+                async for chunk in self.stream_output(
+                    timeout, reading_delay, success_flags, success_flag_hard_stop, polling
+                )
+            ]
+        )
+
+    async def clear_buffer(self) -> None:
+        """
+        Clear unread data from the console.
+        :return: None
+        """
+        await self.read()
+
+    async def execute(
+        self,
+        command: str,
+        timeout: float = None,
+        reading_delay: float = 1,
+        success_flags: Optional[SuccessFlags] = None,
+        generate_success_flag: bool = True,
+        success_flag_hard_stop: bool = False,
+        polling: PollingStrategy = None,
+    ) -> str:
+        """
+        Execute a command or a set of commands (separated with `\\n`) and gather it's output.
+        See `Console.execute` for more information.
+        :param command: Command that will be executed in the console.
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings
+        :param generate_success_flag: If `success_flags` is undefined, generate a custom one and add it to the command
+        :param success_flags: Flags or regular expressions (e.g. a prompt) indicating the gathered output is enough
+            (one flag == stop gathering), matches split between the readings are found as well
+        :param success_flag_hard_stop: Whether to exit once a success_flag is found
+        :param polling: Strategy deciding the delay between the readings (`reading_delay` is used if not defined)
+        :return: Execution output
+        """
+        if not success_flags and generate_success_flag:
+            success_flags = generate_flag()
+            command += f"\necho '{success_flags}'"
+
+        await self.clear_buffer()
+        await self.write(command)
+
+        return await self.gather_output(timeout, reading_delay, success_flags, success_flag_hard_stop, polling)
+
+    async def execute_many(
+        self,
+        commands: Iterable[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> AsyncIterator[ConsoleCommandResult]:
+        """
+        Execute many commands (e.g. lines of a resource script), each followed by its own unique marker.
+        See `Console.execute_many` for more information.
+        :param commands: Commands to execute in the order of the execution
+        :param timeout: The maximum time to wait for the output of all the commands
+        :param reading_delay: Delay between the readings
+        :param polling: Strategy deciding the delay between the readings (`reading_delay` is used if not defined)
+        :return: Results in the order of the commands (the unfinished ones once the time runs out)
+        """
+        commands = list(commands)
+        if not commands:
+            return
+
+        markers = [EchoMarker() for _ in commands]
+        demultiplexer = CommandDemultiplexer(markers)
+        await self.clear_buffer()
+        await self.write("".join(marker.wrap(command) for marker, command in zip(markers, commands)), False)
+
+        previous = time.time()
+        async for chunk in self.stream_output(timeout, reading_delay, markers[-1].end_pattern, True, polling):
+            for index, output, _ in demultiplexer.feed(chunk):
+                now = time.time()
+                yield ConsoleCommandResult(commands[index], output, now - previous)
+                previous = now
+
+        for index, output, _ in demultiplexer.flush():
+            yield ConsoleCommandResult(commands[index], output, time.time() - previous)
+
+
+class AsyncConsolePool(ConsolePool):
+    """
+    Asynchronous version of `ConsolePool`.
+    The maintenance runs as a task of the event loop.
+    """
+
+    def __init__(
+        self,
+        context: AsyncContext,
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_ttl: float = 300,
+        health_check_interval: float = 30,
+        options: ConsoleOptions = None,
+        reset_timeout: float = 10,
+    ):
+        super().__init__(context, min_size, max_size, idle_ttl, health_check_interval, options, reset_timeout)
+        self.rpc = AsyncRPCConsoles(context)
+        self._task: Optional[asyncio.Task] = None
+        # Created lazily to bind to the running loop
+        self._changed: Optional[asyncio.Event] = None
+
+    async def __aenter__(self) -> "AsyncConsolePool":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    def _notify(self, count: Optional[int] = 1) -> None:
+        # Every waiter is woken up and the ones left without a console wait again
+        if self._changed is not None:
+            self._changed.set()
+
+    async def _create(self) -> AsyncConsole:
+        return AsyncConsole(self.rpc, (await self.rpc.create(self.options)).id)
+
+    async def _reset(self, console: AsyncConsole) -> bool:
+        in_module = self._needs_reset(await console.read())
+        if in_module is None:
+            return False
+        if in_module:
+            await console.execute("unset all\nback", self.reset_timeout, polling=self.polling)
+            return self._needs_reset(await console.read()) is False
+
+        return True
+
+    async def _destroy(self, consoles: List[AsyncConsole]) -> None:
+        for console in consoles:
+            try:
+                await console.destroy()
+            except Exception as ex:
+                logger.debug("Unable to destroy the console %s: %s", console.id, ex)
+
+        with self._lock:
+            self._forget(len(consoles))
+
+    async def fill(self) -> None:
+        with self._lock:
+            missing = self._reserve_missing()
+
+        batch = self._context.batch()
+        for _ in range(missing):
+            batch.submit(self._create)
+        results = await batch.execute()
+
+        errors = [result.error for result in results if result.error is not None]
+        consoles = [result.value for result in results if result.error is None]
+        with self._lock:
+            self._forget(len(errors))
+            rejected = [console for console in consoles if not self._release(console)]
+        await self._destroy(rejected)
+
+        if errors:
+            raise errors[0]
+
+    async def evict(self) -> None:
+        with self._lock:
+            expired = self._take_expired()
+
+        await self._destroy(expired)
+
+    async def health_check(self) -> None:
+        consoles = await self.rpc.list_consoles()
+        with self._lock:
+            unhealthy = self._take_unhealthy(consoles)
+
+        await self._destroy(unhealthy)
+        await self.fill()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.idle_ttl, self.health_check_interval))
+            try:
+                await self.evict()
+                await self.health_check()
+            except Exception:
+                logger.exception("Console pool maintenance failed")
+
+    async def start(self) -> None:
+        await self.fill()
+        if self._task is None and not self._closed:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def acquire(self, timeout: float = None) -> AsyncConsole:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._lock:
+                console, reserved = self._take()
+            if console is not None:
+                return console
+            if reserved:
+                break
+
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError("No console is available")
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+        try:
+            return await self._create()
+        except Exception:
+            with self._lock:
+                self._forget()
+            raise
+
+    async def release(self, console: AsyncConsole) -> None:
+        try:
+            reusable = await self._reset(console)
+        except Exception as ex:
+            logger.debug("Unable to reset the console %s: %s", console.id, ex)
+            reusable = False
+
+        with self._lock:
+            if reusable and self._release(console):
+                return
+
+        await self._destroy([console])
+
+    @asynccontextmanager
+    async def checkout(self, timeout: float = None) -> AsyncIterator[AsyncConsole]:
+        console = await self.acquire(timeout)
+        try:
+            yield console
+        finally:
+            await self.release(console)
+
+    async def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            task, self._task = self._task, None
+            idle, self._idle = [console for console, _ in self._idle], []
+            self._notify(None)
+
+        if task is not None:
+            task.cancel()
+            if task is not asyncio.current_task():
+                await asyncio.gather(task, return_exceptions=True)
+        await self._destroy(idle)
+
+
+class AsyncConsoles(ContextBase):
+    def __init__(self, context: AsyncContext):
+        super().__init__(context)
+        self.rpc = AsyncRPCConsoles(context)
+
+    async def create(self, options: ConsoleOptions = None) -> AsyncConsole:
+        console_info = await self.rpc.create(options)
+        return AsyncConsole(self.rpc, console_info.id)
+
+    async def all(self) -> List[ConsoleInfo]:
+        return await self.rpc.list_consoles()
+
+    async def pool(
+        self,
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_ttl: float = 300,
+        health_check_interval: float = 30,
+        options: ConsoleOptions = None,
+    ) -> AsyncConsolePool:
+        pool = AsyncConsolePool(self._context, min_size, max_size, idle_ttl, health_check_interval, options)
+        await pool.start()
+
+        return pool
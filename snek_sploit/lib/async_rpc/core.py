@@ -0,0 +1,96 @@
+import asyncio
+from typing import Dict
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.core import RPCCoreBase, VersionInformation, ModuleStatistics, FrameworkThread
+from snek_sploit.util import constants, exceptions
+
+
+class AsyncRPCCore(RPCCoreBase):
+    """
+    Asynchronous version of `RPCCore`.
+    """
+
+    async def version(self) -> VersionInformation:
+        response = await self._context.call(self.VERSION)
+
+        return self._parse_version(response)
+
+    async def stop(self) -> None:
+        context_timeout = self._context.timeout
+        timeout = (context_timeout[0] if isinstance(context_timeout, tuple) else context_timeout, 0.001)
+
+        try:
+            await self._context.call(self.STOP, timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def global_get(self, variable: str) -> str:
+        variable = variable.upper()
+
+        response = await self._context.call(self.GETG, [variable])
+
+        value = response[variable.encode()]
+        if value == "":
+            raise exceptions.InputError("Undefined variable")
+
+        return value.decode()
+
+    async def global_set(self, variable: str, value: str) -> bool:
+        variable = variable.upper()
+
+        response = await self._context.call(self.SETG, [variable, value])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def global_unset(self, variable: str) -> bool:
+        variable = variable.upper()
+
+        response = await self._context.call(self.UNSETG, [variable])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def save(self) -> bool:
+        response = await self._context.call(self.SAVE)
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def module_stats(self) -> ModuleStatistics:
+        response = await self._context.call(self.MODULE_STATS)
+
+        return self._parse_module_statistics(response)
+
+    async def add_module_path(self, path: str) -> ModuleStatistics:
+        try:
+            response = await self._context.call(self.ADD_MODULE_PATH, [path])
+        finally:
+            # Even if the call times out, the server keeps (re)loading the modules, so the cached ones are stale
+            self._context.modules_generation += 1
+
+        return self._parse_module_statistics(response)
+
+    async def reload_modules(self) -> ModuleStatistics:
+        try:
+            response = await self._context.call(self.RELOAD_MODULES)
+        finally:
+            # Even if the call times out, the server keeps (re)loading the modules, so the cached ones are stale
+            self._context.modules_generation += 1
+
+        return self._parse_module_statistics(response)
+
+    async def thread_list(self) -> Dict[int, FrameworkThread]:
+        response = await self._context.call(self.THREAD_LIST)
+
+        return {thread_id: self._parse_framework_thread(thread) for thread_id, thread in response.items()}
+
+    async def thread_kill(self, thread_id: int) -> bool:
+        response = await self._context.call(self.THREAD_KILL, [thread_id])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+
+class AsyncCore(ContextBase):
+    def __init__(self, context: AsyncContext):
+        super().__init__(context)
+        self.rpc = AsyncRPCCore(context)
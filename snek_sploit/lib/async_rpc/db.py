@@ -0,0 +1,150 @@
+from dataclasses import asdict
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.db import RPCDBBase, CrackedCredentialOptions, CredentialOptions, AnalyzeHostOptions
+from snek_sploit.util import constants
+
+
+class AsyncRPCDB(RPCDBBase):
+    """
+    Asynchronous version of `RPCDB`.
+    """
+
+    async def create_cracked_credential(self, options: CrackedCredentialOptions = None) -> object:
+        options = asdict(options) if options is not None else {}
+
+        return await self._context.call(self.CREATE_CRACKED_CREDENTIAL, [options])
+
+    async def create_credential(self, options: CredentialOptions) -> object:
+        options = asdict(options) if options is not None else {}
+
+        return await self._context.call(self.CREATE_CREDENTIAL, [options])
+
+    async def invalidate_login(self, options: dict) -> object:
+        return await self._context.call(self.INVALIDATE_LOGIN, [options])
+
+    async def creds(self, workspace_name: str) -> object:
+        return await self._context.call(self.CREDS, [{"workspace": workspace_name}])
+
+    async def add_workspace(self, name: str) -> bool:
+        response = await self._context.call(self.ADD_WORKSPACE, [name])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def analyze_host(self, options: AnalyzeHostOptions) -> object:
+        return await self._context.call(self.ANALYZE_HOST, [asdict(options)])
+
+    async def del_creds(self, *args) -> object:
+        return await self._context.call(self.DEL_CREDS, list(args))
+
+    async def hosts(self, *args) -> object:
+        return await self._context.call(self.HOSTS, list(args))
+
+    async def services(self, *args) -> object:
+        return await self._context.call(self.SERVICES, list(args))
+
+    async def vulns(self, *args) -> object:
+        return await self._context.call(self.VULNS, list(args))
+
+    async def workspaces(self, *args) -> object:
+        return await self._context.call(self.WORKSPACES, list(args))
+
+    async def current_workspace(self, *args) -> object:
+        return await self._context.call(self.CURRENT_WORKSPACE, list(args))
+
+    async def get_workspace(self, *args) -> object:
+        return await self._context.call(self.GET_WORKSPACE, list(args))
+
+    async def set_workspace(self, *args) -> object:
+        return await self._context.call(self.SET_WORKSPACE, list(args))
+
+    async def del_workspace(self, *args) -> object:
+        return await self._context.call(self.DEL_WORKSPACE, list(args))
+
+    async def get_host(self, *args) -> object:
+        return await self._context.call(self.GET_HOST, list(args))
+
+    async def report_host(self, *args) -> object:
+        return await self._context.call(self.REPORT_HOST, list(args))
+
+    async def report_service(self, *args) -> object:
+        return await self._context.call(self.REPORT_SERVICE, list(args))
+
+    async def get_service(self, *args) -> object:
+        return await self._context.call(self.GET_SERVICE, list(args))
+
+    async def get_note(self, *args) -> object:
+        return await self._context.call(self.GET_NOTE, list(args))
+
+    async def get_client(self, *args) -> object:
+        return await self._context.call(self.GET_CLIENT, list(args))
+
+    async def report_client(self, *args) -> object:
+        return await self._context.call(self.REPORT_CLIENT, list(args))
+
+    async def report_note(self, *args) -> object:
+        return await self._context.call(self.REPORT_NOTE, list(args))
+
+    async def notes(self, *args) -> object:
+        return await self._context.call(self.NOTES, list(args))
+
+    async def get_ref(self, *args) -> object:
+        return await self._context.call(self.GET_REF, list(args))
+
+    async def del_vuln(self, *args) -> object:
+        return await self._context.call(self.DEL_VULN, list(args))
+
+    async def del_note(self, *args) -> object:
+        return await self._context.call(self.DEL_NOTE, list(args))
+
+    async def del_service(self, *args) -> object:
+        return await self._context.call(self.DEL_SERVICE, list(args))
+
+    async def del_host(self, *args) -> object:
+        return await self._context.call(self.DEL_HOST, list(args))
+
+    async def report_vuln(self, *args) -> object:
+        return await self._context.call(self.REPORT_VULN, list(args))
+
+    async def events(self, *args) -> object:
+        return await self._context.call(self.EVENTS, list(args))
+
+    async def report_event(self, *args) -> object:
+        return await self._context.call(self.REPORT_EVENT, list(args))
+
+    async def report_loot(self, *args) -> object:
+        return await self._context.call(self.REPORT_LOOT, list(args))
+
+    async def loots(self, *args) -> object:
+        return await self._context.call(self.LOOTS, list(args))
+
+    async def import_data(self, *args) -> object:
+        return await self._context.call(self.IMPORT_DATA, list(args))
+
+    async def get_vuln(self, *args) -> object:
+        return await self._context.call(self.GET_VULN, list(args))
+
+    async def clients(self, *args) -> object:
+        return await self._context.call(self.CLIENTS, list(args))
+
+    async def del_client(self, *args) -> object:
+        return await self._context.call(self.DEL_CLIENT, list(args))
+
+    async def driver(self, *args) -> object:
+        return await self._context.call(self.DRIVER, list(args))
+
+    async def connect(self, *args) -> object:
+        return await self._context.call(self.CONNECT, list(args))
+
+    async def disconnect(self, *args) -> object:
+        return await self._context.call(self.DISCONNECT, list(args))
+
+    async def status(self, *args) -> object:
+        return await self._context.call(self.STATUS, list(args))
+
+
+class AsyncDB(ContextBase):
+    def __init__(self, context: AsyncContext):
+        super().__init__(context)
+        self.rpc = AsyncRPCDB(context)
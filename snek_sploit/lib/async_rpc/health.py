@@ -0,0 +1,21 @@
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.health import RPCHealthBase
+from snek_sploit.util import constants
+
+
+class AsyncRPCHealth(RPCHealthBase):
+    """
+    Asynchronous version of `RPCHealth`.
+    """
+
+    async def check(self) -> bool:
+        response = await self._context.call(self.CHECK, use_token=False)
+
+        return response[constants.STATUS] == constants.B_UP
+
+
+class AsyncHealth(ContextBase):
+    def __init__(self, context: AsyncContext):
+        super().__init__(context)
+        self.rpc = AsyncRPCHealth(context)
@@ -0,0 +1,49 @@
+from typing import Dict
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.jobs import RPCJobsBase, JobInformation
+from snek_sploit.util import constants, exceptions
+
+
+class AsyncRPCJobs(RPCJobsBase):
+    """
+    Asynchronous version of `RPCJobs`.
+    """
+
+    async def info(self, job_id: int) -> JobInformation:
+        response = await self._context.call(self.INFO, [job_id])
+
+        return self._parse_job_information(response)
+
+    async def list_jobs(self) -> Dict[int, str]:
+        response = await self._context.call(self.LIST, [])
+
+        return {int(key): value.decode() for key, value in response.items()}
+
+    async def stop(self, job_id: int) -> bool:
+        response = await self._context.call(self.STOP, [job_id])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+
+class AsyncJobs(ContextBase):
+    def __init__(self, context: AsyncContext):
+        super().__init__(context)
+        self.rpc = AsyncRPCJobs(context)
+
+    async def all(self) -> Dict[int, JobInformation]:
+        batch = self._context.batch()
+        job_ids = list(await self.rpc.list_jobs())
+        for job_id in job_ids:
+            batch.submit(self.rpc.info, job_id)
+
+        jobs = {}
+        for job_id, result in zip(job_ids, await batch.execute()):
+            if isinstance(result.error, exceptions.RPCError):
+                continue
+            if result.error is not None:
+                raise result.error
+            jobs[job_id] = result.value
+
+        return jobs
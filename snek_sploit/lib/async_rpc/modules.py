@@ -0,0 +1,370 @@
+import asyncio
+import logging
+from dataclasses import asdict, astuple
+from typing import List, Dict, Union, Any, Callable, Awaitable, Optional, Iterable, AsyncIterator
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.async_rpc.core import AsyncRPCCore
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.modules import (
+    RPCModulesBase,
+    ModuleCatalog,
+    ModuleResultWaiter,
+    ModuleResult,
+    ModuleSearchIndex,
+    ModuleShortInfo,
+    ModuleRunningStatistics,
+    ModuleExecutionInfo,
+    EncodingOptions,
+)
+from snek_sploit.util import constants
+from snek_sploit.util.decoding import DECODE
+from snek_sploit.util.enums import ModuleType
+from snek_sploit.util.polling import PollingStrategy
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRPCModules(RPCModulesBase):
+    """
+    Asynchronous version of `RPCModules`.
+    """
+
+    async def _list_modules(self, endpoint: str, fields: List[str] = None, architectures: List[str] = None):
+        """
+        List modules that support filtering by fields and architectures.
+        :param endpoint: Endpoint name
+        :param fields: Module information fields to display
+        :param architectures: Module supported architectures
+        :return: List of module names. Optionally with some fields.
+        """
+        if fields is not None:
+            fields = ",".join(fields)
+
+        if architectures is not None:
+            architectures = ",".join(architectures)
+
+        response = await self._context.call(endpoint, [fields, architectures])
+
+        return response[constants.B_MODULES]
+
+    async def list_exploit_modules(self) -> List[str]:
+        response = await self._context.call(self.EXPLOITS)
+
+        return response[constants.B_MODULES]
+
+    async def list_evasion_modules(self) -> List[str]:
+        response = await self._context.call(self.EVASION)
+
+        return response[constants.B_MODULES]
+
+    async def list_auxiliary_modules(self) -> List[str]:
+        response = await self._context.call(self.AUXILIARY)
+
+        return response[constants.B_MODULES]
+
+    async def list_payload_modules(
+        self, fields: List[str] = None, architectures: List[str] = None
+    ) -> Union[List[str], Dict[str, Dict[str, str]]]:
+        return await self._list_modules(self.PAYLOADS, fields, architectures)
+
+    async def list_encoder_modules(
+        self, fields: List[str] = None, architectures: List[str] = None
+    ) -> Union[List[str], Dict[str, Dict[str, str]]]:
+        return await self._list_modules(self.ENCODERS, fields, architectures)
+
+    async def list_nop_modules(
+        self, fields: List[str] = None, architectures: List[str] = None
+    ) -> Union[List[str], Dict[str, Dict[str, str]]]:
+        return await self._list_modules(self.NOPS, fields, architectures)
+
+    async def list_post_modules(self) -> List[str]:
+        response = await self._context.call(self.POST)
+
+        return response[constants.B_MODULES]
+
+    async def info_html(self, module_type: ModuleType, module_name: str) -> str:
+        return await self._context.call(self.INFO_HTML, [module_type, module_name])
+
+    async def info(self, module_type: ModuleType, module_name: str) -> Dict[str, Union[str, int, list, dict, bool]]:
+        response = await self._context.call(self.INFO, [module_type, module_name], schema=DECODE)
+
+        return response
+
+    async def search(self, substring: str) -> List[ModuleShortInfo]:
+        response = await self._context.call(self.SEARCH, [substring])
+
+        return [self._parse_module_short_info(info) for info in response]
+
+    async def compatible_exploit_payloads(self, exploit_module_name: str) -> List[str]:
+        response = await self._context.call(self.COMPATIBLE_PAYLOADS, [exploit_module_name])
+
+        return response[constants.B_PAYLOADS]
+
+    async def compatible_evasion_payloads(self, evasion_module_name: str) -> List[str]:
+        response = await self._context.call(self.COMPATIBLE_EVASION_PAYLOADS, [evasion_module_name])
+
+        return response[constants.B_PAYLOADS]
+
+    async def compatible_post_sessions(self, post_module_name: str) -> List[int]:
+        response = await self._context.call(self.COMPATIBLE_SESSIONS, [post_module_name])
+
+        return response[constants.B_SESSIONS]
+
+    async def target_compatible_exploit_payloads(self, exploit_module_name: str, target: int) -> List[str]:
+        response = await self._context.call(self.TARGET_COMPATIBLE_PAYLOADS, [exploit_module_name, target])
+
+        return response[constants.B_PAYLOADS]
+
+    async def target_compatible_evasion_payloads(self, evasion_module_name: str, target: int) -> List[str]:
+        response = await self._context.call(self.TARGET_COMPATIBLE_EVASION_PAYLOADS, [evasion_module_name, target])
+
+        return response[constants.B_PAYLOADS]
+
+    async def running_stats(self) -> ModuleRunningStatistics:
+        response = await self._context.call(self.RUNNING_STATS)
+
+        return ModuleRunningStatistics(
+            [each.decode() for each in response[constants.B_WAITING]],
+            [each.decode() for each in response[constants.B_RUNNING]],
+            [each.decode() for each in response[constants.B_RESULTS]],
+        )
+
+    async def list_module_options(
+        self, module_type: ModuleType, module_name: str
+    ) -> Dict[str, Dict[str, Union[dict, list, str, bool, int]]]:
+        response = await self._context.call(self.OPTIONS, [module_type, module_name], schema=DECODE)
+
+        return response
+
+    async def execute(self, module_type: ModuleType, module_name: str, options: Dict[str, Any]) -> ModuleExecutionInfo:
+        response = await self._context.call(self.EXECUTE, [module_type, module_name, options])
+
+        return ModuleExecutionInfo(response[constants.B_JOB_ID], response[constants.B_UUID].decode())
+
+    async def check(self, module_type: ModuleType, module_name: str, options: Dict[str, Any]) -> ModuleExecutionInfo:
+        response = await self._context.call(self.CHECK, [module_type, module_name, options])
+
+        return ModuleExecutionInfo(response[constants.B_JOB_ID], response[constants.B_UUID].decode())
+
+    async def results(self, uuid: str) -> Dict[str, Any]:
+        response = await self._context.call(self.RESULTS, [uuid])
+
+        if response[constants.B_STATUS] == constants.B_RUNNING:
+            return {constants.STATUS: constants.RUNNING}
+        elif response[constants.B_STATUS] == constants.B_ERRORED:
+            return {constants.STATUS: constants.ERRORED, constants.ERROR: response[constants.B_ERROR]}
+        else:
+            return {constants.STATUS: constants.COMPLETED, constants.RESULT: response[constants.B_RESULT]}
+
+    async def executable_formats(self) -> List[str]:
+        response = await self._context.call(self.EXECUTABLE_FORMATS)
+
+        return [each.decode() for each in response]
+
+    async def transform_formats(self) -> List[str]:
+        response = await self._context.call(self.TRANSFORM_FORMATS)
+
+        return [each.decode() for each in response]
+
+    async def encryption_formats(self) -> List[str]:
+        response = await self._context.call(self.ENCRYPTION_FORMATS)
+
+        return [each.decode() for each in response]
+
+    async def platforms(self) -> List[str]:
+        return await self._context.call(self.PLATFORMS)
+
+    async def architectures(self) -> List[str]:
+        response = await self._context.call(self.ARCHITECTURES)
+
+        return [each.decode() for each in response]
+
+    async def encode_formats(self) -> List[str]:
+        response = await self._context.call(self.ENCODE_FORMATS)
+
+        return [each.decode() for each in response]
+
+    async def encode(self, data: str, encoder: str, options: EncodingOptions) -> str:
+        response = await self._context.call(self.ENCODE, [data, encoder, asdict(options)])
+
+        return response[constants.B_ENCODED].decode()
+
+
+class AsyncModuleCatalog(ModuleCatalog):
+    """
+    Asynchronous version of `ModuleCatalog`.
+    """
+
+    def __init__(self, context: AsyncContext, cache_directory: str = None):
+        super().__init__(context, cache_directory)
+        self.rpc = AsyncRPCModules(context)
+        self._core = AsyncRPCCore(context)
+
+    async def _ensure_valid(self) -> None:
+        if self._is_valid():
+            return
+
+        if self._key is not None:
+            self.clear()
+
+        generation = self._context.modules_generation
+        self._activate(self._create_key(await self._core.version(), await self._core.module_stats()), generation)
+
+    async def _get(self, section: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        await self._ensure_valid()
+        found, value = self._lookup(section, key)
+        if not found:
+            value = await fetch()
+            self._store(section, key, value)
+
+        return value
+
+    async def list_modules(self, module_type: ModuleType) -> List[str]:
+        module_type = ModuleType(module_type)
+
+        return await self._get(self.LISTS, module_type.value, self._list_endpoints()[module_type])
+
+    async def info(self, module_type: ModuleType, module_name: str) -> Dict[str, Union[str, int, list, dict, bool]]:
+        module_type = ModuleType(module_type)
+
+        return await self._get(
+            self.INFO, f"{module_type.value}/{module_name}", lambda: self.rpc.info(module_type, module_name)
+        )
+
+    async def list_module_options(
+        self, module_type: ModuleType, module_name: str
+    ) -> Dict[str, Dict[str, Union[dict, list, str, bool, int]]]:
+        module_type = ModuleType(module_type)
+
+        return await self._get(
+            self.OPTIONS,
+            f"{module_type.value}/{module_name}",
+            lambda: self.rpc.list_module_options(module_type, module_name),
+        )
+
+    async def compatible_exploit_payloads(self, exploit_module_name: str) -> List[str]:
+        return await self._get(
+            self.COMPATIBLE_PAYLOADS,
+            exploit_module_name,
+            lambda: self.rpc.compatible_exploit_payloads(exploit_module_name),
+        )
+
+    async def search(self, substring: str) -> List[ModuleShortInfo]:
+        async def fetch():
+            return [list(astuple(each)) for each in await self.rpc.search(substring)]
+
+        found = await self._get(self.SEARCH, substring, fetch)
+
+        return [ModuleShortInfo(*each) for each in found]
+
+    async def search_index(self) -> ModuleSearchIndex:
+        await self._ensure_valid()
+        if self._index_key != self._key:
+            key = self._key
+            for module_type in ModuleType:
+                self._index.update(await self.search(self._type_query(module_type)), module_type)
+            self._index_key = key
+
+        return self._index
+
+
+class AsyncModuleResultWaiter(ModuleResultWaiter):
+    """
+    Asynchronous version of `ModuleResultWaiter`.
+    The poller runs as a task of the event loop and the executions are tracked using its futures.
+    """
+
+    def __init__(self, context: AsyncContext, polling: PollingStrategy = None):
+        super().__init__(context, polling)
+        self.rpc = AsyncRPCModules(context)
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _set_future(future: asyncio.Future, result: Optional[ModuleResult], error: Optional[Exception]):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def poll(self) -> int:
+        uuids = self._pending()
+        if not uuids:
+            return 0
+
+        finished = self._finished(await self.rpc.running_stats(), uuids)
+        batch = self._context.batch()
+        for uuid in finished:
+            batch.submit(self.rpc.results, uuid)
+
+        return sum(
+            self._resolve(uuid, result.value, result.error) for uuid, result in zip(finished, await batch.execute())
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._delay)
+            try:
+                resolved = await self.poll()
+            except Exception:
+                logger.exception("Unable to poll the module statistics")
+                resolved = 0
+
+            if not self._futures:
+                if self._task is asyncio.current_task():
+                    self._task = None
+                return
+
+            self._delay = self.polling.next_delay(self._delay, resolved)
+
+    def add(self, uuid: str) -> asyncio.Future:
+        future = self._futures.get(uuid)
+        if future is not None and not future.cancelled():
+            return future
+
+        future = self._futures[uuid] = asyncio.get_running_loop().create_future()
+        self._delay = self.polling.next_delay(None, 0)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+        return future
+
+    async def wait(self, uuid: str, timeout: float = None) -> ModuleResult:
+        future = self.add(uuid)
+        try:
+            # The shared future mustn't be cancelled by the timeout
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:  # Not the builtin one before Python 3.11
+            if not future.done():
+                raise TimeoutError(f"The execution {uuid} didn't finish in time") from None
+            raise
+
+    async def as_completed(self, uuids: Iterable[str], timeout: float = None) -> AsyncIterator[ModuleResult]:
+        for future in asyncio.as_completed([self.add(uuid) for uuid in uuids], timeout=timeout):
+            try:
+                result = await future
+            except asyncio.TimeoutError:  # Not the builtin one before Python 3.11
+                raise TimeoutError("Not all executions finished in time") from None
+
+            yield result
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        futures, self._futures = self._futures, {}
+        for future in futures.values():
+            future.cancel()
+        if task is not None:
+            task.cancel()
+            if task is not asyncio.current_task():
+                await asyncio.gather(task, return_exceptions=True)
+
+
+class AsyncModules(ContextBase):
+    def __init__(self, context: AsyncContext, cache_directory: str = None):
+        super().__init__(context)
+        self.rpc = AsyncRPCModules(context)
+        self.catalog = AsyncModuleCatalog(context, cache_directory)
+        self.waiter = AsyncModuleResultWaiter(context)
@@ -0,0 +1,36 @@
+from typing import List
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.plugins import RPCPluginsBase
+from snek_sploit.util import constants
+
+
+class AsyncRPCPlugins(RPCPluginsBase):
+    """
+    Asynchronous version of `RPCPlugins`.
+    """
+
+    async def load(self, name: str, options: dict = None) -> bool:
+        if options is None:
+            options = {}
+
+        response = await self._context.call(self.LOAD, [name, options])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def unload(self, name: str) -> bool:
+        response = await self._context.call(self.UNLOAD, [name])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def list_loaded(self) -> List[str]:
+        response = await self._context.call(self.LOADED)
+
+        return response[constants.PLUGINS]
+
+
+class AsyncPlugins(ContextBase):
+    def __init__(self, context: AsyncContext):
+        super().__init__(context)
+        self.rpc = AsyncRPCPlugins(context)
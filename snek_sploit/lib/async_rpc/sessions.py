@@ -0,0 +1,701 @@
+import asyncio
+import inspect
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from typing import List, Dict, Union, Iterable, AsyncIterator, Optional
+import time
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import ContextBase
+from snek_sploit.lib.rpc.sessions import (
+    RPCSessionsBase,
+    SessionRegistry,
+    SessionWatcher,
+    SessionEvent,
+    SessionCallback,
+    SessionInformation,
+    SessionExecutionResult,
+    ProcessExecutionResult,
+    CommandResult,
+    MeterpreterSessionTransportOptions,
+    SessionMeterpreter,
+)
+from snek_sploit.util import constants, exceptions
+from snek_sploit.util.enums import SessionType, SessionEventType
+from snek_sploit.util.matching import StreamMatcher, SuccessFlags, CommandMarkers, CommandDemultiplexer
+from snek_sploit.util.polling import PollingStrategy, PollingStatistics, FixedDelay, ExponentialBackoff, Poller
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRPCSessions(RPCSessionsBase):
+    """
+    Asynchronous version of `RPCSessions`.
+    """
+
+    async def list_sessions(self) -> Dict[int, SessionInformation]:
+        response = await self._context.call(self.LIST)
+
+        return {key: self._parse_session_information(value) for key, value in response.items()}
+
+    async def stop(self, session_id: int) -> bool:
+        response = await self._context.call(self.STOP, [session_id])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def shell_read(self, session_id: int, pointer: int = None) -> str:
+        response = await self._context.call(self.SHELL_READ, [session_id, pointer])
+        data = response[constants.B_DATA]
+
+        return data.decode() if isinstance(data, bytes) else data
+
+    async def shell_write(self, session_id: int, data: str) -> int:
+        if not data.endswith("\n"):
+            data += "\n"
+
+        response = await self._context.call(self.SHELL_WRITE, [session_id, data])
+
+        return int(response[constants.B_WRITE_COUNT]) if response[constants.B_WRITE_COUNT].isdigit() else -1
+
+    async def shell_upgrade(self, session_id: int, local_host: str, local_port: int) -> bool:
+        response = await self._context.call(self.SHELL_UPGRADE, [session_id, local_host, local_port])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def meterpreter_read(self, session_id: int) -> str:
+        response = await self._context.call(self.METERPRETER_READ, [session_id])
+
+        return response[constants.B_DATA].decode()
+
+    async def meterpreter_write(self, session_id: int, data: str) -> bool:
+        response = await self._context.call(self.METERPRETER_WRITE, [session_id, data])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def meterpreter_session_detach(self, session_id: int) -> bool:
+        response = await self._context.call(self.METERPRETER_SESSION_DETACH, [session_id])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def meterpreter_session_kill(self, session_id: int) -> bool:
+        response = await self._context.call(self.METERPRETER_SESSION_KILL, [session_id])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def meterpreter_tabs(self, session_id: int, line: str) -> List[str]:
+        response = await self._context.call(self.METERPRETER_TABS, [session_id, line])
+
+        return [each.decode() for each in response[constants.B_TABS]]
+
+    async def meterpreter_run_single(self, session_id: int, data: str) -> bool:
+        response = await self._context.call(self.METERPRETER_RUN_SINGLE, [session_id, data])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def meterpreter_script(self, session_id: int, script_name: str) -> bool:
+        response = await self._context.call(self.METERPRETER_SCRIPT, [session_id, script_name])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def meterpreter_transport_change(self, session_id: int, options: MeterpreterSessionTransportOptions) -> bool:
+        response = await self._context.call(self.METERPRETER_TRANSPORT_CHANGE, [session_id, asdict(options)])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+    async def meterpreter_directory_separator(self, session_id: int) -> str:
+        response = await self._context.call(self.METERPRETER_DIRECTORY_SEPARATOR, [session_id])
+
+        return response[constants.B_SEPARATOR].decode()
+
+    async def compatible_modules(self, session_id: int) -> List[str]:
+        response = await self._context.call(self.COMPATIBLE_MODULES, [session_id])
+
+        return [each.decode() for each in response[constants.B_MODULES]]
+
+    async def ring_read(self, session_id: int, pointer: int = None) -> str:
+        response = await self._context.call(self.RING_READ, [session_id, pointer])
+        data = response[constants.B_DATA]
+
+        return data.decode() if isinstance(data, bytes) else data
+
+    async def ring_put(self, session_id: int, data: str) -> int:
+        response = await self._context.call(self.RING_PUT, [session_id, data])
+
+        return int(response[constants.B_WRITE_COUNT]) if response[constants.B_WRITE_COUNT].isdigit() else -1
+
+    async def ring_last(self, session_id: int) -> int:
+        response = await self._context.call(self.RING_LAST, [session_id])
+
+        return response[constants.B_SEQ]
+
+    async def ring_clear(self, session_id: int) -> bool:
+        response = await self._context.call(self.RING_CLEAR, [session_id])
+
+        return response[constants.B_RESULT] == constants.B_SUCCESS
+
+
+class AsyncSessionRegistry(SessionRegistry):
+    """
+    Asynchronous version of `SessionRegistry`.
+    """
+
+    def __init__(self, rpc: AsyncRPCSessions, ttl: float = 0):
+        super().__init__(rpc, ttl)
+        self._lock: Optional[asyncio.Lock] = None  # Created lazily to bind to the running loop
+
+    async def refresh(self) -> Dict[int, SessionInformation]:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        generation = self._generation
+        async with self._lock:
+            if self._generation != generation:  # Another caller refreshed the snapshot while this one was waiting
+                return self._sessions
+
+            requested = time.monotonic()
+            self._store(await self._rpc.list_sessions(), requested)
+
+            return self._sessions
+
+    async def snapshot(self, max_age: float = None) -> Dict[int, SessionInformation]:
+        if self._is_valid(max_age):
+            return self._sessions
+
+        return await self.refresh()
+
+    async def get(
+        self, session_id: int, max_age: float = None, refresh_missing: bool = True
+    ) -> Optional[SessionInformation]:
+        valid = self._is_valid(max_age)
+        sessions = self._sessions if valid else await self.refresh()
+        if session_id not in sessions and valid and refresh_missing:
+            sessions = await self.refresh()
+
+        return sessions.get(session_id)
+
+
+class AsyncSessionWatcher(SessionWatcher):
+    """
+    Asynchronous version of `SessionWatcher`.
+    The poller runs as a task of the event loop and the callbacks can be coroutine functions.
+    """
+
+    def __init__(self, registry: AsyncSessionRegistry, polling: PollingStrategy = None):
+        super().__init__(registry, polling)
+        self._task: Optional[asyncio.Task] = None
+
+    async def _dispatch(self, events: List[SessionEvent]) -> None:
+        for event in events:
+            for callback in self._listener_callbacks(event):
+                try:
+                    result = callback(event)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception:
+                    logger.exception("Session watcher callback failed")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._delay)
+            try:
+                events = self._compare(await self._registry.snapshot(self._delay))
+            except Exception:
+                logger.exception("Unable to poll the session list")
+                self._delay = self.polling.next_delay(self._delay, 0)
+                continue
+
+            await self._dispatch(events)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        known = await self._registry.snapshot(0)
+        if self._task is not None:  # Started while the snapshot was requested
+            return
+
+        self._known, self._delay = None, None
+        self._compare(known)
+        self._task = asyncio.ensure_future(self._run())
+
+    def _cancel(self) -> Optional[asyncio.Task]:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+
+        return task
+
+    async def stop(self) -> None:
+        task = self._cancel()
+        # The poller can be stopped by its own callback
+        if task is not None and task is not asyncio.current_task():
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def add_listener(
+        self, on_open: SessionCallback = None, on_close: SessionCallback = None, on_change: SessionCallback = None
+    ) -> int:
+        with self._lock:
+            listener_id = self._next_listener_id
+            self._next_listener_id += 1
+            self._listeners[listener_id] = {
+                SessionEventType.OPENED: on_open,
+                SessionEventType.CLOSED: on_close,
+                SessionEventType.CHANGED: on_change,
+            }
+
+        await self.start()
+
+        return listener_id
+
+    def remove_listener(self, listener_id: int) -> None:
+        with self._lock:
+            self._listeners.pop(listener_id, None)
+            if not self._listeners:
+                self._cancel()
+
+    async def events(self, timeout: float = None) -> AsyncIterator[SessionEvent]:
+        events: asyncio.Queue = asyncio.Queue()
+        listener_id = await self.add_listener(events.put_nowait, events.put_nowait, events.put_nowait)
+        try:
+            while True:
+                try:
+                    yield await asyncio.wait_for(events.get(), timeout)
+                except asyncio.TimeoutError:
+                    return
+        finally:
+            self.remove_listener(listener_id)
+
+
+class AsyncSession(ABC):
+    """
+    Asynchronous version of `Session`.
+    Since the information can't be fetched in the constructor, it must be supplied (use `AsyncSessions.get`).
+    """
+
+    def __init__(
+        self,
+        rpc: AsyncRPCSessions,
+        session_id: int,
+        info: SessionInformation,
+        registry: AsyncSessionRegistry = None,
+    ):
+        self._rpc = rpc
+        self._registry = registry
+        self.id = session_id
+        self.last_polling_statistics: Optional[PollingStatistics] = None
+        self.last_exit_code: Optional[int] = None
+        # The maximum time to wait for more output once it pauses, if the end of the output is marked by a flag and
+        # there's no timeout (e.g. a command waiting for input never prints the flag)
+        self.idle_timeout: float = 30
+        self._info = info
+        self._info_assigned = False
+
+    @property
+    def info(self) -> SessionInformation:
+        """
+        Information about the session from the registry's latest snapshot (the property can't refresh it, use
+        `fetch_information` for that). Once the session disappears, the last known information is returned.
+        Assigned information is returned instead, until `fetch_information` is called.
+        :return: Information about the session
+        """
+        if self._registry is not None and not self._info_assigned:
+            info = self._registry.cached(self.id)
+            if info is not None:
+                self._info = info
+
+        return self._info
+
+    @info.setter
+    def info(self, info: SessionInformation) -> None:
+        self._info = info
+        self._info_assigned = True
+
+    @property
+    def windows(self) -> bool:
+        info = self.info
+        return any("windows" in (value or "").lower() for value in (info.platform, info.via_payload))
+
+    async def fetch_information(self) -> SessionInformation:
+        if self._registry is None:
+            info = (await self._rpc.list_sessions()).get(self.id)
+        else:
+            info = await self._registry.get(self.id)
+        if info is None:
+            raise KeyError(self.id)
+
+        self._info = info
+        self._info_assigned = False
+
+        return info
+
+    async def kill(self) -> bool:
+        result = await self._rpc.stop(self.id)
+        if self._registry is not None:
+            self._registry.invalidate()
+
+        return result
+
+    async def compatible_post_modules(self):
+        return await self._rpc.compatible_modules(self.id)
+
+    @abstractmethod
+    async def write(self, data: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def read(self) -> str:
+        pass
+
+    @abstractmethod
+    async def execute(self, command: str, timeout: float, reading_delay: float, polling: PollingStrategy) -> str:
+        pass
+
+    @abstractmethod
+    async def execute_in_shell(
+        self, executable: str, arguments: List[str], timeout: float, reading_delay: float
+    ) -> Union[str, ProcessExecutionResult]:
+        pass
+
+    async def stream_output(
+        self,
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+        success_flags: Optional[SuccessFlags] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield output from the session as it arrives.
+        See `Session.stream_output` for more information.
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :param success_flags: Flags or regular expressions marking the end of the output
+        :return: Output chunks
+        """
+        matcher = StreamMatcher(success_flags or [])
+        if polling is None:
+            # The end of the output is recognized by a flag, so the first readings can come right after each other
+            polling = ExponentialBackoff(maximum=reading_delay) if matcher else FixedDelay(reading_delay)
+        poller = Poller(polling, timeout, self.idle_timeout if timeout is None else None)
+        self.last_polling_statistics = poller.statistics
+
+        received = False
+        while True:
+            data = await self.read()
+            poller.record(len(data))
+            if not data and received and not matcher:  # All the data is returned at once
+                break
+
+            if data:
+                received = True
+                yield data
+                if matcher and matcher.feed(data) is not None:
+                    break
+
+            if poller.expired():
+                break
+
+            await poller.async_wait()
+
+    async def gather_output(
+        self,
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+        success_flags: Optional[SuccessFlags] = None,
+    ) -> str:
+        """
+        Gather output from the session.
+        See `stream_output` for more information.
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :param success_flags: Flags or regular expressions marking the end of the output
+        :return: Gathered output
+        """
+        return "".join([chunk async for chunk in self.stream_output(timeout, reading_delay, polling, success_flags)])
+
+    async def _execute_with_markers(
+        self, command: str, timeout: float = None, reading_delay: float = 1, polling: PollingStrategy = None
+    ) -> str:
+        """
+        Execute a command in a shell, surrounded by unique markers.
+        See `Session._execute_with_markers` for more information.
+        :param command: Command to execute
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :return: Output of the command without the markers
+        """
+        markers = CommandMarkers(self.windows)
+        await self.clear_buffer()
+        await self.write(markers.wrap(command))
+        output = await self.gather_output(timeout, reading_delay, polling, markers.end_pattern)
+        output, self.last_exit_code = markers.parse(output)
+
+        return output
+
+    async def execute_batch(
+        self,
+        commands: Iterable[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> AsyncIterator[CommandResult]:
+        """
+        Execute many commands in a shell, each surrounded by its own unique markers.
+        See `Session.execute_batch` for more information.
+        :param commands: Commands to execute in the order of the execution
+        :param timeout: The maximum time to wait for the output of all the commands
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :return: Results in the order of the commands (the unfinished ones once the time runs out)
+        """
+        commands = list(commands)
+        if not commands:
+            return
+
+        windows = self.windows
+        markers = [CommandMarkers(windows) for _ in commands]
+        demultiplexer = CommandDemultiplexer(markers)
+        await self.clear_buffer()
+        await self.write("".join(each.wrap(command) for each, command in zip(markers, commands)))
+
+        previous = time.time()
+        async for chunk in self.stream_output(timeout, reading_delay, polling, markers[-1].end_pattern):
+            for index, output, self.last_exit_code in demultiplexer.feed(chunk):
+                now = time.time()
+                yield CommandResult(commands[index], output, self.last_exit_code, now - previous)
+                previous = now
+
+        for index, output, self.last_exit_code in demultiplexer.flush():
+            yield CommandResult(commands[index], output, elapsed=time.time() - previous)
+
+    async def clear_buffer(self) -> None:
+        """
+        Clear unread data from the session.
+        :return: None
+        """
+        await self.read()
+
+
+class AsyncSessionShell(AsyncSession):
+    async def write(self, data: str) -> bool:
+        await self._rpc.shell_write(self.id, data)
+        return True
+
+    async def read(self) -> str:
+        return await self._rpc.shell_read(self.id)
+
+    async def upgrade_to_meterpreter(self, local_host: str, local_port: int) -> bool:
+        return await self._rpc.shell_upgrade(self.id, local_host, local_port)
+
+    async def execute(
+        self, command: str, timeout: float = None, reading_delay: float = 1, polling: PollingStrategy = None
+    ) -> str:
+        return await self._execute_with_markers(command, timeout, reading_delay, polling)
+
+    async def execute_in_shell(
+        self,
+        executable: str,
+        arguments: List[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> str:
+        command = " ".join([executable, *arguments])
+
+        return await self.execute(command, timeout, reading_delay, polling)
+
+
+class AsyncSessionMeterpreter(AsyncSession):
+    async def directory_separator(self) -> str:
+        return await self._rpc.meterpreter_directory_separator(self.id)
+
+    async def write(self, data: str) -> bool:
+        return await self._rpc.meterpreter_write(self.id, data)
+
+    async def read(self) -> str:
+        return await self._rpc.meterpreter_read(self.id)
+
+    async def tabs(self, line: str) -> List[str]:
+        return await self._rpc.meterpreter_tabs(self.id, line)
+
+    async def run_single(self, data: str) -> bool:
+        return await self._rpc.meterpreter_run_single(self.id, data)
+
+    async def run_script(self, script_name: str) -> bool:
+        return await self._rpc.meterpreter_script(self.id, script_name)
+
+    async def detach(self) -> bool:
+        return await self._rpc.meterpreter_session_detach(self.id)
+
+    async def change_transport(self, options: MeterpreterSessionTransportOptions) -> bool:
+        return await self._rpc.meterpreter_transport_change(self.id, options)
+
+    async def execute(
+        self, command: str, timeout: float = None, reading_delay: float = 1, polling: PollingStrategy = None
+    ) -> str:
+        await self.clear_buffer()
+        await self.write(command)
+
+        return await self.gather_output(timeout, reading_delay, polling)
+
+    async def execute_batch(
+        self,
+        commands: Iterable[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> AsyncIterator[CommandResult]:
+        """
+        Execute many Meterpreter commands one by one.
+        See `SessionMeterpreter.execute_batch` for more information.
+        :param commands: Commands to execute in the order of the execution
+        :param timeout: The maximum time to wait for the output of each command
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :return: Results in the order of the commands (without the exit codes)
+        """
+        for command in commands:
+            start = time.time()
+            output = await self.execute(command, timeout, reading_delay, polling)
+            yield CommandResult(command, output, elapsed=time.time() - start)
+
+    async def execute_in_shell(
+        self,
+        executable: str,
+        arguments: List[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> ProcessExecutionResult:
+        """
+        Execute a command in the platform's shell in a new process and read its channel.
+        See `SessionMeterpreter.execute_in_shell` for more information.
+        :param executable: Executable (or shell command)
+        :param arguments: Arguments of the executable
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :return: Process ID, channel ID, standard and error output, and exit code (also stored in `last_exit_code`)
+        """
+        markers = CommandMarkers(self.windows)
+        await self.clear_buffer()
+        await self.run_single(SessionMeterpreter._create_process_command(markers, executable, arguments))
+        output = await self.gather_output(timeout, reading_delay, polling, markers.end_pattern)
+        result = SessionMeterpreter._parse_process_output(markers, output)
+        self.last_exit_code = result.exit_code
+
+        return result
+
+
+class AsyncSessionRing(AsyncSession):
+    async def write(self, data: str) -> bool:
+        await self._rpc.ring_put(self.id, data)
+        return True
+
+    async def read(self) -> str:
+        return await self._rpc.ring_read(self.id)
+
+    async def execute(
+        self, command: str, timeout: float = None, reading_delay: float = 1, polling: PollingStrategy = None
+    ) -> str:
+        return await self._execute_with_markers(command, timeout, reading_delay, polling)
+
+    async def execute_in_shell(
+        self,
+        executable: str,
+        arguments: List[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> str:
+        command = " ".join([executable, *arguments])
+
+        return await self.execute(command, timeout, reading_delay, polling)
+
+
+class AsyncSessions(ContextBase):
+    def __init__(self, context: AsyncContext, cache_ttl: float = 0):
+        super().__init__(context)
+        self.rpc = AsyncRPCSessions(context)
+        self.registry = AsyncSessionRegistry(self.rpc, cache_ttl)
+        self.watcher = AsyncSessionWatcher(self.registry)
+
+    def _create_session(
+        self, session_id: int, session_info: Optional[SessionInformation]
+    ) -> Union[AsyncSessionShell, AsyncSessionMeterpreter, AsyncSessionRing]:
+        """
+        Create a session object from already fetched session information.
+        :param session_id: ID of the session
+        :param session_info: Information about the session (None if it doesn't exist)
+        :return: Session object matching the session type
+        """
+        if session_info is None:
+            raise exceptions.InputError(f"Session with ID {session_id} doesn't exist.")
+        session_type = session_info.type
+        if session_type == SessionType.SHELL:
+            return AsyncSessionShell(self.rpc, session_id, session_info, self.registry)
+        elif session_type == SessionType.METERPRETER:
+            return AsyncSessionMeterpreter(self.rpc, session_id, session_info, self.registry)
+        else:
+            return AsyncSessionRing(self.rpc, session_id, session_info, self.registry)
+
+    async def get(self, session_id: int) -> Union[AsyncSessionShell, AsyncSessionMeterpreter, AsyncSessionRing]:
+        return self._create_session(session_id, await self.registry.get(session_id))
+
+    async def all(self) -> Dict[int, SessionInformation]:
+        return dict(await self.registry.snapshot())
+
+    async def filter(self, options: SessionInformation, strict: bool = False) -> Dict[int, SessionInformation]:
+        all_sessions = await self.registry.snapshot()
+        matched_sessions = {}
+        for session_id, session_info in all_sessions.items():
+            if session_info.match(options, strict):
+                matched_sessions[session_id] = session_info
+
+        return matched_sessions
+
+    async def execute_many(
+        self,
+        session_ids: Iterable[int],
+        command: str,
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+        max_concurrency: int = 10,
+    ) -> AsyncIterator[SessionExecutionResult]:
+        """
+        Execute a command in multiple sessions concurrently.
+        See `Sessions.execute_many` for more information.
+        :param session_ids: IDs of the sessions
+        :param command: Command to execute
+        :param timeout: The maximum time to wait for the output of each session
+        :param reading_delay: Delay between the readings
+        :param polling: Strategy deciding the delay between the readings
+        :param max_concurrency: Maximum number of sessions to execute the command in at the same time
+        :return: Execution results in the order of completion
+        """
+        all_sessions = await self.registry.snapshot()
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def execute(session_id: int) -> SessionExecutionResult:
+            async with semaphore:
+                start = time.time()
+                try:
+                    session = self._create_session(session_id, all_sessions.get(session_id))
+                    output = await session.execute(command, timeout, reading_delay, polling)
+                except Exception as ex:
+                    return SessionExecutionResult(session_id, error=ex, elapsed=time.time() - start)
+
+                return SessionExecutionResult(session_id, output, elapsed=time.time() - start)
+
+        tasks = [asyncio.ensure_future(execute(session_id)) for session_id in session_ids]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,315 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple, TypeVar, Union
+
+from snek_sploit.lib.metasploit import MetasploitClient
+from snek_sploit.lib.rpc.consoles import Console, ConsoleInfo, ConsoleOptions
+from snek_sploit.lib.rpc.jobs import JobInformation
+from snek_sploit.lib.rpc.sessions import SessionInformation, SessionShell, SessionMeterpreter, SessionRing
+from snek_sploit.util import exceptions
+from snek_sploit.util.enums import ModuleType
+from snek_sploit.util.records import record
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+# Sessions, jobs, and consoles are identified by the index of their server and their ID on the server
+ClusterKey = Tuple[int, Union[int, str]]
+
+
+@record
+class ServerLoad:
+    """
+    Load of a single server.
+
+    Parameters:
+        server: Index of the server
+        modules: Number of the waiting and running modules
+        threads: Number of the framework threads above the server's idle baseline (the fewest threads seen on it)
+        sessions: Number of the sessions
+        consoles: Number of the consoles
+    """
+
+    server: int
+    modules: int
+    threads: int
+    sessions: int
+    consoles: int
+
+    @property
+    def score(self) -> int:
+        return self.modules + self.threads + self.sessions + self.consoles
+
+
+@record
+class ClusterExecutionInfo:
+    """
+    Execution information, including the server the module runs on.
+    """
+
+    server: int
+    job_id: int
+    uuid: str
+
+
+class MetasploitCluster:
+    def __init__(self, clients: List[MetasploitClient], load_ttl: float = 1):
+        """
+        Several MSF RPC servers behind a single API.
+        New module executions and consoles go to the least loaded server. Existing sessions, jobs, and consoles stay on
+        the server that owns them, so they're identified by the index of the server and their ID (`ClusterKey`).
+        The merged views (e.g. `sessions.all`) leave out the unavailable servers, their errors are stored in
+        `last_errors`.
+        :param clients: Clients of the servers (logged in)
+        :param load_ttl: How long (in seconds) the load of the servers is cached before it's requested again
+        """
+        if not clients:
+            raise exceptions.InputError("The cluster needs at least one client")
+
+        self.clients = clients
+        self.load_ttl = load_ttl
+        # Errors of the servers left out of the last merged view, by the index of the server
+        self.last_errors: Dict[int, Exception] = {}
+
+        self._loads: Dict[int, ServerLoad] = {}
+        # An idle server already runs some threads, their number differs between the servers
+        self._thread_baselines: Dict[int, int] = {}
+        self._loads_time = float("-inf")
+        self._lock = threading.Lock()
+
+        self.consoles = ClusterConsoles(self)
+        self.jobs = ClusterJobs(self)
+        self.modules = ClusterModules(self)
+        self.sessions = ClusterSessions(self)
+
+    def close(self) -> None:
+        """
+        Close the clients.
+        :return: None
+        """
+        for client in self.clients:
+            client.close()
+
+    def __enter__(self) -> "MetasploitCluster":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def map(self, function: Callable[[MetasploitClient], T]) -> List[T]:
+        """
+        Call a function with each client concurrently.
+        :param function: Function to call
+        :return: Results in the order of the clients
+        """
+        with ThreadPoolExecutor(max_workers=len(self.clients)) as executor:
+            return list(executor.map(function, self.clients))
+
+    def map_capturing(self, function: Callable[[MetasploitClient], T]) -> List[Union[T, Exception]]:
+        """
+        Call a function with each client concurrently, the errors are returned instead of the results.
+        :param function: Function to call
+        :return: Results (or errors) in the order of the clients
+        """
+
+        def call(client: MetasploitClient) -> Union[T, Exception]:
+            try:
+                return function(client)
+            except Exception as ex:
+                return ex
+
+        return self.map(call)
+
+    def merge(self, function: Callable[[MetasploitClient], Dict[Any, T]]) -> Dict[ClusterKey, T]:
+        """
+        Merge dictionaries returned by each client. The servers whose call failed are left out, their errors are
+        stored in `last_errors`.
+        :param function: Function returning a dictionary for a client
+        :return: Merged dictionary, where the keys are prefixed with the index of the server
+        :raise Exception: The last error, in case no server is available
+        """
+        return self._merge_results(self.map_capturing(function))
+
+    def _merge_results(self, results: List[Union[Dict[Any, T], Exception]]) -> Dict[ClusterKey, T]:
+        """
+        Merge dictionaries returned by each client, leaving out the failed servers.
+        :param results: Dictionary of each server or the error raised while requesting it
+        :return: Merged dictionary, where the keys are prefixed with the index of the server
+        :raise Exception: The last error, in case no server is available
+        """
+        errors = {server: result for server, result in enumerate(results) if isinstance(result, Exception)}
+        self.last_errors = errors
+        if len(errors) == len(results):
+            raise results[-1]
+
+        for server, error in errors.items():
+            logger.warning("Server %s is left out of the merged view: %s", server, error)
+
+        return {
+            (server, key): value
+            for server, dictionary in enumerate(results)
+            if server not in errors
+            for key, value in dictionary.items()
+        }
+
+    @staticmethod
+    def _fetch_load(client: MetasploitClient) -> Tuple[int, int, int, int]:
+        """
+        Request the load of a server.
+        :param client: Client of the server
+        :return: Number of modules, threads, sessions, and consoles
+        """
+        batch = client.pipeline()
+        batch.submit(client.modules.rpc.running_stats)
+        batch.submit(client.core.rpc.thread_list)
+        batch.submit(client.sessions.rpc.list_sessions)
+        batch.submit(client.consoles.rpc.list_consoles)
+        results = batch.execute()
+        for result in results:
+            if result.error is not None:
+                raise result.error
+
+        statistics, threads, sessions, consoles = (result.value for result in results)
+
+        return len(statistics.waiting) + len(statistics.running), len(threads), len(sessions), len(consoles)
+
+    def _update_loads(self, results: List[Union[Tuple[int, int, int, int], Exception]]) -> None:
+        """
+        Replace the cached load of the servers. The threads are counted above the idle baseline of each server.
+        :param results: Load of each server or the error raised while requesting it
+        :return: None
+        :raise Exception: The last error, in case no server is available
+        """
+        if all(isinstance(result, Exception) for result in results):
+            raise results[-1]
+
+        with self._lock:
+            loads = {}
+            for server, result in enumerate(results):
+                if isinstance(result, Exception):
+                    continue
+
+                modules, threads, sessions, consoles = result
+                baseline = min(self._thread_baselines.get(server, threads), threads)
+                self._thread_baselines[server] = baseline
+                loads[server] = ServerLoad(server, modules, threads - baseline, sessions, consoles)
+
+            self._loads = loads
+            self._loads_time = time.monotonic()
+
+    def _is_load_valid(self) -> bool:
+        return time.monotonic() - self._loads_time < self.load_ttl
+
+    def load(self, refresh: bool = False) -> List[ServerLoad]:
+        """
+        Get the load of the available servers (the unavailable ones are left out).
+        :param refresh: Whether to request the load even if the cached one is still valid
+        :return: Load of each available server
+        :raise Exception: The last error, in case no server is available
+        """
+        if refresh or not self._is_load_valid():
+            self._update_loads(self.map_capturing(self._fetch_load))
+
+        return list(self._loads.values())
+
+    def _reserve(self, resource: str) -> int:
+        """
+        Pick the least loaded server for a new module execution or console.
+        The cached load of the server is increased, so the following picks take it into account before it's refreshed.
+        :param resource: Attribute of `ServerLoad` to increase
+        :return: Index of the server
+        """
+        self.load()
+        with self._lock:
+            load = min(self._loads.values(), key=lambda each: each.score)
+            setattr(load, resource, getattr(load, resource) + 1)
+
+        return load.server
+
+
+class ClusterConsoles:
+    def __init__(self, cluster: MetasploitCluster):
+        self._cluster = cluster
+
+    def create(self, options: ConsoleOptions = None) -> Console:
+        """
+        Create a console on the least loaded server.
+        :param options: Options used to initialize the console
+        :return: Console bound to its server
+        """
+        return self._cluster.clients[self._cluster._reserve("consoles")].consoles.create(options)
+
+    def all(self) -> Dict[ClusterKey, ConsoleInfo]:
+        """
+        List consoles of all servers.
+        :return: Server index and console ID, and information about the console
+        """
+        return self._cluster.merge(
+            lambda client: {console.id: console for console in client.consoles.rpc.list_consoles()}
+        )
+
+
+class ClusterJobs:
+    def __init__(self, cluster: MetasploitCluster):
+        self._cluster = cluster
+
+    def list_jobs(self) -> Dict[ClusterKey, str]:
+        """
+        List jobs of all servers.
+        :return: Server index and job ID, and job name
+        """
+        return self._cluster.merge(lambda client: client.jobs.rpc.list_jobs())
+
+    def all(self) -> Dict[ClusterKey, JobInformation]:
+        """
+        Get information about the jobs of all servers.
+        :return: Server index and job ID, and information about the job
+        """
+        return self._cluster.merge(lambda client: client.jobs.all())
+
+    def info(self, key: ClusterKey) -> JobInformation:
+        server, job_id = key
+        return self._cluster.clients[server].jobs.rpc.info(job_id)
+
+    def stop(self, key: ClusterKey) -> bool:
+        server, job_id = key
+        return self._cluster.clients[server].jobs.rpc.stop(job_id)
+
+
+class ClusterModules:
+    def __init__(self, cluster: MetasploitCluster):
+        self._cluster = cluster
+
+    def execute(self, module_type: ModuleType, module_name: str, options: Dict[str, Any]) -> ClusterExecutionInfo:
+        """
+        Execute a module on the least loaded server.
+        :param module_type: Module type
+        :param module_name: Module name
+        :param options: Module options used for the execution (datastore/variables)
+        :return: Server index, job ID, and UUID
+        """
+        server = self._cluster._reserve("modules")
+        execution = self._cluster.clients[server].modules.rpc.execute(module_type, module_name, options)
+
+        return ClusterExecutionInfo(server, execution.job_id, execution.uuid)
+
+
+class ClusterSessions:
+    def __init__(self, cluster: MetasploitCluster):
+        self._cluster = cluster
+
+    def get(self, key: ClusterKey) -> Union[SessionShell, SessionMeterpreter, SessionRing]:
+        server, session_id = key
+        return self._cluster.clients[server].sessions.get(session_id)
+
+    def all(self) -> Dict[ClusterKey, SessionInformation]:
+        """
+        List sessions of all servers.
+        :return: Server index and session ID, and information about the session
+        """
+        return self._cluster.merge(lambda client: client.sessions.all())
+
+    def filter(self, options: SessionInformation, strict: bool = False) -> Dict[ClusterKey, SessionInformation]:
+        return self._cluster.merge(lambda client: client.sessions.filter(options, strict))
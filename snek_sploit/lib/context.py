@@ -1,18 +1,52 @@
 import requests
+from requests.adapters import HTTPAdapter
 import msgpack
+import threading
+import time
 from abc import ABC
-from typing import Union, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Union, List, Dict, Any, Optional, Callable, Tuple
 
 from snek_sploit.util import constants, exceptions
-from snek_sploit.util.retry import retry
+from snek_sploit.util.circuit import CircuitBreaker
+from snek_sploit.util.decoding import ResponseSchema
+from snek_sploit.util.enums import CircuitState
+from snek_sploit.util.metrics import MetricsRegistry
+from snek_sploit.util.records import record
+from snek_sploit.util.retry import RetryPolicy
 
 
 ResponseDict = Dict[Union[int, str, bytes], Union[int, str, bytes, list, dict, bool]]
 ResponseList = List[Union[str, bytes, dict]]
 RPCResponse = Union[ResponseDict, str, ResponseList]
 
+# Content type of the requests and the responses (including the error ones)
+MSGPACK_CONTENT_TYPE = "binary/message-pack"
+# Endpoint used to probe whether a server recovered
+HEALTH_CHECK = "health.check"
+# Endpoints used to obtain a new token once the current one is rejected
+AUTH_LOGIN = "auth.login"
+AUTH_TOKEN_ADD = "auth.token_add"
 
-class Context:
+
+@record
+class CallResult:
+    """
+    Result of a single call made in a batch.
+
+    Parameters:
+        value: Return value of the call (None if the call failed)
+        error: Exception raised by the call (None if the call succeeded)
+        elapsed: Duration of the call in seconds
+    """
+
+    value: Any = None
+    error: Optional[Exception] = None
+    elapsed: float = 0
+
+
+class BaseContext(ABC):
     def __init__(
         self,
         username: str,
@@ -25,9 +59,11 @@ class Context:
         token: str = "",
         timeout: Union[float, tuple] = None,
         verbose: bool = False,
+        standby: List[Tuple[str, int]] = None,
+        circuit_breaker: CircuitBreaker = None,
     ):
         """
-        Context holds information used for authentication and communication with MSF RPC.
+        Transport independent part of the context (authentication, serialization, error handling, and failover).
         :param username: Username used for authentication
         :param password: Password used for authentication
         :param host: MSF RPC Host
@@ -38,18 +74,39 @@ class Context:
         :param token: Token used for authentication
         :param timeout: Timeout for the RPC
         :param verbose: Whether to print the raw RPC response
+        :param standby: Hosts and ports of the standby servers, used once the circuit breaker of the primary one opens
+        :param circuit_breaker: Circuit breaker of the primary server, each standby server gets a copy of it
+            (disabled if None and there are no standby servers)
         """
         self.username = username
         self.password = password
         self.token = token
 
-        self._url = f"http{'s' if ssl else ''}://{host}:{port}{uri}"
-        self._headers = {"Content-type": "binary/message-pack"}
+        self._servers = [(host, port), *(standby or [])]
+        self._urls = [
+            f"http{'s' if ssl else ''}://{server_host}:{server_port}{uri}" for server_host, server_port in self._servers
+        ]
+        self._headers = {"Content-type": MSGPACK_CONTENT_TYPE}
         self.timeout = timeout
         self._certificate = certificate if certificate != "" else False  # MSF's self-signed certificate
 
         self.verbose = verbose
 
+        # Incremented each time the client (re)loads modules, so the cached module data can be invalidated
+        self.modules_generation = 0
+        # Metrics are recorded only if a registry is set
+        self.metrics: Optional[MetricsRegistry] = None
+        self.retry_policy = RetryPolicy()
+
+        # The calls go to the first server whose circuit breaker is closed (all of them go to the primary if disabled)
+        if circuit_breaker is None and standby:
+            circuit_breaker = CircuitBreaker()
+        self.circuit_breakers: Optional[List[CircuitBreaker]] = None
+        if circuit_breaker is not None:
+            self.circuit_breakers = [circuit_breaker, *(circuit_breaker.copy() for _ in self._servers[1:])]
+        # Timeout of the health check probing whether a server recovered
+        self.probe_timeout = 2.0
+
     def _create_arguments(self, call_arguments: list, use_token: bool) -> list:
         """
         Create arguments that will be sent to the endpoint.
@@ -64,18 +121,160 @@ class Context:
 
         return arguments
 
-    @retry(attempts=3, on_errors=(requests.RequestException,))
+    def _create_request(self, endpoint: str, arguments: list, use_token: bool) -> bytes:
+        """
+        Serialize the call.
+        :param endpoint: Endpoint name
+        :param arguments: Arguments that will be processed and passed to the endpoint
+        :param use_token: Whether to use the context token or not
+        :return: Serialized request body
+        """
+        return msgpack.dumps([endpoint, *self._create_arguments(arguments, use_token)])
+
+    def _process_response(self, content: bytes, schema: ResponseSchema = None) -> RPCResponse:
+        """
+        Deserialize the response and check it for errors.
+        :param content: Raw response body
+        :param schema: Schema used to decode the response while it's being unpacked
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
+        :raise RPCError: In case the response contains errors
+        """
+        if schema is None:
+            response = msgpack.loads(content, strict_map_key=False)
+        else:
+            response = schema.loads(content)
+
+        if self.verbose:
+            print(response)
+
+        if isinstance(response, dict) and response.get(constants.ERROR) is not None:
+            raise exceptions.RPCError(response)
+
+        return response
+
+    def _is_token_rejected(self, error: exceptions.RPCError, use_token: bool) -> bool:
+        """
+        Check whether a call failed because its token was rejected (it expired or the server restarted) and a new one
+        can be obtained. Such calls aren't executed by the server, so it's safe to replay them with the new token.
+        :param error: Error returned by the call
+        :param use_token: Whether the call used the context token
+        :return: True if the token can be refreshed and the call replayed
+        """
+        response = error.args[0] if error.args else None
+
+        return (
+            use_token
+            and self.username != ""
+            and isinstance(response, dict)
+            and response.get(constants.ERROR_CODE) == 401
+        )
+
+    def _retry_delay(self, endpoint: str, attempt: int) -> Optional[float]:
+        """
+        Decide whether to retry a call that failed without a response.
+        :param endpoint: Endpoint name
+        :param attempt: Number of the failed attempt (starting with 0)
+        :return: Delay before the retry, None if the call mustn't be retried
+        """
+        delay = self.retry_policy.retry_delay(endpoint, attempt)
+        if delay is not None and self.metrics is not None:
+            self.metrics.record_retry(endpoint)
+
+        return delay
+
+
+class Context(BaseContext):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        host: str = "127.0.0.1",
+        port: int = 55553,
+        uri: str = "/api/",
+        ssl: bool = True,
+        certificate: str = "",
+        token: str = "",
+        timeout: Union[float, tuple] = None,
+        verbose: bool = False,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        standby: List[Tuple[str, int]] = None,
+        circuit_breaker: CircuitBreaker = None,
+    ):
+        """
+        Context holds information used for authentication and communication with MSF RPC.
+        :param username: Username used for authentication
+        :param password: Password used for authentication
+        :param host: MSF RPC Host
+        :param port: MSF RPC Port
+        :param uri: API uri
+        :param ssl: Whether the server is using SSL(TLS) or not
+        :param certificate: Path to the certificate used for SSL(TLS)
+        :param token: Token used for authentication
+        :param timeout: Timeout for the RPC
+        :param verbose: Whether to print the raw RPC response
+        :param pool_connections: Number of connection pools (hosts) to cache
+        :param pool_maxsize: Maximum number of keep-alive connections kept open per host
+        :param pool_block: Whether to wait for a free connection once the pool is exhausted instead of opening a new one
+        :param standby: Hosts and ports of the standby servers, used once the circuit breaker of the primary one opens
+        :param circuit_breaker: Circuit breaker of the primary server, each standby server gets a copy of it
+            (disabled if None and there are no standby servers)
+        """
+        super().__init__(
+            username, password, host, port, uri, ssl, certificate, token, timeout, verbose, standby, circuit_breaker
+        )
+        self.pool_maxsize = pool_maxsize
+        self._login_lock = threading.Lock()
+
+        # Keep-alive connections are reused across calls, so the TCP connection and TLS handshake happen only once
+        self._session = requests.Session()
+        self._session.headers.update(self._headers)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def close(self) -> None:
+        """
+        Close the pooled connections.
+        :return: None
+        """
+        self._session.close()
+
+    def __enter__(self) -> "Context":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def batch(self, max_workers: int = None) -> "Batch":
+        """
+        Create a batch of independent calls, that will be dispatched concurrently.
+        :param max_workers: Maximum number of calls in flight (by default the size of the connection pool)
+        :return: Empty batch
+        """
+        return Batch(self, max_workers)
+
     def call(
-        self, endpoint: str, arguments: list = None, use_token: bool = True, timeout: Union[float, tuple] = None
+        self,
+        endpoint: str,
+        arguments: list = None,
+        use_token: bool = True,
+        timeout: Union[float, tuple] = None,
+        schema: ResponseSchema = None,
     ) -> RPCResponse:
         """
         Create a call to an endpoint.
+        Calls that fail without a response are retried according to `retry_policy` (only read-only ones by default).
+        Calls rejected because of an expired token are replayed after logging in again.
         :param endpoint: Endpoint name
         :param arguments: Arguments that will be processed and passed to the endpoint
         :param use_token: Whether to use the context token or not
         :param timeout: Timeout for the call
-        :return: Unprocessed endpoint response
+        :param schema: Schema used to decode the response, by default the response is returned as is
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
         :raise RPCError: In case the response contains errors
+        :raise CircuitOpenError: In case no server is available (only if the circuit breakers are enabled)
         :full error example:
             {'error': True, 'error_class': 'Msf::RPC::Exception', 'error_string': 'Msf::RPC::Exception',
              'error_backtrace': ["lib/msf/core/rpc/v10/rpc_base.rb:26:in `error'", ...],
@@ -84,42 +283,218 @@ class Context:
         if timeout is None:
             timeout = self.timeout
 
-        data = msgpack.dumps([endpoint, *self._create_arguments(arguments, use_token)])
-        request = requests.post(self._url, data, headers=self._headers, verify=self._certificate, timeout=timeout)
-        response = msgpack.loads(request.content, strict_map_key=False)
+        self.retry_policy.record_call()
+        token = self.token
+        try:
+            return self._call(endpoint, self._create_request(endpoint, arguments, use_token), timeout, schema)
+        except exceptions.RPCError as ex:
+            if not self._is_token_rejected(ex, use_token):
+                raise
 
-        if self.verbose:
-            print(response)
+        self.refresh_token(token)
 
-        if isinstance(response, dict) and response.get(constants.ERROR) is not None:
-            raise exceptions.RPCError(response)
+        return self._call(endpoint, self._create_request(endpoint, arguments, use_token), timeout, schema)
 
-        return response
+    def _call(self, endpoint: str, data: bytes, timeout: Union[float, tuple], schema: ResponseSchema) -> RPCResponse:
+        """
+        Make a call, retry it according to `retry_policy` if it fails without a response.
+        :param endpoint: Endpoint name
+        :param data: Serialized call
+        :param timeout: Timeout for the call
+        :param schema: Schema used to decode the response
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
+        :raise RPCError: In case the response contains errors
+        """
+        attempt = 0
+        while True:
+            try:
+                return self._send(endpoint, data, timeout, schema)
+            except requests.RequestException:
+                delay = self._retry_delay(endpoint, attempt)
+                if delay is None:
+                    raise
 
+            time.sleep(delay)
+            attempt += 1
 
-class ContextBase(ABC):
-    def __init__(self, context: Context):
+    def refresh_token(self, rejected_token: str = None) -> None:
+        """
+        Log in again and make the new token permanent (like `Auth.login`).
+        Only a single login is made at a time, callers that find out the same token was rejected wait for it.
+        :param rejected_token: Token that was rejected, the login is skipped if the token was replaced in the meantime
+        :return: None
+        """
+        with self._login_lock:
+            if rejected_token is not None and self.token != rejected_token:
+                return
+
+            response = self.call(AUTH_LOGIN, [self.username, self.password], use_token=False)
+            self.token = response[constants.B_TOKEN].decode()
+            # Not replayed on rejection, since the login lock is held
+            data = self._create_request(AUTH_TOKEN_ADD, [self.token], True)
+            self._call(AUTH_TOKEN_ADD, data, self.timeout, None)
+
+    def _send(self, endpoint: str, data: bytes, timeout: Union[float, tuple], schema: ResponseSchema) -> RPCResponse:
+        """
+        Make a single attempt of a call, using the first available server.
+        :param endpoint: Endpoint name
+        :param data: Serialized call
+        :param timeout: Timeout for the call
+        :param schema: Schema used to decode the response
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
+        :raise RPCError: In case the response contains errors
+        :raise CircuitOpenError: In case no server is available
+        """
+        if self.circuit_breakers is None:
+            return self._send_to(0, endpoint, data, timeout, schema)
+
+        for server, breaker in enumerate(self.circuit_breakers):
+            state = breaker.before_call()
+            if state is CircuitState.OPEN or (state is CircuitState.HALF_OPEN and not self._probe(server)):
+                continue
+
+            start = time.perf_counter()
+            try:
+                response = self._send_to(server, endpoint, data, timeout, schema)
+            except requests.RequestException:
+                breaker.record_failure()
+                raise
+            except exceptions.RPCError:
+                breaker.record_success(time.perf_counter() - start)
+                raise
+
+            breaker.record_success(time.perf_counter() - start)
+            return response
+
+        raise exceptions.CircuitOpenError("No server is available, all circuit breakers are open")
+
+    def _probe(self, server: int) -> bool:
+        """
+        Check whether a server recovered and close or reopen its circuit breaker accordingly.
+        :param server: Index of the server
+        :return: Whether the server is healthy
+        """
+        healthy = False
+        try:
+            response = self._send_to(
+                server, HEALTH_CHECK, self._create_request(HEALTH_CHECK, None, False), self.probe_timeout, None
+            )
+            healthy = isinstance(response, dict) and response.get(constants.STATUS) == constants.B_UP
+        except Exception:  # Whatever went wrong, the server isn't healthy
+            pass
+        finally:
+            # The breaker must leave the half-open state, otherwise the server would never be probed again
+            if healthy:
+                self.circuit_breakers[server].record_success()
+            else:
+                self.circuit_breakers[server].record_failure()
+
+        return healthy
+
+    def _send_to(
+        self, server: int, endpoint: str, data: bytes, timeout: Union[float, tuple], schema: ResponseSchema
+    ) -> RPCResponse:
+        """
+        Make a single attempt of a call to a specific server.
+        :param server: Index of the server
+        :param endpoint: Endpoint name
+        :param data: Serialized call
+        :param timeout: Timeout for the call
+        :param schema: Schema used to decode the response
+        :return: Unprocessed (or decoded, if a schema is supplied) endpoint response
+        :raise RPCError: In case the response contains errors
+        """
+        if self.metrics is None:
+            return self._process_response(self._post(self._urls[server], data, timeout), schema)
+
+        with self.metrics.measure(endpoint, len(data)) as measurement:
+            content = self._post(self._urls[server], data, timeout)
+            measurement.response_bytes = len(content)
+
+            return self._process_response(content, schema)
+
+    def _post(self, url: str, data: bytes, timeout: Union[float, tuple]) -> bytes:
+        """
+        Send the serialized call.
+        :param url: Server url
+        :param data: Serialized call
+        :param timeout: Timeout for the call
+        :return: Raw response body
+        :raise requests.HTTPError: In case the response isn't an MSF RPC one (e.g. an error page of a proxy)
+        """
+        # `verify` must be passed per request, otherwise `REQUESTS_CA_BUNDLE` takes precedence over the session's value
+        request = self._session.post(url, data, verify=self._certificate, timeout=timeout)
+        # MSF reports the errors with a status code and a serialized body, other responses come from elsewhere
+        if request.status_code != 200 and not request.headers.get("Content-Type", "").startswith(MSGPACK_CONTENT_TYPE):
+            request.raise_for_status()
+
+        return request.content
+
+
+class Batch:
+    def __init__(self, context: Context, max_workers: int = None):
+        """
+        Queue of independent calls that are dispatched concurrently over the context's connection pool.
+        N calls then take about as long as the slowest of them instead of N round trips.
+        :param context: Context used for the calls
+        :param max_workers: Maximum number of calls in flight (by default the size of the connection pool)
+        """
         self._context = context
+        self._max_workers = max_workers or context.pool_maxsize
+        self._calls: List[Callable[[], Any]] = []
 
-    def _decode(self, to_decode: Union[dict, list, bytes, str, int]) -> Union[dict, list, str, int]:
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def call(self, endpoint: str, arguments: list = None, **kwargs) -> int:
         """
-        Decode everything into the correct type and decode bytes.
-        :param to_decode: Input you want to decode
-        :return: Decoded input
+        Queue a call to an endpoint.
+        :param endpoint: Endpoint name
+        :param arguments: Arguments that will be processed and passed to the endpoint
+        :param kwargs: use_token, timeout, schema
+        :return: Position of the call's result
         """
-        if isinstance(to_decode, dict):
-            decoded = {}
-            for key, value in to_decode.items():
-                decoded[self._decode(key)] = self._decode(value)
-        elif isinstance(to_decode, list):
-            decoded = [self._decode(each) for each in to_decode]
-        elif isinstance(to_decode, bytes):
-            decoded = to_decode.decode()
-        else:
-            decoded = to_decode
+        return self.submit(self._context.call, endpoint, arguments, **kwargs)
 
-        # TODO: also try to parse a datetime? Not sure if there is a united format in MSF
-        if isinstance(decoded, str) and decoded.isdigit():
-            decoded = int(decoded)
+    def submit(self, function: Callable[..., Any], *args, **kwargs) -> int:
+        """
+        Queue a method that makes a call, e.g. `client.jobs.rpc.info`, so its parsed result is returned.
+        :param function: Function to call
+        :param args: Positional arguments for the function
+        :param kwargs: Keyword arguments for the function
+        :return: Position of the call's result
+        """
+        self._calls.append(partial(function, *args, **kwargs))
+
+        return len(self._calls) - 1
 
-        return decoded
+    @staticmethod
+    def _run(function: Callable[[], Any]) -> CallResult:
+        """
+        Make a single call and capture its error.
+        :param function: Call to make
+        :return: Result of the call
+        """
+        start = time.time()
+        try:
+            return CallResult(function(), None, time.time() - start)
+        except Exception as ex:
+            return CallResult(None, ex, time.time() - start)
+
+    def execute(self) -> List[CallResult]:
+        """
+        Dispatch the queued calls and empty the queue.
+        Errors are captured per call, so one failing call doesn't affect the others.
+        :return: Results in the order the calls were queued
+        """
+        calls, self._calls = self._calls, []
+        if len(calls) <= 1:
+            return [self._run(function) for function in calls]
+
+        with ThreadPoolExecutor(max_workers=min(self._max_workers, len(calls))) as executor:
+            return list(executor.map(self._run, calls))
+
+
+class ContextBase(ABC):
+    def __init__(self, context: BaseContext):
+        self._context = context
@@ -1,7 +1,7 @@
 import urllib3
-from typing import Union
+from typing import Union, Optional, List, Tuple
 
-from snek_sploit.lib.context import Context, RPCResponse
+from snek_sploit.lib.context import Context, RPCResponse, Batch
 from snek_sploit.lib.rpc.auth import Auth
 from snek_sploit.lib.rpc.consoles import Consoles
 from snek_sploit.lib.rpc.core import Core
@@ -11,6 +11,9 @@ from snek_sploit.lib.rpc.jobs import Jobs
 from snek_sploit.lib.rpc.modules import Modules
 from snek_sploit.lib.rpc.plugins import Plugins
 from snek_sploit.lib.rpc.sessions import Sessions
+from snek_sploit.util.circuit import CircuitBreaker
+from snek_sploit.util.metrics import MetricsRegistry
+from snek_sploit.util.retry import RetryPolicy
 
 
 class MetasploitClient:
@@ -28,6 +31,15 @@ class MetasploitClient:
         disable_https_warnings: bool = False,
         timeout: Union[float, tuple] = None,
         verbose: bool = False,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        module_cache_directory: str = None,
+        metrics: MetricsRegistry = None,
+        retry_policy: RetryPolicy = None,
+        standby: List[Tuple[str, int]] = None,
+        circuit_breaker: CircuitBreaker = None,
+        session_cache_ttl: float = 0,
     ):
         """
         Client used for communication with MSF RPC.
@@ -43,25 +55,64 @@ class MetasploitClient:
         :param disable_https_warnings: Whether to disable warnings for an untrusted certificate
         :param timeout: Timeout for the RPC
         :param verbose: Whether to print the raw RPC response
+        :param pool_connections: Number of connection pools (hosts) to cache
+        :param pool_maxsize: Maximum number of keep-alive connections kept open per host
+        :param pool_block: Whether to wait for a free connection once the pool is exhausted instead of opening a new one
+        :param module_cache_directory: Directory used to persist the module catalog (`modules.catalog`) between runs
+        :param metrics: Registry used to record per-endpoint call metrics (nothing is recorded if None)
+        :param retry_policy: Policy deciding which failed calls are retried (by default, only read-only calls are)
+        :param standby: Hosts and ports of the standby servers, used once the circuit breaker of the primary one opens
+            (the token must be valid on them as well)
+        :param circuit_breaker: Circuit breaker of the primary server, each standby server gets a copy of it
+            (disabled if None and there are no standby servers)
+        :param session_cache_ttl: The maximum age of the cached session list in seconds (`sessions.registry`), with 0
+            only the concurrent calls share a single request
         """
         if disable_https_warnings:
             urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-        self._context = Context(username, password, host, port, uri, ssl, certificate, token, timeout, verbose)
+        self._context = Context(
+            username,
+            password,
+            host,
+            port,
+            uri,
+            ssl,
+            certificate,
+            token,
+            timeout,
+            verbose,
+            pool_connections,
+            pool_maxsize,
+            pool_block,
+            standby,
+            circuit_breaker,
+        )
 
+        self._context.metrics = metrics
+        if retry_policy is not None:
+            self._context.retry_policy = retry_policy
         self.auth = Auth(self._context)
         self.consoles = Consoles(self._context)
         self.core = Core(self._context)
         self.db = DB(self._context)
         self.health = Health(self._context)
         self.jobs = Jobs(self._context)
-        self.modules = Modules(self._context)
+        self.modules = Modules(self._context, module_cache_directory)
         self.plugins = Plugins(self._context)
-        self.sessions = Sessions(self._context)
+        self.sessions = Sessions(self._context, session_cache_ttl)
 
         if log_in:
             self.login()
 
+    @property
+    def metrics(self) -> Optional[MetricsRegistry]:
+        """
+        Registry with per-endpoint call metrics (None if the metrics are disabled).
+        :return: Metrics registry
+        """
+        return self._context.metrics
+
     def login(self) -> None:
         """
         Login.
@@ -76,6 +127,34 @@ class MetasploitClient:
         """
         self.auth.rpc.logout(self._context.token)
 
+    def close(self) -> None:
+        """
+        Persist the module catalog, stop the session watcher and the module result waiter, and close the pooled
+        connections.
+        :return: None
+        """
+        try:
+            self.modules.catalog.save()
+        finally:
+            # The background tasks and the connections must be closed even if the catalog can't be written
+            self.sessions.watcher.stop()
+            self.modules.waiter.stop()
+            self._context.close()
+
+    def __enter__(self) -> "MetasploitClient":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def pipeline(self, max_workers: int = None) -> Batch:
+        """
+        Wrapper for `self.context.batch`.
+        :param max_workers: Maximum number of calls in flight (by default the size of the connection pool)
+        :return: Empty batch of calls
+        """
+        return self._context.batch(max_workers)
+
     def call(self, endpoint: str, arguments: list = None, **kwargs) -> RPCResponse:
         """
         Wrapper for `self.context.call`.
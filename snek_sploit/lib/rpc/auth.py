@@ -4,9 +4,9 @@ from snek_sploit.lib.context import ContextBase, Context
 from snek_sploit.util import constants
 
 
-class RPCAuth(ContextBase):
+class RPCAuthBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Auth.html
+    Endpoints shared by `RPCAuth` and `AsyncRPCAuth`.
     """
 
     LOGIN = "auth.login"
@@ -16,6 +16,12 @@ class RPCAuth(ContextBase):
     TOKEN_LIST = "auth.token_list"
     TOKEN_GENERATE = "auth.token_generate"
 
+
+class RPCAuth(RPCAuthBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Auth.html
+    """
+
     def login(self, username: str, password: str) -> str:
         """
         Authenticate the client using the provided credentials.
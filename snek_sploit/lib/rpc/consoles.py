@@ -1,14 +1,23 @@
-import random
-import string
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Union
+import logging
+import re
+import threading
 import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Iterable, List, Optional, Iterator, Tuple
 
 from snek_sploit.lib.context import ContextBase, Context
 from snek_sploit.util import constants, exceptions
+from snek_sploit.util.records import record
+from snek_sploit.util.matching import StreamMatcher, SuccessFlags, generate_flag, EchoMarker, CommandDemultiplexer
+from snek_sploit.util.polling import PollingStrategy, PollingStatistics, FixedDelay, ExponentialBackoff, Poller
 
+logger = logging.getLogger(__name__)
+# Prompt of a console with an active module, e.g. `msf6 exploit(windows/smb/ms17_010_eternalblue) > `
+MODULE_PROMPT = re.compile(r"\w+\(.+\)")
 
-@dataclass
+
+@record
 class ConsoleInfo:
     """
     Information about the console.
@@ -19,7 +28,7 @@ class ConsoleInfo:
     busy: bool
 
 
-@dataclass
+@record
 class ConsoleData:
     """
     Information about the console, including returned data.
@@ -30,6 +39,23 @@ class ConsoleData:
     data: str
 
 
+@record
+class ConsoleCommandResult:
+    """
+    Result of a console command executed as a part of a batch.
+
+    Parameters:
+        command: Executed command
+        output: Output of the command
+        elapsed: Time in seconds between the end of the previous command (or the start of the batch) and the end of
+            this one
+    """
+
+    command: str
+    output: str
+    elapsed: float = 0
+
+
 @dataclass
 class ConsoleOptions:
     """
@@ -51,9 +77,9 @@ class ConsoleOptions:
     Plugins: List[str] = None  # Plugins to load
 
 
-class RPCConsoles(ContextBase):
+class RPCConsolesBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Console.html
+    Endpoints and response parsing shared by `RPCConsoles` and `AsyncRPCConsoles`.
     """
 
     CREATE = "console.create"
@@ -87,6 +113,12 @@ class RPCConsoles(ContextBase):
             response[constants.B_PROMPT].decode(), response[constants.B_BUSY], response[constants.B_DATA].decode()
         )
 
+
+class RPCConsoles(RPCConsolesBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Console.html
+    """
+
     def create(self, options: ConsoleOptions = None) -> ConsoleInfo:
         """
         Create a new framework console instance.
@@ -210,6 +242,7 @@ class Console:
     def __init__(self, rpc: RPCConsoles, console_id: int):
         self._rpc = rpc
         self.id = console_id
+        self.last_polling_statistics: Optional[PollingStatistics] = None
 
     def read(self) -> ConsoleData:
         return self._rpc.read(self.id)
@@ -223,43 +256,75 @@ class Console:
     def tabs(self, line: str) -> List[str]:
         return self._rpc.tabs(self.id, line)
 
-    def gather_output(
+    def stream_output(
         self,
         timeout: float = None,
         reading_delay: float = 1,
-        success_flags: Optional[Union[List[str], str]] = None,
+        success_flags: Optional[SuccessFlags] = None,
         success_flag_hard_stop: bool = False,
-    ) -> str:
+        polling: PollingStrategy = None,
+    ) -> Iterator[str]:
         """
-        Gather output from the console.
+        Yield output from the console as it arrives.
+        Statistics of the gathering are stored in `last_polling_statistics`.
         :param timeout: The maximum time to wait for the output
-        :param reading_delay: Delay between the readings
-        :param success_flags: Flags to indicate the gathered output is enough (one flag == stop gathering)
+        :param reading_delay: Delay between the readings (used if `polling` is not defined), with `success_flags` the
+            delay starts at a few milliseconds and grows up to it while no data arrives
+        :param success_flags: Flags or regular expressions (e.g. a prompt) indicating the gathered output is enough
+            (one flag == stop gathering), matches split between the readings are found as well
         :param success_flag_hard_stop: Whether to exit once a success_flag is found
-        :return: Gathered output
+        :param polling: Strategy deciding the delay between the readings (`reading_delay` is used if not defined)
+        :return: Output chunks
         """
-        if isinstance(success_flags, str):
-            success_flags = [success_flags]
-
-        if timeout:
-            timeout = time.time() + timeout
-
-        output = ""
+        matcher = StreamMatcher(success_flags or [])
+        if polling is None:
+            # The end of the output is recognized by a flag, so the first readings can come right after each other
+            polling = ExponentialBackoff(maximum=reading_delay) if matcher else FixedDelay(reading_delay)
+        poller = Poller(polling, timeout)
+        self.last_polling_statistics = poller.statistics
+
+        received = False
         end_is_nigh = False
-        while (console := self.read()).busy or console.data or not output or (success_flags and not end_is_nigh):
-            output += console.data
+        while True:
+            console = self.read()
+            poller.record(len(console.data))
+            if not (console.busy or console.data or not received or (matcher and not end_is_nigh)):
+                break
 
-            if success_flags and any(flag in console.data for flag in success_flags):
+            if console.data:
+                received = True
+                yield console.data
+
+            if matcher and matcher.feed(console.data) is not None:
                 if success_flag_hard_stop:
                     break
                 end_is_nigh = True  # In case the console is still busy, continue to gather the data
 
-            if timeout and time.time() >= timeout:
+            if poller.expired():
                 break
 
-            time.sleep(reading_delay)
+            poller.wait()
 
-        return output
+    def gather_output(
+        self,
+        timeout: float = None,
+        reading_delay: float = 1,
+        success_flags: Optional[SuccessFlags] = None,
+        success_flag_hard_stop: bool = False,
+        polling: PollingStrategy = None,
+    ) -> str:
+        """
+        Gather output from the console.
+        See `stream_output` for more information.
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings
+        :param success_flags: Flags or regular expressions (e.g. a prompt) indicating the gathered output is enough
+            (one flag == stop gathering), matches split between the readings are found as well
+        :param success_flag_hard_stop: Whether to exit once a success_flag is found
+        :param polling: Strategy deciding the delay between the readings (`reading_delay` is used if not defined)
+        :return: Gathered output
+        """
+        return "".join(self.stream_output(timeout, reading_delay, success_flags, success_flag_hard_stop, polling))
 
     def clear_buffer(self) -> None:
         """
@@ -273,9 +338,10 @@ class Console:
         command: str,
         timeout: float = None,
         reading_delay: float = 1,
-        success_flags: Optional[Union[List[str], str]] = None,
+        success_flags: Optional[SuccessFlags] = None,
         generate_success_flag: bool = True,
         success_flag_hard_stop: bool = False,
+        polling: PollingStrategy = None,
     ) -> str:
         """
         Execute a command or a set of commands (separated with `\n`) and gather it's output.
@@ -284,18 +350,392 @@ class Console:
         :param timeout: The maximum time to wait for the output
         :param reading_delay: Delay between the readings
         :param generate_success_flag: If `success_flags` is undefined, generate a custom one and add it to the command
-        :param success_flags: Flags to indicate the gathered output is enough (one flag == stop gathering)
+        :param success_flags: Flags or regular expressions (e.g. a prompt) indicating the gathered output is enough
+            (one flag == stop gathering), matches split between the readings are found as well
         :param success_flag_hard_stop: Whether to exit once a success_flag is found
+        :param polling: Strategy deciding the delay between the readings (`reading_delay` is used if not defined)
         :return: Execution output
         """
         if not success_flags and generate_success_flag:
-            success_flags = "".join(random.choices(string.ascii_letters + string.digits, k=20))
+            success_flags = generate_flag()
             command += f"\necho '{success_flags}'"
 
         self.clear_buffer()
         self.write(command)
 
-        return self.gather_output(timeout, reading_delay, success_flags, success_flag_hard_stop)
+        return self.gather_output(timeout, reading_delay, success_flags, success_flag_hard_stop, polling)
+
+    def execute_many(
+        self,
+        commands: Iterable[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> Iterator[ConsoleCommandResult]:
+        """
+        Execute many commands (e.g. lines of a resource script), each followed by its own unique marker.
+        All the commands are written at once and their output is gathered in a single polling loop. The output is
+        split by the markers and each result is yielded as soon as its marker arrives.
+        :param commands: Commands to execute in the order of the execution
+        :param timeout: The maximum time to wait for the output of all the commands
+        :param reading_delay: Delay between the readings
+        :param polling: Strategy deciding the delay between the readings (`reading_delay` is used if not defined)
+        :return: Results in the order of the commands (the unfinished ones once the time runs out)
+        """
+        commands = list(commands)
+        if not commands:
+            return
+
+        markers = [EchoMarker() for _ in commands]
+        demultiplexer = CommandDemultiplexer(markers)
+        self.clear_buffer()
+        self.write("".join(marker.wrap(command) for marker, command in zip(markers, commands)), False)
+
+        previous = time.time()
+        for chunk in self.stream_output(timeout, reading_delay, markers[-1].end_pattern, True, polling):
+            for index, output, _ in demultiplexer.feed(chunk):
+                now = time.time()
+                yield ConsoleCommandResult(commands[index], output, now - previous)
+                previous = now
+
+        for index, output, _ in demultiplexer.flush():
+            yield ConsoleCommandResult(commands[index], output, time.time() - previous)
+
+
+class ConsolePool(ContextBase):
+    def __init__(
+        self,
+        context: Context,
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_ttl: float = 300,
+        health_check_interval: float = 30,
+        options: ConsoleOptions = None,
+        reset_timeout: float = 10,
+    ):
+        """
+        Reusable consoles. Creating a console starts a new msfconsole instance on the server, which takes seconds, so
+        the consoles are created in advance, handed out using `checkout`, and reset once they're returned.
+        A background thread destroys the consoles idle for longer than `idle_ttl` (down to `min_size`) and checks the
+        rest using a single `console.list` per interval. Use `start` (or `Consoles.pool`) to create the first consoles.
+        :param context: Context used for the calls
+        :param min_size: Number of consoles kept ready
+        :param max_size: The maximum number of consoles (both idle and checked out)
+        :param idle_ttl: Time in seconds after which an idle console above `min_size` is destroyed
+        :param health_check_interval: Time in seconds between the checks of the idle consoles
+        :param options: Options used to initialize the consoles
+        :param reset_timeout: The maximum time to wait for a returned console to reset
+        """
+        super().__init__(context)
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise exceptions.InputError("The pool size must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self.rpc = RPCConsoles(context)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.health_check_interval = health_check_interval
+        self.options = options
+        self.reset_timeout = reset_timeout
+        self.polling: PollingStrategy = ExponentialBackoff()
+
+        # Idle consoles and the time they were returned, the most recently returned one is the last
+        self._idle: List[Tuple[Console, float]] = []
+        # Number of idle, checked out, and reserved (being created) consoles
+        self._size = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def __enter__(self) -> "ConsolePool":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _create(self) -> "Console":
+        return Console(self.rpc, self.rpc.create(self.options).id)
+
+    def _take(self) -> Tuple[Optional["Console"], bool]:
+        """
+        Take an idle console or reserve a place for a new one. Must be called with the lock held.
+        :return: Idle console (if any) and whether a place for a new console was reserved
+        :raise InputError: If the pool is closed
+        """
+        if self._closed:
+            raise exceptions.InputError("The console pool is closed")
+        if self._idle:
+            return self._idle.pop()[0], False
+        if self._size < self.max_size:
+            self._size += 1
+            return None, True
+
+        return None, False
+
+    def _reserve_missing(self) -> int:
+        """
+        Reserve places for the consoles missing to `min_size`. Must be called with the lock held.
+        :return: Number of reserved places
+        """
+        missing = 0 if self._closed else max(self.min_size - self._size, 0)
+        self._size += missing
+
+        return missing
+
+    def _take_expired(self) -> List["Console"]:
+        """
+        Take the consoles idle for longer than `idle_ttl`, so `min_size` consoles remain. Must be called with the lock
+        held.
+        :return: Expired consoles
+        """
+        now = time.monotonic()
+        expired = []
+        while self._size - len(expired) > self.min_size and self._idle and now - self._idle[0][1] >= self.idle_ttl:
+            expired.append(self._idle.pop(0)[0])
+
+        return expired
+
+    def _take_unhealthy(self, consoles: List[ConsoleInfo]) -> List["Console"]:
+        """
+        Take the idle consoles that no longer exist or are busy. Must be called with the lock held.
+        :param consoles: Consoles listed by the server
+        :return: Unhealthy consoles
+        """
+        healthy = {console.id for console in consoles if not console.busy}
+        unhealthy = [console for console, _ in self._idle if console.id not in healthy]
+        self._idle = [(console, returned) for console, returned in self._idle if console.id in healthy]
+
+        return unhealthy
+
+    def _needs_reset(self, data: ConsoleData) -> Optional[bool]:
+        """
+        Decide how to reset a returned console based on its state.
+        :param data: Console data read once the console was returned
+        :return: None if the console must be destroyed (it's still busy), whether to leave the active module otherwise
+        """
+        if data.busy:
+            return None
+
+        return MODULE_PROMPT.search(data.prompt) is not None
+
+    def _reset(self, console: "Console") -> bool:
+        """
+        Clear unread data, the module's options, and leave the module. The options are unset only while a module is
+        active, otherwise `unset all` would clear the global ones.
+        :param console: Returned console
+        :return: True if the console can be reused
+        """
+        in_module = self._needs_reset(console.read())
+        if in_module is None:
+            return False
+        if in_module:
+            console.execute("unset all\nback", self.reset_timeout, polling=self.polling)
+            return self._needs_reset(console.read()) is False
+
+        return True
+
+    def _release(self, console: "Console") -> bool:
+        """
+        Put a console back into the pool. Must be called with the lock held.
+        :param console: Console to put back
+        :return: False if the pool is closed, so the console must be destroyed
+        """
+        if self._closed:
+            return False
+
+        self._idle.append((console, time.monotonic()))
+        self._notify()
+
+        return True
+
+    def _forget(self, count: int = 1) -> None:
+        """
+        Free the places of the destroyed (or never created) consoles. Must be called with the lock held.
+        :param count: Number of the consoles
+        :return: None
+        """
+        self._size -= count
+        self._notify(count)
+
+    def _notify(self, count: Optional[int] = 1) -> None:
+        """
+        Wake up the callers waiting for a console. Must be called with the lock held.
+        :param count: Number of the callers to wake up (all if None)
+        :return: None
+        """
+        if count is None:
+            self._available.notify_all()
+        else:
+            self._available.notify(count)
+
+    def _destroy(self, consoles: List["Console"]) -> None:
+        """
+        Destroy consoles and free their places. Errors are logged, since the consoles may no longer exist.
+        :param consoles: Consoles to destroy
+        :return: None
+        """
+        for console in consoles:
+            try:
+                console.destroy()
+            except Exception as ex:
+                logger.debug("Unable to destroy the console %s: %s", console.id, ex)
+
+        with self._lock:
+            self._forget(len(consoles))
+
+    def fill(self) -> None:
+        """
+        Create the consoles missing to `min_size` concurrently.
+        :return: None
+        :raise Exception: The first error raised while creating the consoles
+        """
+        with self._lock:
+            missing = self._reserve_missing()
+
+        batch = self._context.batch()
+        for _ in range(missing):
+            batch.submit(self._create)
+        results = batch.execute()
+
+        errors = [result.error for result in results if result.error is not None]
+        consoles = [result.value for result in results if result.error is None]
+        with self._lock:
+            self._forget(len(errors))
+            rejected = [console for console in consoles if not self._release(console)]
+        self._destroy(rejected)
+
+        if errors:
+            raise errors[0]
+
+    def evict(self) -> None:
+        """
+        Destroy the consoles idle for longer than `idle_ttl`, so `min_size` consoles remain.
+        :return: None
+        """
+        with self._lock:
+            expired = self._take_expired()
+
+        self._destroy(expired)
+
+    def health_check(self) -> None:
+        """
+        Destroy the idle consoles that no longer exist or are busy and replace them.
+        :return: None
+        """
+        consoles = self.rpc.list_consoles()
+        with self._lock:
+            unhealthy = self._take_unhealthy(consoles)
+
+        self._destroy(unhealthy)
+        self.fill()
+
+    def _run(self, stopped: threading.Event) -> None:
+        while not stopped.wait(min(self.idle_ttl, self.health_check_interval)):
+            try:
+                self.evict()
+                self.health_check()
+            except Exception:
+                logger.exception("Console pool maintenance failed")
+
+    def start(self) -> None:
+        """
+        Create the first `min_size` consoles and start the maintenance thread.
+        :return: None
+        """
+        self.fill()
+        with self._lock:
+            if self._thread is not None or self._closed:
+                return
+
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stopped,), name="console-pool", daemon=True)
+            self._thread.start()
+
+    def acquire(self, timeout: float = None) -> "Console":
+        """
+        Take a console out of the pool. A new one is created if none is idle and the pool isn't full.
+        Prefer `checkout`, which returns the console once it's no longer needed.
+        :param timeout: The maximum time to wait for a console once the pool is full (wait indefinitely if None)
+        :return: Console
+        :raise TimeoutError: If no console is available in time
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            while True:
+                console, reserved = self._take()
+                if console is not None:
+                    return console
+                if reserved:
+                    break
+
+                remaining = deadline - time.monotonic() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No console is available")
+                self._available.wait(remaining)
+
+        try:
+            return self._create()
+        except Exception:
+            with self._lock:
+                self._forget()
+            raise
+
+    def release(self, console: "Console") -> None:
+        """
+        Reset a console and put it back into the pool. Consoles that can't be reset are destroyed.
+        :param console: Console taken using `acquire`
+        :return: None
+        """
+        try:
+            reusable = self._reset(console)
+        except Exception as ex:
+            logger.debug("Unable to reset the console %s: %s", console.id, ex)
+            reusable = False
+
+        with self._lock:
+            if reusable and self._release(console):
+                return
+
+        self._destroy([console])
+
+    @contextmanager
+    def checkout(self, timeout: float = None) -> Iterator["Console"]:
+        """
+        Borrow a console, it's reset and returned to the pool once the block ends.
+        :param timeout: The maximum time to wait for a console once the pool is full (wait indefinitely if None)
+        :return: Console
+        :raise TimeoutError: If no console is available in time
+        """
+        console = self.acquire(timeout)
+        try:
+            yield console
+        finally:
+            self.release(console)
+
+    def close(self) -> None:
+        """
+        Stop the maintenance thread and destroy the idle consoles. Checked out consoles are destroyed once returned.
+        :return: None
+        """
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            self._stopped.set()
+            idle, self._idle = [console for console, _ in self._idle], []
+            self._notify(None)
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._destroy(idle)
 
 
 class Consoles(ContextBase):
@@ -309,3 +749,26 @@ class Consoles(ContextBase):
 
     def all(self):
         return self.rpc.list_consoles()
+
+    def pool(
+        self,
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_ttl: float = 300,
+        health_check_interval: float = 30,
+        options: ConsoleOptions = None,
+    ) -> ConsolePool:
+        """
+        Create a pool of reusable consoles and its first `min_size` consoles. Close it once it's no longer needed.
+        See `ConsolePool` for more information.
+        :param min_size: Number of consoles kept ready
+        :param max_size: The maximum number of consoles (both idle and checked out)
+        :param idle_ttl: Time in seconds after which an idle console above `min_size` is destroyed
+        :param health_check_interval: Time in seconds between the checks of the idle consoles
+        :param options: Options used to initialize the consoles
+        :return: Started pool
+        """
+        pool = ConsolePool(self._context, min_size, max_size, idle_ttl, health_check_interval, options)
+        pool.start()
+
+        return pool
@@ -1,12 +1,12 @@
 from requests import ReadTimeout
-from dataclasses import dataclass
 from typing import Union, Dict
 
 from snek_sploit.lib.context import ContextBase, Context
 from snek_sploit.util import constants, exceptions
+from snek_sploit.util.records import record
 
 
-@dataclass
+@record
 class ModuleStatistics:
     """
     Number of installed modules.
@@ -21,7 +21,7 @@ class ModuleStatistics:
     evasions: int
 
 
-@dataclass
+@record
 class VersionInformation:
     """
     Information about framework versions.
@@ -32,7 +32,7 @@ class VersionInformation:
     api: str
 
 
-@dataclass
+@record
 class FrameworkThread:
     """
     Information about framework thread.
@@ -44,9 +44,9 @@ class FrameworkThread:
     started: str
 
 
-class RPCCore(ContextBase):
+class RPCCoreBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Core.html
+    Endpoints and response parsing shared by `RPCCore` and `AsyncRPCCore`.
     """
 
     VERSION = "core.version"
@@ -103,6 +103,12 @@ class RPCCore(ContextBase):
             response[constants.STARTED],
         )
 
+
+class RPCCore(RPCCoreBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Core.html
+    """
+
     def version(self) -> VersionInformation:
         """
         Get the RPC service versions.
@@ -204,7 +210,11 @@ class RPCCore(ContextBase):
             {b'exploits': 2346, b'auxiliary': 1220, b'post': 413, b'encoders': 46, b'nops': 11, b'payloads': 1387,
              b'evasions': 9}
         """
-        response = self._context.call(self.ADD_MODULE_PATH, [path])
+        try:
+            response = self._context.call(self.ADD_MODULE_PATH, [path])
+        finally:
+            # Even if the call times out, the server keeps (re)loading the modules, so the cached ones are stale
+            self._context.modules_generation += 1
 
         return self._parse_module_statistics(response)
 
@@ -216,7 +226,11 @@ class RPCCore(ContextBase):
             {b'exploits': 2346, b'auxiliary': 1220, b'post': 413, b'encoders': 46, b'nops': 11, b'payloads': 1387,
              b'evasions': 9}
         """
-        response = self._context.call(self.RELOAD_MODULES)
+        try:
+            response = self._context.call(self.RELOAD_MODULES)
+        finally:
+            # Even if the call times out, the server keeps (re)loading the modules, so the cached ones are stale
+            self._context.modules_generation += 1
 
         return self._parse_module_statistics(response)
 
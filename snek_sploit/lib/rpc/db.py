@@ -45,9 +45,9 @@ class AnalyzeHost:
 
 
 # TODO unfinished, untested
-class RPCDB(ContextBase):
+class RPCDBBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Db.html
+    Endpoints shared by `RPCDB` and `AsyncRPCDB`.
     """
 
     CREATE_CRACKED_CREDENTIAL = "db.create_cracked_credential"
@@ -93,6 +93,12 @@ class RPCDB(ContextBase):
     DISCONNECT = "db.disconnect"
     STATUS = "db.status"
 
+
+class RPCDB(RPCDBBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Db.html
+    """
+
     def create_cracked_credential(self, options: CrackedCredentialOptions = None) -> object:
         """
         Create a cracked credential.
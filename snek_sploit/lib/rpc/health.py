@@ -2,13 +2,19 @@ from snek_sploit.lib.context import ContextBase, Context
 from snek_sploit.util import constants
 
 
-class RPCHealth(ContextBase):
+class RPCHealthBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Health.html
+    Endpoints shared by `RPCHealth` and `AsyncRPCHealth`.
     """
 
     CHECK = "health.check"
 
+
+class RPCHealth(RPCHealthBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Health.html
+    """
+
     def check(self) -> bool:
         """
         Check if the service is currently healthy and ready to accept requests.
@@ -1,11 +1,11 @@
 from typing import Dict, Any
-from dataclasses import dataclass
 
 from snek_sploit.lib.context import ContextBase, Context
-from snek_sploit.util import constants
+from snek_sploit.util import constants, exceptions
+from snek_sploit.util.records import record
 
 
-@dataclass
+@record
 class JobInformation:
     id: int
     name: str
@@ -13,9 +13,9 @@ class JobInformation:
     datastore: Dict[str, Any]
 
 
-class RPCJobs(ContextBase):
+class RPCJobsBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Job.html
+    Endpoints and response parsing shared by `RPCJobs` and `AsyncRPCJobs`.
     """
 
     INFO = "job.info"
@@ -34,6 +34,12 @@ class RPCJobs(ContextBase):
             },
         )
 
+
+class RPCJobs(RPCJobsBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Job.html
+    """
+
     def info(self, job_id: int) -> JobInformation:
         """
         Get information about a job.
@@ -77,3 +83,23 @@ class Jobs(ContextBase):
     def __init__(self, context: Context):
         super().__init__(context)
         self.rpc = RPCJobs(context)
+
+    def all(self) -> Dict[int, JobInformation]:
+        """
+        Get information about all jobs. The information is requested for all the jobs at once.
+        :return: Job ID and information about the job (jobs that finished in the meantime are left out)
+        """
+        batch = self._context.batch()
+        job_ids = list(self.rpc.list_jobs())
+        for job_id in job_ids:
+            batch.submit(self.rpc.info, job_id)
+
+        jobs = {}
+        for job_id, result in zip(job_ids, batch.execute()):
+            if isinstance(result.error, exceptions.RPCError):
+                continue
+            if result.error is not None:
+                raise result.error
+            jobs[job_id] = result.value
+
+        return jobs
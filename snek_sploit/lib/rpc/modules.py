@@ -1,12 +1,29 @@
-from typing import List, Dict, Union, Any
-from dataclasses import dataclass, asdict
+import concurrent.futures
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import msgpack
+from bisect import bisect_left, bisect_right
+from contextlib import suppress
+from datetime import date
+from typing import List, Dict, Union, Any, Callable, Tuple, Optional, Iterable, Iterator, Set
+from dataclasses import dataclass, asdict, astuple
 
 from snek_sploit.lib.context import ContextBase, Context
-from snek_sploit.util import constants
-from snek_sploit.util.enums import ModuleType
+from snek_sploit.lib.rpc.core import RPCCore, VersionInformation, ModuleStatistics
+from snek_sploit.util import constants, exceptions
+from snek_sploit.util.records import record, parse_record
+from snek_sploit.util.decoding import DECODE
+from snek_sploit.util.enums import ModuleType, ModuleRank, SearchMode
+from snek_sploit.util.polling import PollingStrategy, ExponentialBackoff
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@record
 class ModuleShortInfo:
     """
     Short module information.
@@ -19,7 +36,17 @@ class ModuleShortInfo:
     disclosure_date: str
 
 
-@dataclass
+# Response keys in the order of the `ModuleShortInfo` fields
+MODULE_SHORT_INFO_KEYS = (
+    constants.B_TYPE,
+    constants.B_NAME,
+    constants.B_FULLNAME,
+    constants.B_RANK,
+    constants.B_DISCLOSURE_DATE,
+)
+
+
+@record
 class ModuleRunningStatistics:
     """
     Jobs' statistics. Matched using job's UUID.
@@ -30,7 +57,25 @@ class ModuleRunningStatistics:
     results: List[str]
 
 
-@dataclass
+@record
+class ModuleResult:
+    """
+    Result of a finished module execution.
+
+    Parameters:
+        uuid: UUID of the execution
+        status: Either completed or errored
+        result: Result of the module (if it's completed)
+        error: Error raised by the module (if it errored)
+    """
+
+    uuid: str
+    status: str
+    result: Any = None
+    error: Any = None
+
+
+@record
 class ModuleExecutionInfo:
     """
     Execution information.
@@ -78,9 +123,9 @@ class EncodingOptions:
     addshellcode: str = None
 
 
-class RPCModules(ContextBase):
+class RPCModulesBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Module.html
+    Endpoints and response parsing shared by `RPCModules` and `AsyncRPCModules`.
     """
 
     EXPLOITS = "module.exploits"
@@ -118,13 +163,7 @@ class RPCModules(ContextBase):
         :param response: API response containing the necessary data
         :return: Parsed module's short information
         """
-        return ModuleShortInfo(
-            response[constants.B_TYPE],
-            response[constants.B_NAME],
-            response[constants.B_FULLNAME],
-            response[constants.B_RANK].decode(),
-            response[constants.B_DISCLOSURE_DATE].decode(),
-        )
+        return parse_record(ModuleShortInfo, response, MODULE_SHORT_INFO_KEYS)
 
     # TODO: once the DatastoreOption dataclass is implemented
     # def _parse_datastore_option(self, response: Dict[bytes, Union[bytes, bool, int]]):
@@ -141,6 +180,12 @@ class RPCModules(ContextBase):
     #
     #     )
 
+
+class RPCModules(RPCModulesBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Module.html
+    """
+
     def list_exploit_modules(self) -> List[str]:
         """
         Get a list of exploit module names.
@@ -285,9 +330,9 @@ class RPCModules(ContextBase):
              b'required': True, b'advanced': False, b'desc': b'How fast to bruteforce, from 0 to 5', b'default': 5, ...}
 
         """
-        response = self._context.call(self.INFO, [module_type, module_name])
+        response = self._context.call(self.INFO, [module_type, module_name], schema=DECODE)
 
-        return self._decode(response)
+        return response
 
     def search(self, substring: str) -> List[ModuleShortInfo]:
         """
@@ -370,7 +415,7 @@ class RPCModules(ContextBase):
         return ModuleRunningStatistics(
             [each.decode() for each in response[constants.B_WAITING]],
             [each.decode() for each in response[constants.B_RUNNING]],
-            response[constants.B_RESULTS],
+            [each.decode() for each in response[constants.B_RESULTS]],
         )
 
     def list_module_options(
@@ -387,11 +432,11 @@ class RPCModules(ContextBase):
              b'VERBOSE': {b'type': b'bool', b'required': False, b'advanced': True, b'evasion': False,
                 b'desc': b'Enable detailed status messages', b'default': False}}
         """
-        response = self._context.call(self.OPTIONS, [module_type, module_name])
+        response = self._context.call(self.OPTIONS, [module_type, module_name], schema=DECODE)
 
         # TODO: once we know all the possible variable options, use the DatastoreOption dataclass instead
         # return {key: self._parse_datastore_option(value) for key, value in response.items()}
-        return self._decode(response)
+        return response
 
     def execute(self, module_type: ModuleType, module_name: str, options: Dict[str, Any]) -> ModuleExecutionInfo:
         """
@@ -513,10 +558,726 @@ class RPCModules(ContextBase):
         return response[constants.B_ENCODED].decode()
 
 
+# Rank names and their order, used to filter by the minimal rank
+MODULE_RANK_ORDER = {rank.value: order for order, rank in enumerate(ModuleRank)}
+
+
+class ModuleSearchIndex:
+    # Tokens are runs of lowercase letters and digits
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+    def __init__(self, modules: Iterable[ModuleShortInfo] = ()):
+        """
+        In-memory search index of modules (their name and fullname) answering queries without calling the server.
+        Each query word must match a module. Words are matched as whole tokens, token prefixes, or substrings.
+        :param modules: Modules to index
+        """
+        self._modules: List[Optional[ModuleShortInfo]] = []  # Removed modules are replaced with None
+        self._identifiers: Dict[str, int] = {}  # Module fullname and its position in `self._modules`
+        self._postings: Dict[str, Set[int]] = {}  # Token and positions of the modules containing it
+
+        # Lookup structures rebuilt lazily once the modules change
+        self._stale = True
+        self._tokens: List[str] = []
+        self._text = ""
+        self._offsets: List[int] = []
+        self._text_identifiers: List[int] = []
+
+        for module in modules:
+            self.add(module)
+
+    def __len__(self) -> int:
+        return len(self._identifiers)
+
+    def __contains__(self, fullname: str) -> bool:
+        return fullname in self._identifiers
+
+    @staticmethod
+    def _searchable_text(module: ModuleShortInfo) -> str:
+        """
+        Get the lowercase text the queries are matched against.
+        :param module: Module
+        :return: Searchable text
+        """
+        return f"{module.name or ''}\n{module.fullname}".lower()
+
+    def add(self, module: ModuleShortInfo) -> None:
+        """
+        Add a module to the index (an indexed module with the same fullname is replaced).
+        :param module: Module to add
+        :return: None
+        """
+        if module.fullname in self._identifiers:
+            self.remove(module.fullname)
+
+        identifier = len(self._modules)
+        self._modules.append(module)
+        self._identifiers[module.fullname] = identifier
+        for token in set(self.TOKEN_PATTERN.findall(self._searchable_text(module))):
+            self._postings.setdefault(token, set()).add(identifier)
+
+        self._stale = True
+
+    def remove(self, fullname: str) -> None:
+        """
+        Remove a module from the index.
+        :param fullname: Fullname of the module
+        :return: None
+        """
+        identifier = self._identifiers.pop(fullname, None)
+        if identifier is None:
+            return
+
+        for token in set(self.TOKEN_PATTERN.findall(self._searchable_text(self._modules[identifier]))):
+            postings = self._postings[token]
+            postings.discard(identifier)
+            if not postings:
+                del self._postings[token]
+
+        self._modules[identifier] = None
+        self._stale = True
+
+    def update(self, modules: Iterable[ModuleShortInfo], module_type: ModuleType = None) -> None:
+        """
+        Make the index match the modules. Only the changed modules are (re)indexed.
+        :param modules: Current modules
+        :param module_type: Type of the supplied modules, indexed modules of other types are kept (all if None)
+        :return: None
+        """
+        current = {module.fullname: module for module in modules}
+
+        for fullname, identifier in list(self._identifiers.items()):
+            module = self._modules[identifier]
+            if (module_type is None or module.type == module_type) and current.get(fullname) != module:
+                self.remove(fullname)
+
+        for fullname, module in current.items():
+            if fullname not in self._identifiers:
+                self.add(module)
+
+    def _refresh(self) -> None:
+        """
+        Rebuild the lookup structures (and drop the removed modules) if the modules changed.
+        :return: None
+        """
+        if not self._stale:
+            return
+
+        if len(self._modules) > 2 * len(self._identifiers):
+            modules = [module for module in self._modules if module is not None]
+            self._modules, self._identifiers, self._postings = [], {}, {}
+            for module in modules:
+                self.add(module)
+
+        self._tokens = sorted(self._postings)
+
+        # All texts are joined, so a substring is found by a single `str.find` over all modules
+        texts, offset = [], 0
+        self._offsets, self._text_identifiers = [], []
+        for identifier, module in enumerate(self._modules):
+            if module is None:
+                continue
+            text = self._searchable_text(module)
+            texts.append(text)
+            self._offsets.append(offset)
+            self._text_identifiers.append(identifier)
+            offset += len(text) + 1
+        self._text = "\0".join(texts)
+
+        self._stale = False
+
+    def _match_prefix(self, word: str) -> Set[int]:
+        """
+        Find modules with a token starting with the word.
+        :param word: Lowercase word
+        :return: Matched module positions
+        """
+        matched = set()
+        for position in range(bisect_left(self._tokens, word), len(self._tokens)):
+            token = self._tokens[position]
+            if not token.startswith(word):
+                break
+            matched |= self._postings[token]
+
+        return matched
+
+    def _match_substring(self, word: str) -> Iterator[int]:
+        """
+        Find modules containing the word.
+        :param word: Lowercase word
+        :return: Matched module positions in ascending order
+        """
+        position = self._text.find(word)
+        while position != -1:
+            text_index = bisect_right(self._offsets, position) - 1
+            yield self._text_identifiers[text_index]
+            # Continue with the next module, the current one is already matched
+            if text_index + 1 == len(self._offsets):
+                break
+            position = self._text.find(word, self._offsets[text_index + 1])
+
+    def _match(self, word: str, mode: SearchMode) -> Set[int]:
+        """
+        Find modules matching the word.
+        :param word: Lowercase word
+        :param mode: How to match the word
+        :return: Matched module positions
+        """
+        if mode == SearchMode.TOKEN:
+            return self._postings.get(word, set())
+        if mode == SearchMode.PREFIX:
+            return self._match_prefix(word)
+
+        return set(self._match_substring(word))
+
+    def search(
+        self,
+        query: str = "",
+        mode: SearchMode = SearchMode.PREFIX,
+        module_type: ModuleType = None,
+        minimum_rank: ModuleRank = None,
+        disclosed_after: Union[str, date] = None,
+        disclosed_before: Union[str, date] = None,
+        limit: int = None,
+    ) -> List[ModuleShortInfo]:
+        """
+        Search for modules.
+        :param query: Words the modules must match (all modules match an empty query)
+        :param mode: How to match the words
+        :param module_type: Type of the modules
+        :param minimum_rank: The lowest rank of the modules
+        :param disclosed_after: The earliest disclosure date (inclusive), modules without the date are excluded
+        :param disclosed_before: The latest disclosure date (inclusive), modules without the date are excluded
+        :param limit: Maximum number of results
+        :return: Matched modules in the order they were indexed
+        """
+        self._refresh()
+        mode = SearchMode(mode)
+
+        words = self.TOKEN_PATTERN.findall(query.lower()) if mode != SearchMode.SUBSTRING else query.lower().split()
+        if mode == SearchMode.SUBSTRING and len(words) == 1:
+            # Matches are found in order, so the search can stop once there are enough results
+            identifiers = self._match_substring(words[0])
+        elif words:
+            # Start with the smallest set, so the intersection is as cheap as possible
+            matches = sorted((self._match(word, mode) for word in words), key=len)
+            identifiers = sorted(matches[0].intersection(*matches[1:]))
+        else:
+            identifiers = self._text_identifiers
+
+        minimum_order = MODULE_RANK_ORDER[ModuleRank(minimum_rank).value] if minimum_rank is not None else None
+        after = str(disclosed_after) if disclosed_after is not None else None
+        before = str(disclosed_before) if disclosed_before is not None else None
+
+        found = []
+        for identifier in identifiers:
+            module = self._modules[identifier]
+            if module_type is not None and module.type != module_type:
+                continue
+            if minimum_order is not None and MODULE_RANK_ORDER.get(module.rank, -1) < minimum_order:
+                continue
+            if after is not None and (not module.disclosure_date or module.disclosure_date < after):
+                continue
+            if before is not None and (not module.disclosure_date or module.disclosure_date > before):
+                continue
+
+            found.append(module)
+            if limit is not None and len(found) >= limit:
+                break
+
+        return found
+
+
+class ModuleCatalog(ContextBase):
+    # Cached sections
+    LISTS = "lists"
+    INFO = "info"
+    OPTIONS = "options"
+    COMPATIBLE_PAYLOADS = "compatible_payloads"
+    SEARCH = "search"
+
+    def __init__(self, context: Context, cache_directory: str = None):
+        """
+        Lazily fetched module metadata (module lists, information, options, compatible payloads, and search results).
+        The data changes only once modules are (re)loaded, so each value is requested from the server only once.
+        The cache is keyed by the framework version and the module statistics and dropped once the client reloads
+        modules or adds a module path. Returned values are shared, don't modify them.
+        :param context: Context used for the calls
+        :param cache_directory: Directory used to persist the cache between runs (use `save`), memory only if None
+        """
+        super().__init__(context)
+        self.rpc = RPCModules(context)
+        self._core = RPCCore(context)
+        self.cache_directory = cache_directory
+
+        self._lock = threading.Lock()
+        self._key: Optional[str] = None
+        self._generation: Optional[int] = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._index = ModuleSearchIndex()
+        self._index_key: Optional[str] = None
+
+    @staticmethod
+    def _create_key(version: VersionInformation, statistics: ModuleStatistics) -> str:
+        """
+        Create a cache key that changes with the framework version or the number of modules.
+        :param version: Framework versions
+        :param statistics: Module statistics
+        :return: Cache key
+        """
+        identifier = msgpack.dumps([version.version, version.api, astuple(statistics)])
+
+        return hashlib.sha256(identifier).hexdigest()[:16]
+
+    def _cache_path(self, key: str) -> str:
+        """
+        Get path to the persisted cache.
+        :param key: Cache key
+        :return: Path to the cache file
+        """
+        return os.path.join(self.cache_directory, f"modules-{key}.msgpack")
+
+    def _load(self, key: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the persisted cache. A missing or corrupted file results in an empty cache.
+        :param key: Cache key
+        :return: Cached sections
+        """
+        if self.cache_directory is None:
+            return {}
+
+        try:
+            with open(self._cache_path(key), "rb") as file:
+                entries = msgpack.loads(file.read(), strict_map_key=False)
+        except (OSError, ValueError):
+            return {}
+
+        return entries if isinstance(entries, dict) else {}
+
+    def _activate(self, key: str, generation: int) -> None:
+        """
+        Start using the cache for the key.
+        :param key: Cache key
+        :param generation: Modules generation of the context the key belongs to
+        :return: None
+        """
+        entries = self._load(key)
+        with self._lock:
+            self._key = key
+            self._generation = generation
+            self._entries = entries
+            self._dirty = False
+
+    def _is_valid(self) -> bool:
+        """
+        Check whether the modules weren't (re)loaded since the cache was activated.
+        :return: True if the cache can be used
+        """
+        return self._key is not None and self._generation == self._context.modules_generation
+
+    def _ensure_valid(self) -> None:
+        """
+        Make sure the cache belongs to the currently loaded modules.
+        :return: None
+        """
+        if self._is_valid():
+            return
+
+        # Modules can change even if their number doesn't, so the outdated cache is removed
+        if self._key is not None:
+            self.clear()
+
+        generation = self._context.modules_generation
+        self._activate(self._create_key(self._core.version(), self._core.module_stats()), generation)
+
+    def _lookup(self, section: str, key: str) -> Tuple[bool, Any]:
+        """
+        Find a cached value.
+        :param section: Cached section
+        :param key: Key of the value in the section
+        :return: Whether the value was found and the value
+        """
+        entries = self._entries.get(section)
+        if entries is None or key not in entries:
+            return False, None
+
+        return True, entries[key]
+
+    def _store(self, section: str, key: str, value: Any) -> None:
+        """
+        Cache a value.
+        :param section: Cached section
+        :param key: Key of the value in the section
+        :param value: Value to cache
+        :return: None
+        """
+        with self._lock:
+            self._entries.setdefault(section, {})[key] = value
+            self._dirty = True
+
+    def _get(self, section: str, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Get a cached value or fetch and cache it.
+        :param section: Cached section
+        :param key: Key of the value in the section
+        :param fetch: Function used to request the value from the server
+        :return: Value
+        """
+        self._ensure_valid()
+        found, value = self._lookup(section, key)
+        if not found:
+            value = fetch()
+            self._store(section, key, value)
+
+        return value
+
+    def _list_endpoints(self) -> Dict[str, Callable[[], List[str]]]:
+        """
+        Get methods used to list modules of each type.
+        :return: Module types and their listing methods
+        """
+        return {
+            ModuleType.EXPLOIT: self.rpc.list_exploit_modules,
+            ModuleType.AUXILIARY: self.rpc.list_auxiliary_modules,
+            ModuleType.POST: self.rpc.list_post_modules,
+            ModuleType.PAYLOAD: self.rpc.list_payload_modules,
+            ModuleType.ENCODER: self.rpc.list_encoder_modules,
+            ModuleType.NOP: self.rpc.list_nop_modules,
+            ModuleType.EVASION: self.rpc.list_evasion_modules,
+        }
+
+    def list_modules(self, module_type: ModuleType) -> List[str]:
+        """
+        Get a list of module names.
+        :param module_type: Type of the modules
+        :return: Module names
+        """
+        module_type = ModuleType(module_type)
+
+        return self._get(self.LISTS, module_type.value, self._list_endpoints()[module_type])
+
+    def info(self, module_type: ModuleType, module_name: str) -> Dict[str, Union[str, int, list, dict, bool]]:
+        """
+        Get the metadata for a module.
+        :param module_type: Type of the module
+        :param module_name: Name of the module
+        :return: Metadata of a module
+        """
+        module_type = ModuleType(module_type)
+
+        return self._get(
+            self.INFO, f"{module_type.value}/{module_name}", lambda: self.rpc.info(module_type, module_name)
+        )
+
+    def list_module_options(
+        self, module_type: ModuleType, module_name: str
+    ) -> Dict[str, Dict[str, Union[dict, list, str, bool, int]]]:
+        """
+        Get module's datastore options.
+        :param module_type: Module type
+        :param module_name: Module name
+        :return: Module's datastore options (variables)
+        """
+        module_type = ModuleType(module_type)
+
+        return self._get(
+            self.OPTIONS,
+            f"{module_type.value}/{module_name}",
+            lambda: self.rpc.list_module_options(module_type, module_name),
+        )
+
+    def compatible_exploit_payloads(self, exploit_module_name: str) -> List[str]:
+        """
+        Get compatible payloads for an exploit module.
+        :param exploit_module_name: Name of the exploit module
+        :return: Compatible payloads
+        """
+        return self._get(
+            self.COMPATIBLE_PAYLOADS,
+            exploit_module_name,
+            lambda: self.rpc.compatible_exploit_payloads(exploit_module_name),
+        )
+
+    def search(self, substring: str) -> List[ModuleShortInfo]:
+        """
+        Search for a substring in modules (their name and fullname).
+        :param substring: Substring used to find a match
+        :return: Matched modules
+        """
+        # Records are cached as plain lists, so they can be persisted
+        found = self._get(self.SEARCH, substring, lambda: [list(astuple(each)) for each in self.rpc.search(substring)])
+
+        return [ModuleShortInfo(*each) for each in found]
+
+    @staticmethod
+    def _type_query(module_type: ModuleType) -> str:
+        """
+        Create a search query matching all modules of the type.
+        :param module_type: Type of the modules
+        :return: Search query
+        """
+        return f"type:{ModuleType(module_type).value}"
+
+    def search_index(self) -> ModuleSearchIndex:
+        """
+        Get an in-memory search index of all modules. The modules are fetched (a single search per module type) only
+        once and the index is updated with the changed modules once the modules are (re)loaded.
+        :return: Module search index
+        """
+        self._ensure_valid()
+        if self._index_key != self._key:
+            key = self._key
+            for module_type in ModuleType:
+                self._index.update(self.search(self._type_query(module_type)), module_type)
+            self._index_key = key
+
+        return self._index
+
+    def save(self) -> None:
+        """
+        Persist the cache (if it changed) to the cache directory.
+        :return: None
+        """
+        if self.cache_directory is None or self._key is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+
+            content = msgpack.dumps(self._entries)
+            path = self._cache_path(self._key)
+            self._dirty = False
+
+        os.makedirs(self.cache_directory, exist_ok=True)
+        # Write to a temporary file first, so a concurrent reader never gets an incomplete cache
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.cache_directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(content)
+            os.replace(temporary_path, path)
+        except OSError:
+            os.unlink(temporary_path)
+            raise
+
+    def clear(self) -> None:
+        """
+        Drop the cached data (including the persisted cache). It will be fetched again once requested.
+        :return: None
+        """
+        with self._lock:
+            key = self._key
+            self._key = None
+            self._generation = None
+            self._entries = {}
+            self._dirty = False
+            # The index is updated (not rebuilt) once requested again
+            self._index_key = None
+
+        if self.cache_directory is not None and key is not None:
+            try:
+                os.remove(self._cache_path(key))
+            except FileNotFoundError:
+                pass
+
+
+class ModuleResultWaiter(ContextBase):
+    def __init__(self, context: Context, polling: PollingStrategy = None):
+        """
+        Waits for the results of many module executions (see `RPCModules.execute` and `check`) at once.
+        A single background poller requests `module.running_stats` once per interval and fetches `module.results` only
+        for the executions that finished, instead of polling the results of each execution separately.
+        The poller is started with the first tracked execution and stops once no execution is tracked.
+        :param context: Context used for the calls
+        :param polling: Strategy deciding the delay between the polls, it's shortened once an execution finishes and
+            prolonged while none does by default
+        """
+        super().__init__(context)
+        self.rpc = RPCModules(context)
+        self.polling = polling or ExponentialBackoff(initial=0.1, maximum=2, multiplier=1.5)
+        self._futures: Dict[str, concurrent.futures.Future] = {}
+        self._delay: Optional[float] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _finished(statistics: ModuleRunningStatistics, uuids: Iterable[str]) -> List[str]:
+        """
+        Pick the finished executions. Executions missing from the statistics (e.g. their results were already removed)
+        are considered finished as well, so requesting their results reports the error.
+        :param statistics: Current module statistics
+        :param uuids: UUIDs of the tracked executions
+        :return: UUIDs of the finished executions
+        """
+        unfinished = set(statistics.waiting).union(statistics.running)
+
+        return [uuid for uuid in uuids if uuid not in unfinished]
+
+    @staticmethod
+    def _parse_result(uuid: str, response: Dict[str, Any]) -> ModuleResult:
+        return ModuleResult(
+            uuid, response[constants.STATUS], response.get(constants.RESULT), response.get(constants.ERROR)
+        )
+
+    def _pending(self) -> List[str]:
+        """
+        Get the tracked executions. Executions whose futures were cancelled are no longer tracked.
+        :return: UUIDs of the tracked executions
+        """
+        with self._lock:
+            for uuid in [uuid for uuid, future in self._futures.items() if future.cancelled()]:
+                del self._futures[uuid]
+
+            return list(self._futures)
+
+    def _resolve(self, uuid: str, result: Optional[Dict[str, Any]], error: Optional[Exception]) -> int:
+        """
+        Resolve the future of an execution with its results.
+        :param uuid: UUID of the execution
+        :param result: Response of `RPCModules.results`
+        :param error: Error raised while requesting the results
+        :return: Number of resolved futures
+        """
+        if error is not None and not isinstance(error, exceptions.RPCError):
+            logger.warning("Unable to fetch results of the module execution %s: %s", uuid, error)
+            return 0  # Requested again with the next poll
+        if error is None and result[constants.STATUS] == constants.RUNNING:
+            return 0
+
+        with self._lock:
+            future = self._futures.pop(uuid, None)
+
+        if future is None:
+            return 0
+
+        self._set_future(future, self._parse_result(uuid, result) if error is None else None, error)
+
+        return 1
+
+    @staticmethod
+    def _set_future(future: concurrent.futures.Future, result: Optional[ModuleResult], error: Optional[Exception]):
+        # The future can be cancelled in the meantime
+        with suppress(concurrent.futures.InvalidStateError):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def poll(self) -> int:
+        """
+        Request the module statistics and resolve the futures of the finished executions.
+        :return: Number of resolved futures
+        """
+        uuids = self._pending()
+        if not uuids:
+            return 0
+
+        finished = self._finished(self.rpc.running_stats(), uuids)
+        batch = self._context.batch()
+        for uuid in finished:
+            batch.submit(self.rpc.results, uuid)
+
+        return sum(self._resolve(uuid, result.value, result.error) for uuid, result in zip(finished, batch.execute()))
+
+    def _run(self, stopped: threading.Event) -> None:
+        while not stopped.wait(self._delay):
+            try:
+                resolved = self.poll()
+            except Exception:
+                logger.exception("Unable to poll the module statistics")
+                resolved = 0
+
+            with self._lock:
+                if not self._futures:
+                    if self._thread is threading.current_thread():
+                        self._thread = None
+                    return
+
+                self._delay = self.polling.next_delay(self._delay, resolved)
+
+    def add(self, uuid: str) -> concurrent.futures.Future:
+        """
+        Track an execution. Starts the poller if it isn't running.
+        :param uuid: UUID of the execution
+        :return: Future resolved with the `ModuleResult` (or the error raised while requesting it), cancel it to stop
+            tracking the execution
+        """
+        with self._lock:
+            future = self._futures.get(uuid)
+            if future is not None and not future.cancelled():
+                return future
+
+            future = self._futures[uuid] = concurrent.futures.Future()
+            # A new execution may finish soon
+            self._delay = self.polling.next_delay(None, 0)
+            if self._thread is None:
+                self._stopped = threading.Event()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._stopped,), name="module-result-waiter", daemon=True
+                )
+                self._thread.start()
+
+        return future
+
+    def wait(self, uuid: str, timeout: float = None) -> ModuleResult:
+        """
+        Wait for the result of an execution.
+        :param uuid: UUID of the execution
+        :param timeout: The maximum time to wait (wait indefinitely if None)
+        :return: Result of the execution
+        :raise TimeoutError: If the execution doesn't finish in time (it's still tracked)
+        """
+        future = self.add(uuid)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:  # Not the builtin one before Python 3.11
+            if not future.done():
+                raise TimeoutError(f"The execution {uuid} didn't finish in time") from None
+            raise
+
+    def as_completed(self, uuids: Iterable[str], timeout: float = None) -> Iterator[ModuleResult]:
+        """
+        Yield the results of the executions as they finish.
+        :param uuids: UUIDs of the executions
+        :param timeout: The maximum time to wait for all the results (wait indefinitely if None)
+        :return: Results of the executions
+        :raise TimeoutError: If not all executions finish in time (the rest is still tracked)
+        """
+        futures = concurrent.futures.as_completed([self.add(uuid) for uuid in uuids], timeout)
+        while True:
+            try:
+                future = next(futures)
+            except StopIteration:
+                return
+            except concurrent.futures.TimeoutError:  # Not the builtin one before Python 3.11
+                raise TimeoutError("Not all executions finished in time") from None
+
+            yield future.result()
+
+    def stop(self) -> None:
+        """
+        Stop the poller and cancel the futures of the tracked executions.
+        :return: None
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            futures, self._futures = self._futures, {}
+            self._stopped.set()
+
+        for future in futures.values():
+            future.cancel()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+
 class Modules(ContextBase):
-    def __init__(self, context: Context):
+    def __init__(self, context: Context, cache_directory: str = None):
         super().__init__(context)
         self.rpc = RPCModules(context)
+        self.catalog = ModuleCatalog(context, cache_directory)
+        self.waiter = ModuleResultWaiter(context)
 
     # def execute(self, ):
     #     self.rpc.execute()
@@ -4,15 +4,21 @@ from snek_sploit.lib.context import ContextBase, Context
 from snek_sploit.util import constants
 
 
-class RPCPlugins(ContextBase):
+class RPCPluginsBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Plugin.html
+    Endpoints shared by `RPCPlugins` and `AsyncRPCPlugins`.
     """
 
     LOAD = "plugin.load"
     UNLOAD = "plugin.unload"
     LOADED = "plugin.loaded"
 
+
+class RPCPlugins(RPCPluginsBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Plugin.html
+    """
+
     def load(self, name: str, options: dict = None) -> bool:
         """
         Load a plugin.
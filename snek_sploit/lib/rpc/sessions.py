@@ -1,15 +1,26 @@
+import logging
 import re
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Dict, Union
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import Queue, Empty
+from typing import List, Dict, Union, Iterable, Iterator, Optional, Callable, Any
 from dataclasses import dataclass, asdict
 import time
 
 from snek_sploit.lib.context import ContextBase, Context
 from snek_sploit.util import constants, exceptions
-from snek_sploit.util.enums import SessionType
+from snek_sploit.util.records import record, field_names, parse_record
+from snek_sploit.util.enums import SessionType, SessionEventType
+from snek_sploit.util.matching import StreamMatcher, SuccessFlags, CommandMarkers, CommandDemultiplexer
+from snek_sploit.util.polling import PollingStrategy, PollingStatistics, FixedDelay, ExponentialBackoff, Poller
 
+logger = logging.getLogger(__name__)
+# Printed by `execute -f ... -c` before the process' output
+PROCESS_BANNER = re.compile(r"\s*Process (\d+) created\.\r?\n(?:Channel (\d+) created\.\r?\n)?")
 
-@dataclass
+
+@record
 class SessionInformation:
     """
     Information about a session.
@@ -57,19 +68,99 @@ class SessionInformation:
         if not isinstance(other, SessionInformation):
             return False
 
-        this = asdict(self)
-        for key, o_value in asdict(other).items():
-            t_value = this[key]
-            if (
-                o_value is not None
-                and t_value is not None
-                and ((strict and o_value != t_value) or (not strict and o_value not in t_value))
-            ):
+        for name in SESSION_INFORMATION_FIELDS:
+            o_value = getattr(other, name)
+            if o_value is None:
+                continue
+
+            t_value = getattr(self, name)
+            if t_value is not None and ((strict and o_value != t_value) or (not strict and o_value not in t_value)):
                 return False
 
         return True
 
 
+SESSION_INFORMATION_FIELDS = field_names(SessionInformation)
+
+
+@record
+class SessionExecutionResult:
+    """
+    Result of a command executed in one of many sessions.
+
+    Parameters:
+        session_id: ID of the session
+        output: Gathered output (None in case of an error)
+        error: Error raised during the execution (None in case of success)
+        elapsed: Time the execution took in seconds
+    """
+
+    session_id: int
+    output: Optional[str] = None
+    error: Optional[Exception] = None
+    elapsed: float = 0
+
+
+@record
+class ProcessExecutionResult:
+    """
+    Result of a command executed in a new process of a meterpreter session.
+
+    Parameters:
+        pid: ID of the process (None if it wasn't reported)
+        channel_id: ID of the channel the output was read from (None if it wasn't reported)
+        stdout: Standard output
+        stderr: Error output (on Windows, it's a part of `stdout`)
+        exit_code: Exit code (None if the process didn't finish in time)
+    """
+
+    pid: Optional[int] = None
+    channel_id: Optional[int] = None
+    stdout: str = ""
+    stderr: str = ""
+    exit_code: Optional[int] = None
+
+
+@record
+class CommandResult:
+    """
+    Result of a command executed as a part of a batch.
+
+    Parameters:
+        command: Executed command
+        output: Output of the command
+        exit_code: Exit code (None if the command didn't finish in time or the session doesn't report it)
+        elapsed: Time in seconds between the end of the previous command (or the start of the batch) and the end of
+            this one
+    """
+
+    command: str
+    output: str
+    exit_code: Optional[int] = None
+    elapsed: float = 0
+
+
+@record
+class SessionEvent:
+    """
+    Change of the session list.
+
+    Parameters:
+        type: Type of the change
+        session_id: ID of the session
+        info: Information about the session (the last known one if the session was closed)
+        previous: Previous information about the session (only if the session was changed)
+    """
+
+    type: SessionEventType
+    session_id: int
+    info: SessionInformation
+    previous: Optional[SessionInformation] = None
+
+
+SessionCallback = Callable[[SessionEvent], Any]
+
+
 # TODO: allow usage of a dict instead of a dataclass (everywhere)
 @dataclass
 class MeterpreterSessionTransportOptions:
@@ -109,9 +200,9 @@ class MeterpreterSessionTransportOptions:
     cert: str
 
 
-class RPCSessions(ContextBase):
+class RPCSessionsBase(ContextBase):
     """
-    https://docs.metasploit.com/api/Msf/RPC/RPC_Session.html
+    Endpoints and response parsing shared by `RPCSessions` and `AsyncRPCSessions`.
     """
 
     LIST = "session.list"
@@ -134,33 +225,26 @@ class RPCSessions(ContextBase):
     RING_LAST = "session.ring_last"
     RING_CLEAR = "session.ring_clear"
 
-    def _parse_session_information(self, response: Dict[str, Union[bytes, str, int]]) -> SessionInformation:
+    _SESSION_INFORMATION_KEYS = tuple(name.encode() for name in SESSION_INFORMATION_FIELDS)
+
+    @classmethod
+    def _parse_session_information(cls, response: Dict[bytes, Union[bytes, str, int]]) -> SessionInformation:
         """
         Get session's information from the response.
         :param response: API response containing the necessary data
         :return: Session's information
         """
-        parsed_response = self._decode(response)
-
-        return SessionInformation(
-            parsed_response[constants.TYPE],
-            parsed_response[constants.TUNNEL_LOCAL],
-            parsed_response[constants.TUNNEL_PEER],
-            parsed_response[constants.VIA_EXPLOIT],
-            parsed_response[constants.VIA_PAYLOAD],
-            parsed_response[constants.DESC],
-            parsed_response[constants.INFO],
-            parsed_response[constants.WORKSPACE],
-            parsed_response[constants.SESSION_HOST],
-            parsed_response[constants.SESSION_PORT],
-            parsed_response[constants.TARGET_HOST],
-            parsed_response[constants.USERNAME],
-            parsed_response[constants.UUID],
-            parsed_response[constants.EXPLOIT_UUID],
-            parsed_response[constants.ROUTES],
-            parsed_response[constants.ARCH],
-            parsed_response.get(constants.PLATFORM, ""),
-        )
+        session_information = parse_record(SessionInformation, response, cls._SESSION_INFORMATION_KEYS)
+        if session_information.platform is None:  # Only if the session type is `meterpreter`
+            session_information.platform = ""
+
+        return session_information
+
+
+class RPCSessions(RPCSessionsBase):
+    """
+    https://docs.metasploit.com/api/Msf/RPC/RPC_Session.html
+    """
 
     def list_sessions(self) -> Dict[int, SessionInformation]:
         """
@@ -407,22 +491,347 @@ class RPCSessions(ContextBase):
         return response[constants.B_RESULT] == constants.B_SUCCESS
 
 
+class SessionRegistry:
+    def __init__(self, rpc: RPCSessions, ttl: float = 0):
+        """
+        Cached snapshot of the session list, shared by all its consumers (`Sessions` and the session objects).
+        Only a single refresh is made at a time, callers waiting for it use its result.
+        :param rpc: Sessions RPC used to list the sessions
+        :param ttl: The maximum age of the snapshot in seconds (with 0, only the concurrent callers share it)
+        """
+        self._rpc = rpc
+        self.ttl = ttl
+        self._sessions: Dict[int, SessionInformation] = {}
+        self._time = float("-inf")  # When the snapshot was requested
+        self._generation = 0  # Number of the refreshes
+        self._lock = threading.Lock()
+
+    def _is_valid(self, max_age: Optional[float]) -> bool:
+        return time.monotonic() - self._time < (self.ttl if max_age is None else max_age)
+
+    def _store(self, sessions: Dict[int, SessionInformation], requested: float) -> None:
+        self._sessions = sessions
+        self._time = requested
+        self._generation += 1
+
+    def invalidate(self) -> None:
+        """
+        Drop the snapshot, so the next consumer requests a new one.
+        :return: None
+        """
+        self._time = float("-inf")
+
+    def cached(self, session_id: int) -> Optional[SessionInformation]:
+        """
+        Get information about a session from the current snapshot, without refreshing it.
+        :param session_id: ID of the session
+        :return: Information about the session (None if it isn't in the snapshot)
+        """
+        return self._sessions.get(session_id)
+
+    def refresh(self) -> Dict[int, SessionInformation]:
+        """
+        Request a new snapshot. Callers that arrive while a refresh is in progress wait for it and share its result.
+        :return: Existing sessions
+        """
+        generation = self._generation
+        with self._lock:
+            if self._generation != generation:  # Another caller refreshed the snapshot while this one was waiting
+                return self._sessions
+
+            requested = time.monotonic()
+            self._store(self._rpc.list_sessions(), requested)
+
+            return self._sessions
+
+    def snapshot(self, max_age: float = None) -> Dict[int, SessionInformation]:
+        """
+        Get the existing sessions, refresh the snapshot if it's too old.
+        :param max_age: The maximum age of the snapshot in seconds (`ttl` if None)
+        :return: Existing sessions (don't modify the dictionary)
+        """
+        if self._is_valid(max_age):
+            return self._sessions
+
+        return self.refresh()
+
+    def get(self, session_id: int, max_age: float = None, refresh_missing: bool = True) -> Optional[SessionInformation]:
+        """
+        Get information about a session.
+        :param session_id: ID of the session
+        :param max_age: The maximum age of the snapshot in seconds (`ttl` if None)
+        :param refresh_missing: Whether to refresh a valid snapshot if the session isn't in it (it could be a new one)
+        :return: Information about the session (None if it doesn't exist)
+        """
+        valid = self._is_valid(max_age)
+        sessions = self._sessions if valid else self.refresh()
+        if session_id not in sessions and valid and refresh_missing:
+            sessions = self.refresh()
+
+        return sessions.get(session_id)
+
+
+class SessionWatcher:
+    def __init__(self, registry: SessionRegistry, polling: PollingStrategy = None):
+        """
+        Watches the session list and notifies the listeners about opened, closed, and changed sessions.
+        All listeners share a single background poller, so they cost one `session.list` per interval in total.
+        The poller is started with the first listener and stopped once the last one is removed.
+        :param registry: Registry the session list is taken from
+        :param polling: Strategy deciding the delay between the polls, it's shortened once something changes and
+            prolonged while nothing does by default
+        """
+        self._registry = registry
+        self.polling = polling or ExponentialBackoff(initial=0.5, maximum=5, multiplier=1.5)
+        self._listeners: Dict[int, Dict[SessionEventType, Optional[SessionCallback]]] = {}
+        self._next_listener_id = 0
+        self._known: Optional[Dict[int, SessionInformation]] = None
+        self._delay: Optional[float] = None
+        self._lock = threading.Lock()
+        self._poller_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def diff(previous: Dict[int, SessionInformation], current: Dict[int, SessionInformation]) -> List[SessionEvent]:
+        """
+        Compare two snapshots of the session list. Sessions are matched by their ID and UUID, so a reused ID results
+        in a closed and an opened session.
+        :param previous: Previous snapshot
+        :param current: Current snapshot
+        :return: Changes between the snapshots
+        """
+        events = []
+        for session_id, info in current.items():
+            previous_info = previous.get(session_id)
+            if previous_info is None:
+                events.append(SessionEvent(SessionEventType.OPENED, session_id, info))
+            elif previous_info.uuid != info.uuid:
+                events.append(SessionEvent(SessionEventType.CLOSED, session_id, previous_info))
+                events.append(SessionEvent(SessionEventType.OPENED, session_id, info))
+            elif previous_info != info:
+                events.append(SessionEvent(SessionEventType.CHANGED, session_id, info, previous_info))
+
+        for session_id, previous_info in previous.items():
+            if session_id not in current:
+                events.append(SessionEvent(SessionEventType.CLOSED, session_id, previous_info))
+
+        return events
+
+    def _compare(self, current: Dict[int, SessionInformation]) -> List[SessionEvent]:
+        """
+        Compare the snapshot with the known one and compute the next delay.
+        :param current: Current snapshot
+        :return: Changes since the known snapshot
+        """
+        events = self.diff(self._known, current) if self._known is not None else []
+        self._known = current
+        self._delay = self.polling.next_delay(self._delay, len(events))
+
+        return events
+
+    def _listener_callbacks(self, event: SessionEvent) -> List[SessionCallback]:
+        with self._lock:
+            callbacks = [listener[event.type] for listener in self._listeners.values()]
+
+        return [callback for callback in callbacks if callback is not None]
+
+    def _dispatch(self, events: List[SessionEvent]) -> None:
+        """
+        Notify the listeners. Errors raised by the callbacks are logged, so they don't stop the poller.
+        :param events: Changes of the session list
+        :return: None
+        """
+        for event in events:
+            for callback in self._listener_callbacks(event):
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception("Session watcher callback failed")
+
+    def _run(self, stopped: threading.Event) -> None:
+        while not stopped.wait(self._delay):
+            try:
+                events = self._compare(self._registry.snapshot(self._delay))
+            except Exception:
+                logger.exception("Unable to poll the session list")
+                self._delay = self.polling.next_delay(self._delay, 0)
+                continue
+
+            self._dispatch(events)
+
+    def start(self) -> None:
+        """
+        Take the initial snapshot (the sessions in it aren't reported) and start the poller.
+        :return: None
+        """
+        with self._poller_lock:
+            if self._thread is not None:
+                return
+
+            self._known, self._delay = None, None
+            self._compare(self._registry.snapshot(0))
+            # Each poller has its own event, so a stopped one can't be resumed by the next start
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._stopped,), name="session-watcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the poller.
+        :return: None
+        """
+        self._stop()
+
+    def _stop(self, if_unused: bool = False) -> None:
+        """
+        Stop the poller.
+        :param if_unused: Whether to stop it only if there are no listeners
+        :return: None
+        """
+        with self._poller_lock:
+            # Checked under the poller lock, so a listener added in the meantime can't get its poller stopped
+            if if_unused:
+                with self._lock:
+                    if self._listeners:
+                        return
+
+            thread, self._thread = self._thread, None
+            self._stopped.set()
+
+        # The poller can be stopped by its own callback
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def add_listener(
+        self, on_open: SessionCallback = None, on_close: SessionCallback = None, on_change: SessionCallback = None
+    ) -> int:
+        """
+        Register callbacks called with the events from the poller's thread. Starts the poller if it isn't running.
+        :param on_open: Called once a session is opened
+        :param on_close: Called once a session is closed
+        :param on_change: Called once information about a session changes
+        :return: ID of the listener
+        """
+        with self._lock:
+            listener_id = self._next_listener_id
+            self._next_listener_id += 1
+            self._listeners[listener_id] = {
+                SessionEventType.OPENED: on_open,
+                SessionEventType.CLOSED: on_close,
+                SessionEventType.CHANGED: on_change,
+            }
+
+        self.start()
+
+        return listener_id
+
+    def remove_listener(self, listener_id: int) -> None:
+        """
+        Remove a listener. Stops the poller if it was the last one.
+        :param listener_id: ID of the listener
+        :return: None
+        """
+        with self._lock:
+            self._listeners.pop(listener_id, None)
+
+        self._stop(if_unused=True)
+
+    def events(self, timeout: float = None) -> Iterator[SessionEvent]:
+        """
+        Yield the events as they arrive.
+        :param timeout: The maximum time to wait for the next event (wait indefinitely if None)
+        :return: Changes of the session list
+        """
+        events: Queue = Queue()
+        listener_id = self.add_listener(events.put, events.put, events.put)
+        try:
+            while True:
+                try:
+                    yield events.get(timeout=timeout)
+                except Empty:
+                    return
+        finally:
+            self.remove_listener(listener_id)
+
+
 class Session(ABC):
-    def __init__(self, rpc: RPCSessions, session_id: int, info: SessionInformation = None):
+    def __init__(
+        self, rpc: RPCSessions, session_id: int, info: SessionInformation = None, registry: SessionRegistry = None
+    ):
+        """
+        Session object.
+        :param rpc: Sessions RPC
+        :param session_id: ID of the session
+        :param info: Information about the session (fetched if None)
+        :param registry: Registry the information is taken from (if None, the supplied or fetched one is kept)
+        """
         self._rpc = rpc
+        self._registry = registry
         self.id = session_id
+        self.last_polling_statistics: Optional[PollingStatistics] = None
+        self.last_exit_code: Optional[int] = None
+        # The maximum time to wait for more output once it pauses, if the end of the output is marked by a flag and
+        # there's no timeout (e.g. a command waiting for input never prints the flag)
+        self.idle_timeout: float = 30
+        self._info_assigned = False
         try:
-            self.info = info if info is not None else self.fetch_information()
+            self._info = info if info is not None else self.fetch_information()
         except Exception:
             raise exceptions.InputError(
                 f"Unable to fetch information about the session with id {self.id}. Make sure it exists."
             )
 
+    @property
+    def info(self) -> SessionInformation:
+        """
+        Information about the session from the registry's latest snapshot, without requesting a new one (use
+        `fetch_information` for that). Once the session disappears, the last known information is returned.
+        Assigned information is returned instead, until `fetch_information` is called.
+        :return: Information about the session
+        """
+        if self._registry is not None and not self._info_assigned:
+            info = self._registry.cached(self.id)
+            if info is not None:
+                self._info = info
+
+        return self._info
+
+    @info.setter
+    def info(self, info: SessionInformation) -> None:
+        self._info = info
+        self._info_assigned = True
+
+    @property
+    def windows(self) -> bool:
+        """
+        Guess whether the session runs on Windows, so its shell uses the `cmd.exe` syntax.
+        :return: True if the platform or the payload mentions Windows
+        """
+        info = self.info
+        return any("windows" in (value or "").lower() for value in (info.platform, info.via_payload))
+
     def fetch_information(self) -> SessionInformation:
-        return self._rpc.list_sessions()[self.id]
+        if self._registry is None:
+            info = self._rpc.list_sessions().get(self.id)
+        else:
+            info = self._registry.get(self.id)
+        if info is None:
+            raise KeyError(self.id)
+
+        self._info = info
+        self._info_assigned = False
+
+        return info
 
     def kill(self) -> bool:
-        return self._rpc.stop(self.id)
+        result = self._rpc.stop(self.id)
+        if self._registry is not None:
+            self._registry.invalidate()
+
+        return result
 
     def compatible_post_modules(self):
         return self._rpc.compatible_modules(self.id)
@@ -436,34 +845,140 @@ class Session(ABC):
         pass
 
     @abstractmethod
-    def execute(self, command: str, timeout: float, reading_delay: float) -> str:
+    def execute(self, command: str, timeout: float, reading_delay: float, polling: PollingStrategy) -> str:
         pass
 
     @abstractmethod
-    def execute_in_shell(self, executable: str, arguments: List[str], timeout: float, reading_delay: float) -> str:
+    def execute_in_shell(
+        self, executable: str, arguments: List[str], timeout: float, reading_delay: float, polling: PollingStrategy
+    ) -> Union[str, ProcessExecutionResult]:
         pass
 
-    def gather_output(self, timeout: float = None, reading_delay: float = 1) -> str:
+    def stream_output(
+        self,
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+        success_flags: Optional[SuccessFlags] = None,
+    ) -> Iterator[str]:
         """
-        Gather output from the session.
+        Yield output from the session as it arrives.
+        Without `success_flags`, the session is considered finished once a read returns nothing, so the delay between
+        the readings must be long enough for the command to produce the rest of its output. With them, the output is
+        gathered until one of them is found, across the pauses in the output, up to the `timeout` (or, without it,
+        until no output arrives for `idle_timeout` seconds).
+        Statistics of the gathering are stored in `last_polling_statistics`.
         :param timeout: The maximum time to wait for the output
-        :param reading_delay: Delay between the readings
-        :return: Gathered output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined), with `success_flags` the
+            delay starts at a few milliseconds and grows up to it while no data arrives
+        :param polling: Strategy deciding the delay between the readings
+        :param success_flags: Flags or regular expressions marking the end of the output
+        :return: Output chunks
         """
-        if timeout:
-            timeout = time.time() + timeout
+        matcher = StreamMatcher(success_flags or [])
+        if polling is None:
+            # The end of the output is recognized by a flag, so the first readings can come right after each other
+            polling = ExponentialBackoff(maximum=reading_delay) if matcher else FixedDelay(reading_delay)
+        poller = Poller(polling, timeout, self.idle_timeout if timeout is None else None)
+        self.last_polling_statistics = poller.statistics
+
+        received = False
+        while True:
+            data = self.read()
+            poller.record(len(data))
+            if not data and received and not matcher:  # All the data is returned at once
+                break
 
-        output = ""
-        while (data := self.read()) or not output:  # All the data is returned at once
-            output += data
+            if data:
+                received = True
+                yield data
+                if matcher and matcher.feed(data) is not None:
+                    break
 
-            if timeout and time.time() >= timeout:
+            if poller.expired():
                 break
 
-            time.sleep(reading_delay)
+            poller.wait()
+
+    def gather_output(
+        self,
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+        success_flags: Optional[SuccessFlags] = None,
+    ) -> str:
+        """
+        Gather output from the session.
+        See `stream_output` for more information.
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :param success_flags: Flags or regular expressions marking the end of the output
+        :return: Gathered output
+        """
+        return "".join(self.stream_output(timeout, reading_delay, polling, success_flags))
+
+    def _execute_with_markers(
+        self, command: str, timeout: float = None, reading_delay: float = 1, polling: PollingStrategy = None
+    ) -> str:
+        """
+        Execute a command in a shell, surrounded by unique markers (see `CommandMarkers`).
+        The output is returned as soon as the end marker arrives, no matter the pauses in the output. Without a
+        `timeout`, the gathering also ends once no output arrives for `idle_timeout` seconds. The exit code is stored
+        in `last_exit_code` (None if the end marker didn't arrive in time).
+        :param command: Command to execute
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :return: Output of the command without the markers
+        """
+        markers = CommandMarkers(self.windows)
+        self.clear_buffer()
+        self.write(markers.wrap(command))
+        output = self.gather_output(timeout, reading_delay, polling, markers.end_pattern)
+        output, self.last_exit_code = markers.parse(output)
 
         return output
 
+    def execute_batch(
+        self,
+        commands: Iterable[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> Iterator[CommandResult]:
+        """
+        Execute many commands in a shell, each surrounded by its own unique markers (see `CommandMarkers`).
+        All the commands are written at once and their output is gathered in a single polling loop. The output is
+        split by the markers and each result is yielded as soon as its end marker arrives. Without a `timeout`, the
+        gathering also ends once no output arrives for `idle_timeout` seconds. The exit code of the last yielded
+        command is stored in `last_exit_code`.
+        :param commands: Commands to execute in the order of the execution
+        :param timeout: The maximum time to wait for the output of all the commands
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :return: Results in the order of the commands (the unfinished ones once the time runs out)
+        """
+        commands = list(commands)
+        if not commands:
+            return
+
+        windows = self.windows
+        markers = [CommandMarkers(windows) for _ in commands]
+        demultiplexer = CommandDemultiplexer(markers)
+        self.clear_buffer()
+        self.write("".join(each.wrap(command) for each, command in zip(markers, commands)))
+
+        previous = time.time()
+        for chunk in self.stream_output(timeout, reading_delay, polling, markers[-1].end_pattern):
+            for index, output, self.last_exit_code in demultiplexer.feed(chunk):
+                now = time.time()
+                yield CommandResult(commands[index], output, self.last_exit_code, now - previous)
+                previous = now
+
+        for index, output, self.last_exit_code in demultiplexer.flush():
+            yield CommandResult(commands[index], output, elapsed=time.time() - previous)
+
     def clear_buffer(self) -> None:
         """
         Clear unread data from the session.
@@ -483,18 +998,22 @@ class SessionShell(Session):
     def upgrade_to_meterpreter(self, local_host: str, local_port: int) -> bool:
         return self._rpc.shell_upgrade(self.id, local_host, local_port)
 
-    def execute(self, command: str, timeout: float = None, reading_delay: float = 1) -> str:
-        self.clear_buffer()
-        self.write(command)
-
-        return self.gather_output(timeout, reading_delay)
+    def execute(
+        self, command: str, timeout: float = None, reading_delay: float = 1, polling: PollingStrategy = None
+    ) -> str:
+        return self._execute_with_markers(command, timeout, reading_delay, polling)
 
     def execute_in_shell(
-        self, executable: str, arguments: List[str], timeout: float = None, reading_delay: float = 1
+        self,
+        executable: str,
+        arguments: List[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
     ) -> str:
         command = " ".join([executable, *arguments])
 
-        return self.execute(command, timeout, reading_delay)
+        return self.execute(command, timeout, reading_delay, polling)
 
 
 class SessionMeterpreter(Session):
@@ -523,11 +1042,64 @@ class SessionMeterpreter(Session):
     def change_transport(self, options: MeterpreterSessionTransportOptions) -> bool:
         return self._rpc.meterpreter_transport_change(self.id, options)
 
-    def execute(self, command: str, timeout: float = None, reading_delay: float = 1) -> str:
+    def execute(
+        self, command: str, timeout: float = None, reading_delay: float = 1, polling: PollingStrategy = None
+    ) -> str:
         self.clear_buffer()
         self.write(command)
 
-        return self.gather_output(timeout, reading_delay)
+        return self.gather_output(timeout, reading_delay, polling)
+
+    def execute_batch(
+        self,
+        commands: Iterable[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+    ) -> Iterator[CommandResult]:
+        """
+        Execute many Meterpreter commands one by one.
+        Meterpreter can't print the markers, so unlike in the shell sessions, each command is gathered on its own.
+        :param commands: Commands to execute in the order of the execution
+        :param timeout: The maximum time to wait for the output of each command
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :return: Results in the order of the commands (without the exit codes)
+        """
+        for command in commands:
+            start = time.time()
+            output = self.execute(command, timeout, reading_delay, polling)
+            yield CommandResult(command, output, elapsed=time.time() - start)
+
+    @staticmethod
+    def _create_process_command(markers: CommandMarkers, executable: str, arguments: List[str]) -> str:
+        """
+        Create a meterpreter command running an executable in the platform's shell in a new, interactive process.
+        :param markers: Markers printed by the shell
+        :param executable: Executable (or shell command)
+        :param arguments: Arguments of the executable
+        :return: Meterpreter command
+        """
+        shell, shell_arguments = markers.wrap_process(" ".join([executable, *arguments]))
+        shell_arguments = shell_arguments.replace("\\", "\\\\").replace('"', '\\"')
+
+        return f'execute -f {shell} -c -i -a "{shell_arguments}"'
+
+    @staticmethod
+    def _parse_process_output(markers: CommandMarkers, output: str) -> ProcessExecutionResult:
+        """
+        Split the output of a process created using `_create_process_command`.
+        :param markers: Markers printed by the shell
+        :param output: Gathered output, starting with the process' banner
+        :return: Result of the execution
+        """
+        pid = channel_id = None
+        banner = PROCESS_BANNER.match(output)
+        if banner is not None:
+            pid, channel_id = (int(value) if value is not None else None for value in banner.groups())
+            output = output[banner.end() :]
+
+        return ProcessExecutionResult(pid, channel_id, *markers.parse_process(output))
 
     def execute_in_shell(
         self,
@@ -535,20 +1107,28 @@ class SessionMeterpreter(Session):
         arguments: List[str],
         timeout: float = None,
         reading_delay: float = 1,
-    ) -> str:
-        # TODO: Remove the process ID from the output? eg. add postprocessing? (will be in a separate method/wrapper)
+        polling: PollingStrategy = None,
+    ) -> ProcessExecutionResult:
+        """
+        Execute a command in the platform's shell (`/bin/sh` or `cmd.exe`) in a new process and read its channel.
+        The shell prints the error output and the exit code after unique markers once the command finishes, so the
+        output is gathered in a single polling loop, that ends as soon as the end marker arrives (or, without a
+        `timeout`, once no output arrives for `idle_timeout` seconds).
+        :param executable: Executable (or shell command)
+        :param arguments: Arguments of the executable
+        :param timeout: The maximum time to wait for the output
+        :param reading_delay: Delay between the readings (used if `polling` is not defined)
+        :param polling: Strategy deciding the delay between the readings
+        :return: Process ID, channel ID, standard and error output, and exit code (also stored in `last_exit_code`)
+        """
+        markers = CommandMarkers(self.windows)
         self.clear_buffer()
-        self.run_single(f"execute -f {executable} -c -i -a {' '.join(arguments)}")
+        self.run_single(self._create_process_command(markers, executable, arguments))
+        output = self.gather_output(timeout, reading_delay, polling, markers.end_pattern)
+        result = self._parse_process_output(markers, output)
+        self.last_exit_code = result.exit_code
 
-        return self.gather_output(timeout, reading_delay)
-
-    def gather_output(self, timeout: float = None, reading_delay: float = 1) -> str:
-        output = super().gather_output(timeout, reading_delay)
-        # This is primarily a hotfix for executing in a shell since it returns some info at the beginning
-        if not re.sub(r"Process \d+ created\.\nChannel \d+ created\.\n", "", output, 1):
-            output += super().gather_output(timeout, reading_delay)
-
-        return output
+        return result
 
 
 class SessionRing(Session):
@@ -559,46 +1139,111 @@ class SessionRing(Session):
     def read(self) -> str:
         return self._rpc.ring_read(self.id)
 
-    def execute(self, command: str, timeout: float = None, reading_delay: float = 1) -> str:
-        self.clear_buffer()
-        self.write(command)
-
-        return self.gather_output(timeout, reading_delay)
+    def execute(
+        self, command: str, timeout: float = None, reading_delay: float = 1, polling: PollingStrategy = None
+    ) -> str:
+        return self._execute_with_markers(command, timeout, reading_delay, polling)
 
     def execute_in_shell(
-        self, executable: str, arguments: List[str], timeout: float = None, reading_delay: float = 1
+        self,
+        executable: str,
+        arguments: List[str],
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
     ) -> str:
         command = " ".join([executable, *arguments])
 
-        return self.execute(command, timeout, reading_delay)
+        return self.execute(command, timeout, reading_delay, polling)
 
 
 class Sessions(ContextBase):
-    def __init__(self, context: Context):
+    def __init__(self, context: Context, cache_ttl: float = 0):
+        """
+        Sessions of the framework instance.
+        :param context: Context used for the calls
+        :param cache_ttl: The maximum age of the cached session list in seconds (see `SessionRegistry`)
+        """
         super().__init__(context)
         self.rpc = RPCSessions(context)
+        self.registry = SessionRegistry(self.rpc, cache_ttl)
+        self.watcher = SessionWatcher(self.registry)
 
-    def get(self, session_id: int) -> Union[SessionShell, SessionMeterpreter, SessionRing]:
-        try:
-            session_info = self.rpc.list_sessions()[session_id]
-        except KeyError:
+    def _create_session(
+        self, session_id: int, session_info: Optional[SessionInformation]
+    ) -> Union[SessionShell, SessionMeterpreter, SessionRing]:
+        """
+        Create a session object from already fetched session information.
+        :param session_id: ID of the session
+        :param session_info: Information about the session (None if it doesn't exist)
+        :return: Session object matching the session type
+        """
+        if session_info is None:
             raise exceptions.InputError(f"Session with ID {session_id} doesn't exist.")
         session_type = session_info.type
         if session_type == SessionType.SHELL:
-            return SessionShell(self.rpc, session_id, session_info)
+            return SessionShell(self.rpc, session_id, session_info, self.registry)
         elif session_type == SessionType.METERPRETER:
-            return SessionMeterpreter(self.rpc, session_id, session_info)
+            return SessionMeterpreter(self.rpc, session_id, session_info, self.registry)
         else:
-            return SessionRing(self.rpc, session_id, session_info)
+            return SessionRing(self.rpc, session_id, session_info, self.registry)
+
+    def get(self, session_id: int) -> Union[SessionShell, SessionMeterpreter, SessionRing]:
+        return self._create_session(session_id, self.registry.get(session_id))
 
     def all(self) -> Dict[int, SessionInformation]:
-        return self.rpc.list_sessions()
+        return dict(self.registry.snapshot())
 
     def filter(self, options: SessionInformation, strict: bool = False) -> Dict[int, SessionInformation]:
-        all_sessions = self.rpc.list_sessions()
+        all_sessions = self.registry.snapshot()
         matched_sessions = {}
         for session_id, session_info in all_sessions.items():
             if session_info.match(options, strict):
                 matched_sessions[session_id] = session_info
 
         return matched_sessions
+
+    def execute_many(
+        self,
+        session_ids: Iterable[int],
+        command: str,
+        timeout: float = None,
+        reading_delay: float = 1,
+        polling: PollingStrategy = None,
+        max_workers: int = 10,
+    ) -> Iterator[SessionExecutionResult]:
+        """
+        Execute a command in multiple sessions concurrently.
+        The session list is fetched only once and the results are yielded as soon as each session finishes.
+        Errors are captured per session, so one failing session doesn't affect the others.
+        :param session_ids: IDs of the sessions
+        :param command: Command to execute
+        :param timeout: The maximum time to wait for the output of each session
+        :param reading_delay: Delay between the readings
+        :param polling: Strategy deciding the delay between the readings
+        :param max_workers: Maximum number of sessions to execute the command in at the same time
+        :return: Execution results in the order of completion
+        """
+        all_sessions = self.registry.snapshot()
+
+        def execute(session_id: int) -> SessionExecutionResult:
+            start = time.time()
+            try:
+                output = self._create_session(session_id, all_sessions.get(session_id)).execute(
+                    command, timeout, reading_delay, polling
+                )
+            except Exception as ex:
+                return SessionExecutionResult(session_id, error=ex, elapsed=time.time() - start)
+
+            return SessionExecutionResult(session_id, output, elapsed=time.time() - start)
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = [executor.submit(execute, session_id) for session_id in session_ids]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # In case the iteration is stopped early, don't start the remaining executions
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
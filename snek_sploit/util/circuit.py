@@ -0,0 +1,84 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from snek_sploit.util.enums import CircuitState
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        slow_call_threshold: float = None,
+        reset_timeout: float = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Stops sending calls to a server that stopped responding, so the callers fail fast instead of each of them
+        waiting for its timeout. After `reset_timeout`, a single caller probes the server and, if it's healthy again,
+        the calls are let through.
+        :param failure_threshold: Number of consecutive failed (or slow) calls that open the circuit
+        :param slow_call_threshold: Duration in seconds after which a call counts as failed (disabled if None)
+        :param reset_timeout: Time in seconds before the server is probed again
+        :param clock: Source of the current time in seconds, used to measure the `reset_timeout`
+        """
+        self.failure_threshold = failure_threshold
+        self.slow_call_threshold = slow_call_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def copy(self) -> "CircuitBreaker":
+        """
+        Create a new (closed) circuit breaker with the same settings.
+        :return: New circuit breaker
+        """
+        return CircuitBreaker(self.failure_threshold, self.slow_call_threshold, self.reset_timeout, self.clock)
+
+    def before_call(self) -> CircuitState:
+        """
+        Ask whether a call can be made.
+        :return: CLOSED if the call can be made, HALF_OPEN if the caller must probe the server first (only a single
+            caller is asked to), OPEN if the caller must not make the call
+        """
+        with self._lock:
+            if self._state is CircuitState.CLOSED:
+                return CircuitState.CLOSED
+            if self._state is CircuitState.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+                self._state = CircuitState.HALF_OPEN
+                return CircuitState.HALF_OPEN
+
+        return CircuitState.OPEN
+
+    def record_success(self, latency: Optional[float] = None) -> None:
+        """
+        Record a call that received a response (even an error one).
+        :param latency: Duration of the call in seconds
+        :return: None
+        """
+        if self.slow_call_threshold is not None and latency is not None and latency > self.slow_call_threshold:
+            self.record_failure()
+            return
+
+        with self._lock:
+            self._state = CircuitState.CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        """
+        Record a call that failed without a response.
+        :return: None
+        """
+        with self._lock:
+            self._failures += 1
+            if self._state is CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = CircuitState.OPEN
+                self._opened_at = self.clock()
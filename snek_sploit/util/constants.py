@@ -88,3 +88,4 @@ ERROR_CLASS = "error_class"
 ERROR_STRING = "error_string"
 ERROR_BACKTRACE = "error_backtrace"
 ERROR_MESSAGE = "error_message"
+ERROR_CODE = "error_code"
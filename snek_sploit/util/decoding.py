@@ -0,0 +1,46 @@
+import msgpack
+from typing import Any, Union
+
+
+def _decode_value(value: Any) -> Any:
+    """
+    Decode bytes and bytes in (nested) lists. Maps are already decoded by the hook.
+    :param value: Value to decode
+    :return: Decoded value
+    """
+    value_type = type(value)
+    if value_type is bytes:
+        return value.decode()
+    if value_type is list:
+        return [_decode_value(each) for each in value]
+
+    return value
+
+
+class ResponseSchema:
+    """
+    Describes how to decode a response while it's being unpacked, so no additional pass over the response is needed.
+    Bytes keys and values of each map are decoded. Other strings are kept as they are (no guessing whether a string
+    is a number).
+    """
+
+    @staticmethod
+    def _object_pairs_hook(pairs: list) -> dict:
+        """
+        Decode a single map. Called by the unpacker for each map, the nested maps are already decoded.
+        :param pairs: Key-value pairs of the map
+        :return: Decoded map
+        """
+        return {key.decode() if type(key) is bytes else key: _decode_value(value) for key, value in pairs}
+
+    def loads(self, content: bytes) -> Union[dict, list, str, int]:
+        """
+        Unpack and decode a response.
+        :param content: Raw response body
+        :return: Decoded response
+        """
+        return _decode_value(msgpack.loads(content, strict_map_key=False, object_pairs_hook=self._object_pairs_hook))
+
+
+# Schema for responses that only need decoding
+DECODE = ResponseSchema()
@@ -11,6 +11,8 @@ class ModuleType(str, Enum):  # StrEnum is supported since 3.11
     POST = "post"
     NOP = "nop"
     PAYLOAD = "payload"
+    ENCODER = "encoder"
+    EVASION = "evasion"
 
 
 class SessionType(str, Enum):  # StrEnum is supported since 3.11
@@ -21,3 +23,57 @@ class SessionType(str, Enum):  # StrEnum is supported since 3.11
     SHELL = "shell"
     METERPRETER = "meterpreter"
     RING = "ring"
+
+
+class ModuleRank(str, Enum):  # StrEnum is supported since 3.11
+    """
+    List of the existing module ranks, from the lowest to the highest.
+    """
+
+    MANUAL = "manual"
+    LOW = "low"
+    AVERAGE = "average"
+    NORMAL = "normal"
+    GOOD = "good"
+    GREAT = "great"
+    EXCELLENT = "excellent"
+
+
+class SearchMode(str, Enum):  # StrEnum is supported since 3.11
+    """
+    List of the ways a query word can match a module.
+    """
+
+    TOKEN = "token"
+    PREFIX = "prefix"
+    SUBSTRING = "substring"
+
+
+class Idempotency(str, Enum):  # StrEnum is supported since 3.11
+    """
+    List of the ways an endpoint behaves when it's called repeatedly.
+    """
+
+    SAFE = "safe"  # Read-only, doesn't change anything
+    IDEMPOTENT = "idempotent"  # Changes something, but repeating the call has the same effect as a single call
+    UNSAFE = "unsafe"  # Repeating the call repeats its effect (e.g. runs a command twice)
+
+
+class CircuitState(str, Enum):  # StrEnum is supported since 3.11
+    """
+    List of the states of a circuit breaker.
+    """
+
+    CLOSED = "closed"  # Calls are let through
+    OPEN = "open"  # Calls fail immediately
+    HALF_OPEN = "half_open"  # A single caller probes whether the server recovered
+
+
+class SessionEventType(str, Enum):  # StrEnum is supported since 3.11
+    """
+    List of the changes of the session list.
+    """
+
+    OPENED = "opened"
+    CLOSED = "closed"
+    CHANGED = "changed"
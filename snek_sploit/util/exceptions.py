@@ -14,3 +14,15 @@ class InputError(Error):
     """
     Exception raised in case the input is incorrect.
     """
+
+
+class CircuitOpenError(Error):
+    """
+    Exception raised in case no server is available, because their circuit breakers are open.
+    """
+
+
+class HTTPError(Error, ConnectionError):
+    """
+    Exception raised in case the response isn't an MSF RPC one (e.g. an error page of a proxy).
+    """
@@ -0,0 +1,312 @@
+import random
+import re
+import shlex
+import string
+from typing import Iterable, List, Optional, Pattern, Tuple, Union
+
+# Literal flags and/or compiled regular expressions (e.g. a prompt)
+SuccessFlags = Union[str, Pattern, Iterable[Union[str, Pattern]]]
+
+
+class StreamMatcher:
+    def __init__(self, patterns: SuccessFlags, regex_window: int = 4096):
+        """
+        Finds any of many patterns in output that arrives in chunks, including the matches split between the chunks.
+        The literal flags are searched at once using a single compiled alternation. Only the data that can still
+        complete a flag (the last `longest flag - 1` characters) is carried over to the next chunk, so each chunk is
+        scanned just once regardless of the number of flags.
+        :param patterns: Literal flags and/or compiled regular expressions
+        :param regex_window: Number of the characters carried over from the previous chunks the regular expressions
+            are matched against (on top of the new chunk), it limits the length of a match split between the chunks
+        """
+        if isinstance(patterns, (str, re.Pattern)):
+            patterns = [patterns]
+
+        literals: List[str] = []
+        self._expressions: List[Pattern] = []
+        for pattern in patterns:
+            if isinstance(pattern, re.Pattern):
+                self._expressions.append(pattern)
+            elif pattern:
+                literals.append(pattern)
+
+        # The longest flags go first, so the longest one is reported if more flags end at the same place
+        literals = sorted(set(literals), key=len, reverse=True)
+        self._literals = re.compile("|".join(map(re.escape, literals))) if literals else None
+        self._literal_tail = len(literals[0]) - 1 if literals else 0
+        self.regex_window = regex_window
+
+        self._tail = ""
+        self.match: Optional[str] = None
+
+    def __bool__(self) -> bool:
+        return self._literals is not None or bool(self._expressions)
+
+    @property
+    def matched(self) -> bool:
+        return self.match is not None
+
+    def _carried_over(self) -> int:
+        return max(self._literal_tail, self.regex_window if self._expressions else 0)
+
+    def feed(self, chunk: str) -> Optional[str]:
+        """
+        Search the next chunk of the output.
+        :param chunk: Newly received data
+        :return: Matched text if a pattern was found in the data received so far, otherwise None
+        """
+        if not chunk:
+            return self.match
+
+        data = self._tail + chunk
+        # Literal matches that were already in the tail were reported before
+        start = max(len(self._tail) - self._literal_tail, 0)
+        if self.match is None and self._literals is not None:
+            found = self._literals.search(data, start)
+            if found is not None:
+                self.match = found.group()
+        if self.match is None:
+            # The whole chunk is searched, only the part carried over from the previous chunks is limited
+            start = max(len(self._tail) - self.regex_window, 0)
+            for expression in self._expressions:
+                found = expression.search(data, start)
+                if found is not None:
+                    self.match = found.group()
+                    break
+
+        carried_over = self._carried_over()
+        self._tail = data[-carried_over:] if carried_over else ""
+
+        return self.match
+
+    def reset(self) -> None:
+        """
+        Forget the received data and the match.
+        :return: None
+        """
+        self._tail = ""
+        self.match = None
+
+
+def generate_flag(length: int = 20) -> str:
+    """
+    Generate a random flag, that's unlikely to appear in any output.
+    :param length: Number of characters
+    :return: Flag
+    """
+    return "".join(random.choices(string.ascii_letters + string.digits, k=length))
+
+
+class CommandMarkers:
+    def __init__(self, windows: bool = False):
+        """
+        Unique markers printed by a shell before and after a command, so the command's output can be told apart from
+        the rest and its end is known as soon as it arrives. The end marker is followed by the command's exit code.
+        The markers are split into two halves in the written input, so an echo of the input isn't mistaken for them.
+        :param windows: Whether to use the `cmd.exe` syntax instead of the POSIX shell one
+        """
+        self.windows = windows
+        self.start = generate_flag()
+        self.stderr = generate_flag()
+        self.end = generate_flag()
+        self.end_pattern = re.compile(re.escape(self.end) + r":(-?\d+):")
+
+    def _echo(self, marker: str, suffix: str = "") -> str:
+        """
+        Create a command printing a marker.
+        :param marker: Marker to print
+        :param suffix: Text printed right after the marker
+        :return: Command
+        """
+        half = len(marker) // 2
+        if self.windows:
+            return f"echo {marker[:half]}^{marker[half:]}{suffix}"
+
+        return f"echo '{marker[:half]}''{marker[half:]}'{suffix}"
+
+    def wrap(self, command: str) -> str:
+        """
+        Surround a command with the commands printing the markers.
+        :param command: Command (or newline separated commands)
+        :return: Input for the shell
+        """
+        if self.windows:
+            return "\r\n".join([self._echo(self.start), command, self._echo(self.end, ":%errorlevel%:")]) + "\r\n"
+
+        return "\n".join([self._echo(self.start), command, self._echo(self.end, ":$?:")]) + "\n"
+
+    def parse(self, output: str) -> Tuple[str, Optional[int]]:
+        """
+        Take the command's output from between the markers.
+        :param output: Gathered output
+        :return: Output of the command and its exit code (None if the end marker wasn't received)
+        """
+        start = output.find(self.start)
+        if start != -1:
+            # The rest of the marker's line is skipped as well
+            line_end = output.find("\n", start)
+            output = output[line_end + 1 :] if line_end != -1 else ""
+
+        found = self.end_pattern.search(output)
+        if found is None:
+            return output, None
+
+        return output[: found.start()], int(found.group(1))
+
+    def wrap_process(self, command: str) -> Tuple[str, str]:
+        """
+        Create a shell process running a command. Once the command finishes, the process prints its error output and
+        exit code, each after a marker. On Windows, the error output stays a part of the standard one.
+        :param command: Command
+        :return: Shell executable and its arguments
+        """
+        if self.windows:
+            return (
+                "cmd.exe",
+                f"/v:on /c {command} & {self._echo(self.stderr)} & {self._echo(self.end, ':!errorlevel!:')}",
+            )
+
+        # The standard output goes to the process' output right away, the error output is captured until the end. The
+        # captured output is followed by a dot, so its trailing newlines aren't stripped by the command substitution.
+        script = (
+            f"{{ e=$( ( {command} ) 2>&1 1>&3; s=$?; echo .; exit $s ); s=$?; }} 3>&1; "
+            f'{self._echo(self.stderr)}; printf %s "${{e%.}}"; {self._echo(self.end, ":$s:")}'
+        )
+
+        return "/bin/sh", f"-c {shlex.quote(script)}"
+
+    def parse_process(self, output: str) -> Tuple[str, str, Optional[int]]:
+        """
+        Split the output of a process created by `wrap_process`.
+        :param output: Gathered output (without the process' banner)
+        :return: Standard output, error output, and exit code (None if the end marker wasn't received)
+        """
+        exit_code = None
+        found = self.end_pattern.search(output)
+        if found is not None:
+            output, exit_code = output[: found.start()], int(found.group(1))
+
+        stderr_start = output.find(self.stderr)
+        if stderr_start == -1:
+            return output, "", exit_code
+
+        line_end = output.find("\n", stderr_start)
+
+        return output[:stderr_start], output[line_end + 1 :] if line_end != -1 else "", exit_code
+
+
+class EchoMarker:
+    def __init__(self):
+        """
+        Unique marker printed after a console command by the `echo` shell command (executed by msfconsole). The marker
+        is split into two halves in the written command, so the `[*] exec: echo ...` line isn't mistaken for it.
+        """
+        self.end = generate_flag()
+        self.end_pattern = re.compile(re.escape(self.end))
+        half = len(self.end) // 2
+        self.command = f"echo '{self.end[:half]}''{self.end[half:]}'"
+
+    def wrap(self, command: str) -> str:
+        """
+        Append the command printing the marker to a command.
+        :param command: Command (or newline separated commands)
+        :return: Input for the console
+        """
+        return f"{command}\n{self.command}\n"
+
+    def parse(self, output: str) -> Tuple[str, Optional[int]]:
+        """
+        Take the command's output from before the marker.
+        :param output: Gathered output
+        :return: Output of the command and None (the console doesn't report exit codes)
+        """
+        found = self.end_pattern.search(output)
+        if found is not None:
+            output = output[: found.start()]
+
+        # The line announcing the execution of the marker's command is left out as well
+        echo = output.rfind(self.command)
+        if echo != -1:
+            output = output[: output.rfind("\n", 0, echo) + 1]
+
+        return output, None
+
+
+class CommandDemultiplexer:
+    # Characters searched again in the next chunk on top of the end marker, so a split exit code is found as well
+    EXIT_CODE_LENGTH = 24
+
+    def __init__(self, markers: List[Union[CommandMarkers, "EchoMarker"]]):
+        """
+        Splits the output of many commands written at once, each surrounded by its own markers, into the output of
+        each command. A command is finished as soon as its end marker arrives, the following commands' output is
+        kept until their end markers arrive as well.
+        :param markers: Markers of the commands in the order they were written
+        """
+        self.markers = markers
+        self.finished = 0
+
+        self._buffer = ""
+        self._searched = 0
+        self._line_end = False
+
+    def _skip_line_end(self) -> None:
+        """
+        Drop the rest of the last end marker's line, it isn't a part of the next command's output.
+        :return: None
+        """
+        if not self._line_end or self._buffer in ("", "\r"):
+            return
+
+        if self._buffer.startswith("\r\n"):
+            self._buffer = self._buffer[2:]
+        elif self._buffer.startswith("\n"):
+            self._buffer = self._buffer[1:]
+        self._line_end = False
+
+    @property
+    def done(self) -> bool:
+        return self.finished >= len(self.markers)
+
+    def feed(self, chunk: str) -> List[Tuple[int, str, Optional[int]]]:
+        """
+        Search the next chunk of the output for the end markers.
+        :param chunk: Newly received data
+        :return: Index, output, and exit code of each command finished by the chunk
+        """
+        self._buffer += chunk
+        results = []
+        while not self.done:
+            self._skip_line_end()
+            markers = self.markers[self.finished]
+            found = markers.end_pattern.search(self._buffer, self._searched)
+            if found is None:
+                # Only the part that can still contain the end marker is searched again
+                self._searched = max(len(self._buffer) - len(markers.end) - self.EXIT_CODE_LENGTH, 0)
+                break
+
+            results.append((self.finished, *markers.parse(self._buffer[: found.end()])))
+            self._buffer = self._buffer[found.end() :]
+            self._searched = 0
+            self._line_end = True
+            self.finished += 1
+
+        return results
+
+    def flush(self) -> List[Tuple[int, str, Optional[int]]]:
+        """
+        Finish the commands whose end marker didn't arrive. The first of them gets the rest of the output.
+        :return: Index, output, and exit code (None) of each unfinished command
+        """
+        results = []
+        while not self.done:
+            self._skip_line_end()
+            output, _ = self.markers[self.finished].parse(self._buffer)
+            results.append((self.finished, output, None))
+            self._buffer = ""
+            self.finished += 1
+
+        self._searched = 0
+        self._line_end = False
+
+        return results
@@ -0,0 +1,206 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple, Union, Optional
+
+from snek_sploit.util.exceptions import RPCError
+from snek_sploit.util.records import record
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+@record
+class EndpointMetrics:
+    """
+    Metrics of a single endpoint.
+
+    Parameters:
+        calls: Number of calls (each retry is a separate call)
+        errors: Number of calls that returned an error (`RPCError`)
+        failures: Number of calls that failed without a response (e.g. connection errors)
+        retries: Number of retried calls
+        request_bytes: Total size of the requests
+        response_bytes: Total size of the responses
+        latency_sum: Total duration of the calls that received a response in seconds
+        latency_counts: Number of the calls in each latency bucket (the last one is unbounded)
+    """
+
+    calls: int = 0
+    errors: int = 0
+    failures: int = 0
+    retries: int = 0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    latency_sum: float = 0
+    latency_counts: List[int] = None
+
+
+class _Measurement:
+    def __init__(self, registry: "MetricsRegistry", endpoint: str, request_bytes: int):
+        """
+        Measurement of a single call.
+        :param registry: Registry the measurement is stored in
+        :param endpoint: Endpoint name
+        :param request_bytes: Size of the request
+        """
+        self._registry = registry
+        self._endpoint = endpoint
+        self._request_bytes = request_bytes
+        self._start = 0.0
+        self.response_bytes: Optional[int] = None
+
+    def __enter__(self) -> "_Measurement":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        latency = time.perf_counter() - self._start
+        self._registry.observe(
+            self._endpoint,
+            self._request_bytes,
+            self.response_bytes,
+            latency if self.response_bytes is not None else None,
+            exc_type is not None and issubclass(exc_type, RPCError),
+        )
+
+
+class MetricsRegistry:
+    def __init__(self, latency_buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Per-endpoint call metrics (counts, latency histogram, payload sizes, retries, and errors).
+        Contexts without a registry don't measure anything, so the metrics cost nothing unless enabled.
+        :param latency_buckets: Upper bounds of the latency histogram buckets in seconds (in ascending order)
+        """
+        self.latency_buckets = tuple(latency_buckets)
+        self._endpoints: Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint: str) -> EndpointMetrics:
+        """
+        Get metrics of an endpoint, create them if they don't exist. Must be called while holding the lock.
+        :param endpoint: Endpoint name
+        :return: Metrics of the endpoint
+        """
+        metrics = self._endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self._endpoints[endpoint] = EndpointMetrics(latency_counts=[0] * (len(self.latency_buckets) + 1))
+
+        return metrics
+
+    def measure(self, endpoint: str, request_bytes: int) -> _Measurement:
+        """
+        Measure a call. Set `response_bytes` of the measurement once the response is received.
+        :param endpoint: Endpoint name
+        :param request_bytes: Size of the request
+        :return: Context manager measuring the call
+        """
+        return _Measurement(self, endpoint, request_bytes)
+
+    def observe(
+        self,
+        endpoint: str,
+        request_bytes: int,
+        response_bytes: Optional[int],
+        latency: Optional[float],
+        error: bool = False,
+    ) -> None:
+        """
+        Record a call.
+        :param endpoint: Endpoint name
+        :param request_bytes: Size of the request
+        :param response_bytes: Size of the response (None if the call failed without a response)
+        :param latency: Duration of the call in seconds (None if the call failed without a response)
+        :param error: Whether the call returned an error
+        :return: None
+        """
+        with self._lock:
+            metrics = self._get(endpoint)
+            metrics.calls += 1
+            metrics.request_bytes += request_bytes
+            if response_bytes is None:
+                metrics.failures += 1
+            else:
+                metrics.response_bytes += response_bytes
+            if latency is not None:
+                metrics.latency_sum += latency
+                metrics.latency_counts[bisect_left(self.latency_buckets, latency)] += 1
+            if error:
+                metrics.errors += 1
+
+    def record_retry(self, endpoint: str) -> None:
+        """
+        Record a retried call.
+        :param endpoint: Endpoint name
+        :return: None
+        """
+        with self._lock:
+            self._get(endpoint).retries += 1
+
+    def reset(self) -> None:
+        """
+        Drop all metrics.
+        :return: None
+        """
+        with self._lock:
+            self._endpoints = {}
+
+    def as_dict(self) -> Dict[str, Dict[str, Union[int, float, Dict[str, Union[int, float, dict]]]]]:
+        """
+        Export the metrics.
+        :return: Endpoint names and their metrics, latency buckets are cumulative (like in Prometheus)
+        """
+        with self._lock:
+            exported = {}
+            for endpoint, metrics in self._endpoints.items():
+                buckets, total = {}, 0
+                for bound, count in zip((*self.latency_buckets, "+Inf"), metrics.latency_counts):
+                    total += count
+                    buckets[bound] = total
+
+                exported[endpoint] = {
+                    "calls": metrics.calls,
+                    "errors": metrics.errors,
+                    "failures": metrics.failures,
+                    "retries": metrics.retries,
+                    "request_bytes": metrics.request_bytes,
+                    "response_bytes": metrics.response_bytes,
+                    "latency": {"sum": metrics.latency_sum, "count": total, "buckets": buckets},
+                }
+
+        return exported
+
+    def to_prometheus(self, prefix: str = "snek_sploit_rpc") -> str:
+        """
+        Export the metrics in the Prometheus text format.
+        :param prefix: Prefix of the metric names
+        :return: Metrics in the Prometheus text format
+        """
+        exported = self.as_dict()
+        counters = (
+            ("calls", "calls_total", "Number of calls."),
+            ("errors", "errors_total", "Number of calls that returned an error."),
+            ("failures", "failures_total", "Number of calls that failed without a response."),
+            ("retries", "retries_total", "Number of retried calls."),
+            ("request_bytes", "request_bytes_total", "Total size of the requests."),
+            ("response_bytes", "response_bytes_total", "Total size of the responses."),
+        )
+
+        lines = []
+        for key, name, description in counters:
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for endpoint, metrics in exported.items():
+                lines.append(f'{prefix}_{name}{{endpoint="{endpoint}"}} {metrics[key]}')
+
+        name = f"{prefix}_latency_seconds"
+        lines.append(f"# HELP {name} Duration of the calls that received a response.")
+        lines.append(f"# TYPE {name} histogram")
+        for endpoint, metrics in exported.items():
+            latency = metrics["latency"]
+            for bound, count in latency["buckets"].items():
+                lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+            lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {latency["sum"]}')
+            lines.append(f'{name}_count{{endpoint="{endpoint}"}} {latency["count"]}')
+
+        return "\n".join(lines) + "\n"
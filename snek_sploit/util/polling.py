@@ -0,0 +1,139 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional
+import time
+
+from snek_sploit.util.records import record
+
+
+@record
+class PollingStatistics:
+    """
+    Statistics of a single output gathering.
+
+    Parameters:
+        polls: Number of reads
+        bytes_received: Number of received characters
+        time_to_first_byte: Time it took to receive the first data in seconds (None if nothing was received)
+        elapsed: Total time of the gathering in seconds
+    """
+
+    polls: int = 0
+    bytes_received: int = 0
+    time_to_first_byte: Optional[float] = None
+    elapsed: float = 0
+
+
+class PollingStrategy(ABC):
+    """
+    Decides how long to wait between the reads. Strategies are stateless, so a single instance can be shared.
+    """
+
+    @abstractmethod
+    def next_delay(self, previous_delay: Optional[float], received: int) -> float:
+        """
+        Get the delay before the next read.
+        :param previous_delay: Previous delay (None before the first one)
+        :param received: Amount of data received by the last read
+        :return: Delay in seconds
+        """
+
+
+class FixedDelay(PollingStrategy):
+    def __init__(self, delay: float = 1):
+        """
+        Always wait the same amount of time.
+        :param delay: Delay between the readings
+        """
+        self.delay = delay
+
+    def next_delay(self, previous_delay: Optional[float], received: int) -> float:
+        return self.delay
+
+
+class ExponentialBackoff(PollingStrategy):
+    def __init__(self, initial: float = 0.005, maximum: float = 1, multiplier: float = 2):
+        """
+        Start with a short delay and prolong it while no data arrives. Once data arrives, start over.
+        :param initial: The first (and the shortest) delay
+        :param maximum: The longest delay
+        :param multiplier: How much to prolong the delay after each empty read
+        """
+        self.initial = initial
+        self.maximum = maximum
+        self.multiplier = multiplier
+
+    def next_delay(self, previous_delay: Optional[float], received: int) -> float:
+        if previous_delay is None or received:
+            return self.initial
+
+        return min(previous_delay * self.multiplier, self.maximum)
+
+
+class Poller:
+    def __init__(self, strategy: PollingStrategy, timeout: float = None, idle_timeout: float = None):
+        """
+        State of a single output gathering.
+        :param strategy: Strategy used to compute the delays
+        :param timeout: The maximum time to wait for the output
+        :param idle_timeout: The maximum time to wait for more output since the last received data (or the start)
+        """
+        self._strategy = strategy
+        self._start = time.time()
+        self._deadline = self._start + timeout if timeout else None
+        self._idle_timeout = idle_timeout
+        self._last_received = self._start
+        self._delay: Optional[float] = None
+        self.statistics = PollingStatistics()
+
+    def record(self, received: int) -> None:
+        """
+        Record a read and compute the next delay.
+        :param received: Amount of received data
+        :return: None
+        """
+        now = time.time()
+        self.statistics.polls += 1
+        self.statistics.bytes_received += received
+        self.statistics.elapsed = now - self._start
+        if received:
+            self._last_received = now
+            if self.statistics.time_to_first_byte is None:
+                self.statistics.time_to_first_byte = now - self._start
+
+        self._delay = self._strategy.next_delay(self._delay, received)
+
+    def expired(self) -> bool:
+        """
+        Check whether the timeout (or the idle timeout) was reached.
+        :return: True if the timeout was reached
+        """
+        now = time.time()
+        if self._idle_timeout is not None and now - self._last_received >= self._idle_timeout:
+            return True
+
+        return self._deadline is not None and now >= self._deadline
+
+    def _remaining_delay(self) -> float:
+        """
+        Get the delay, shortened so it doesn't exceed the timeout.
+        :return: Delay in seconds
+        """
+        if self._deadline is None:
+            return self._delay
+
+        return max(min(self._delay, self._deadline - time.time()), 0)
+
+    def wait(self) -> None:
+        """
+        Wait before the next read.
+        :return: None
+        """
+        time.sleep(self._remaining_delay())
+
+    async def async_wait(self) -> None:
+        """
+        Wait before the next read without blocking the event loop.
+        :return: None
+        """
+        await asyncio.sleep(self._remaining_delay())
@@ -0,0 +1,37 @@
+import sys
+from dataclasses import dataclass, fields
+from typing import Type, TypeVar, Tuple, Dict, Any, Union
+
+T = TypeVar("T")
+
+
+def record(cls: Type[T]) -> Type[T]:
+    """
+    Create a dataclass that stores its fields in `__slots__` (supported since 3.10), which makes it smaller and faster.
+    :param cls: Class to transform
+    :return: Dataclass
+    """
+    if sys.version_info >= (3, 10):
+        return dataclass(slots=True)(cls)
+
+    return dataclass(cls)
+
+
+def field_names(record_type: type) -> Tuple[str, ...]:
+    """
+    Get names of the record's fields.
+    :param record_type: Record (dataclass) type
+    :return: Field names in the definition order
+    """
+    return tuple(each.name for each in fields(record_type))
+
+
+def parse_record(record_type: Type[T], response: Dict[Union[bytes, str], Any], keys: Tuple[bytes, ...]) -> T:
+    """
+    Create a record directly from an undecoded response in a single pass. Bytes values are decoded on the way.
+    :param record_type: Record (dataclass) type
+    :param response: API response containing the necessary data
+    :param keys: Response keys in the order of the record's fields (missing keys result in None)
+    :return: Record
+    """
+    return record_type(*[value.decode() if type(value) is bytes else value for value in map(response.get, keys)])
@@ -1,10 +1,240 @@
 from functools import wraps, partial
+import random
+import threading
 import time
+import warnings
+from typing import Dict, Iterable, Optional
+
+from snek_sploit.util.enums import Idempotency
+
+# Read-only endpoints, retrying them can't cause any harm
+SAFE_ENDPOINTS = frozenset(
+    {
+        "auth.token_list",
+        "health.check",
+        "core.version",
+        "core.getg",
+        "core.module_stats",
+        "core.thread_list",
+        "session.list",
+        "session.meterpreter_tabs",
+        "session.meterpreter_directory_separator",
+        "session.compatible_modules",
+        "session.ring_last",
+        "console.list",
+        "console.tabs",
+        "module.exploits",
+        "module.evasion",
+        "module.auxiliary",
+        "module.payloads",
+        "module.encoders",
+        "module.nops",
+        "module.post",
+        "module.info_html",
+        "module.info",
+        "module.search",
+        "module.compatible_payloads",
+        "module.compatible_evasion_payloads",
+        "module.compatible_sessions",
+        "module.target_compatible_payloads",
+        "module.target_compatible_evasion_payloads",
+        "module.running_stats",
+        "module.options",
+        "module.results",
+        "module.executable_formats",
+        "module.transform_formats",
+        "module.encryption_formats",
+        "module.platforms",
+        "module.architectures",
+        "module.encode_formats",
+        "job.list",
+        "job.info",
+        "plugin.loaded",
+        "db.creds",
+        "db.hosts",
+        "db.services",
+        "db.vulns",
+        "db.workspaces",
+        "db.current_workspace",
+        "db.get_workspace",
+        "db.get_host",
+        "db.get_service",
+        "db.get_note",
+        "db.get_client",
+        "db.notes",
+        "db.get_ref",
+        "db.events",
+        "db.loots",
+        "db.get_vuln",
+        "db.clients",
+        "db.driver",
+        "db.status",
+    }
+)
+
+# Endpoints that change something, but repeating them has the same effect as a single call
+IDEMPOTENT_ENDPOINTS = frozenset(
+    {
+        "auth.logout",
+        "auth.token_add",
+        "auth.token_remove",
+        "core.setg",
+        "core.unsetg",
+        "core.save",
+        "core.thread_kill",
+        "session.stop",
+        "session.meterpreter_session_detach",
+        "session.meterpreter_session_kill",
+        "session.ring_clear",
+        "console.destroy",
+        "console.session_kill",
+        "console.session_detach",
+        "job.stop",
+        "plugin.unload",
+        "db.set_workspace",
+        "db.del_creds",
+        "db.del_workspace",
+        "db.del_vuln",
+        "db.del_note",
+        "db.del_service",
+        "db.del_host",
+        "db.del_client",
+        "db.connect",
+        "db.disconnect",
+    }
+)
+
+
+def endpoint_idempotency(endpoint: str) -> Idempotency:
+    """
+    Get how an endpoint behaves when it's called repeatedly. Unknown endpoints (and reads that consume data, like
+    `session.shell_read`) are considered unsafe.
+    :param endpoint: Endpoint name
+    :return: Idempotency class of the endpoint
+    """
+    if endpoint in SAFE_ENDPOINTS:
+        return Idempotency.SAFE
+    if endpoint in IDEMPOTENT_ENDPOINTS:
+        return Idempotency.IDEMPOTENT
+
+    return Idempotency.UNSAFE
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float, jitter: bool = True) -> float:
+    """
+    Get an exponentially growing delay.
+    :param attempt: Number of the failed attempt (starting with 0)
+    :param base_delay: Delay after the first failed attempt
+    :param max_delay: The longest delay
+    :param jitter: Whether to pick a random delay up to the computed one, so the clients don't retry at the same time
+    :return: Delay in seconds
+    """
+    delay = min(base_delay * 2**attempt, max_delay)
+
+    return random.uniform(0, delay) if jitter else delay
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, reserve: float = 10):
+        """
+        Limits the number of retries across all calls, so a struggling server isn't flooded with them.
+        Each call adds `ratio` of a token (up to `reserve`) and each retry takes a whole token.
+        :param ratio: The highest ratio of retries to calls in the long run
+        :param reserve: Number of retries available at once
+        """
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = reserve
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        """
+        Record a call.
+        :return: None
+        """
+        with self._lock:
+            self._tokens = min(self._tokens + self.ratio, self.reserve)
+
+    def withdraw(self) -> bool:
+        """
+        Ask for a retry.
+        :return: True if the retry is allowed
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+
+        return True
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30,
+        jitter: bool = True,
+        retry_on: Iterable[Idempotency] = (Idempotency.SAFE,),
+        budget: Optional[RetryBudget] = None,
+        endpoints: Dict[str, Idempotency] = None,
+    ):
+        """
+        Decides whether and when to retry a failed call. By default, only the safe (read-only) endpoints are retried.
+        :param attempts: The maximum number of attempts of a single call
+        :param base_delay: Delay after the first failed attempt, it doubles after each following one
+        :param max_delay: The longest delay
+        :param jitter: Whether to randomize the delays
+        :param retry_on: Idempotency classes of the endpoints that can be retried
+        :param budget: Budget shared by all calls (a default one is created if None)
+        :param endpoints: Endpoints and their idempotency classes, overriding the default ones
+        """
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retry_on = frozenset(retry_on)
+        self.budget = budget if budget is not None else RetryBudget()
+        self.endpoints = endpoints or {}
+
+    def idempotency(self, endpoint: str) -> Idempotency:
+        """
+        Get how an endpoint behaves when it's called repeatedly.
+        :param endpoint: Endpoint name
+        :return: Idempotency class of the endpoint
+        """
+        return self.endpoints.get(endpoint) or endpoint_idempotency(endpoint)
+
+    def record_call(self) -> None:
+        """
+        Record a call (not its retries), so the budget is replenished.
+        :return: None
+        """
+        self.budget.deposit()
+
+    def retry_delay(self, endpoint: str, attempt: int) -> Optional[float]:
+        """
+        Decide whether to retry a failed call.
+        :param endpoint: Endpoint name
+        :param attempt: Number of the failed attempt (starting with 0)
+        :return: Delay before the retry, None if the call mustn't be retried
+        """
+        if attempt + 1 >= self.attempts or self.idempotency(endpoint) not in self.retry_on:
+            return None
+        if not self.budget.withdraw():
+            return None
+
+        return backoff_delay(attempt, self.base_delay, self.max_delay, self.jitter)
+
+
+# Policy that never retries
+NO_RETRY = RetryPolicy(attempts=1)
 
 
 def retry(func=None, *, attempts: int = 1, on_errors: tuple = None, wait_on_error: bool = True):
     """
-    Retry a function if an error occurs.
+    Retry a function if an error occurs. The waiting time grows exponentially and is randomized (see `backoff_delay`).
+    Deprecated, the calls are retried by the context according to its `retry_policy` (see `RetryPolicy`).
     :param func: Original function
     :param attempts: Number of times to retry
     :param on_errors: On what errors to retry
@@ -14,6 +244,11 @@ def retry(func=None, *, attempts: int = 1, on_errors: tuple = None, wait_on_erro
     if func is None:
         return partial(retry, attempts=attempts, on_errors=on_errors, wait_on_error=wait_on_error)
 
+    warnings.warn(
+        "`retry` is deprecated, the calls are retried according to `Context.retry_policy`",
+        DeprecationWarning,
+        stacklevel=2,
+    )
     if not on_errors:
         on_errors = (Exception,)
 
@@ -26,6 +261,6 @@ def retry(func=None, *, attempts: int = 1, on_errors: tuple = None, wait_on_erro
                 if i + 1 == attempts:
                     raise ex
                 if wait_on_error:
-                    time.sleep(min(i + 1 * 3, 30))
+                    time.sleep(backoff_delay(i, 3, 30))
 
     return wrapper
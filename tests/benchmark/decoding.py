@@ -0,0 +1,124 @@
+"""
+Compare the legacy recursive decoder with the current parsing: the decoding done at unpack time (`ResponseSchema`)
+and the records built in a single pass (`parse_record`).
+Run with `poetry run python tests/benchmark/decoding.py`.
+"""
+
+import os
+import sys
+import timeit
+from typing import Any, Callable, Dict, Union
+
+import msgpack
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from snek_sploit.lib.rpc.sessions import RPCSessions, SessionInformation, SESSION_INFORMATION_FIELDS  # noqa: E402
+from snek_sploit.util.decoding import DECODE  # noqa: E402
+
+
+def legacy_decode(to_decode: Union[dict, list, bytes, str, int]) -> Union[dict, list, str, int]:
+    """
+    The original `ContextBase._decode`, unpacking happens beforehand.
+    """
+    if isinstance(to_decode, dict):
+        decoded = {}
+        for key, value in to_decode.items():
+            decoded[legacy_decode(key)] = legacy_decode(value)
+    elif isinstance(to_decode, list):
+        decoded = [legacy_decode(each) for each in to_decode]
+    elif isinstance(to_decode, bytes):
+        decoded = to_decode.decode()
+    else:
+        decoded = to_decode
+
+    if isinstance(decoded, str) and decoded.isdigit():
+        decoded = int(decoded)
+
+    return decoded
+
+
+def legacy_parse_session_list(content: bytes) -> Dict[int, SessionInformation]:
+    """
+    The original `RPCSessions.list_sessions`, each session is decoded before its record is created.
+    """
+    sessions = {}
+    for key, value in msgpack.loads(content, strict_map_key=False).items():
+        decoded = legacy_decode(value)
+        sessions[key] = SessionInformation(*(decoded.get(name) for name in SESSION_INFORMATION_FIELDS))
+
+    return sessions
+
+
+def parse_session_list(content: bytes) -> Dict[int, SessionInformation]:
+    """
+    The current `RPCSessions.list_sessions`, the response is unpacked without decoding.
+    """
+    return {
+        key: RPCSessions._parse_session_information(value)
+        for key, value in msgpack.loads(content, strict_map_key=False).items()
+    }
+
+
+def module_options_payload(count: int = 150) -> bytes:
+    return msgpack.dumps(
+        {
+            f"OPTION_{i}".encode(): {
+                b"type": b"string",
+                b"required": False,
+                b"advanced": True,
+                b"evasion": False,
+                b"desc": b"Some quite long description of the option that is there to have a realistic size",
+                b"default": str(i).encode(),
+                b"enums": [b"first", b"second", b"third"],
+            }
+            for i in range(count)
+        }
+    )
+
+
+def session_list_payload(count: int = 1000) -> bytes:
+    return msgpack.dumps(
+        {
+            i: {
+                b"type": b"meterpreter",
+                b"tunnel_local": b"192.168.0.222:4444",
+                b"tunnel_peer": f"192.168.0.{i % 255}:{40000 + i}".encode(),
+                b"via_exploit": b"exploit/multi/handler",
+                b"via_payload": b"payload/python/meterpreter/reverse_tcp",
+                b"desc": b"Meterpreter",
+                b"info": b"root @ target",
+                b"workspace": b"default",
+                b"session_host": f"192.168.0.{i % 255}".encode(),
+                b"session_port": 40000 + i,
+                b"target_host": "",
+                b"username": b"unknown",
+                b"uuid": f"{i:08}".encode(),
+                b"exploit_uuid": b"ffpazxus",
+                b"routes": "",
+                b"arch": b"python",
+                b"platform": b"linux",
+            }
+            for i in range(count)
+        }
+    )
+
+
+def compare(
+    name: str, content: bytes, legacy: Callable[[bytes], Any], current: Callable[[bytes], Any], number: int = 50
+) -> None:
+    legacy_time = timeit.timeit(lambda: legacy(content), number=number)
+    current_time = timeit.timeit(lambda: current(content), number=number)
+    print(
+        f"{name:<20} {len(content) / 1024:>8.1f} KiB   legacy {legacy_time / number * 1000:>7.2f} ms   "
+        f"current {current_time / number * 1000:>7.2f} ms   speedup {legacy_time / current_time:>5.2f}x"
+    )
+
+
+def legacy_unpack(content: bytes) -> Union[dict, list, str, int]:
+    return legacy_decode(msgpack.loads(content, strict_map_key=False))
+
+
+if __name__ == "__main__":
+    compare("module.options", module_options_payload(), legacy_unpack, DECODE.loads)
+    compare("session.list", session_list_payload(), legacy_parse_session_list, parse_session_list)
@@ -0,0 +1,878 @@
+"""
+Offline stand-in for msfrpcd, that speaks msgpack over HTTP like the real server.
+It implements the auth, core, health, session, console, module, job, and db endpoints with responses shaped (and sized)
+like the real ones, so the client can be measured without a running Metasploit instance.
+Run with `poetry run python tests/benchmark/msfrpcd.py --port 55553` and connect using `ssl=False`.
+"""
+
+import argparse
+import random
+import re
+import secrets
+import shlex
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import msgpack
+
+RANKS = [b"manual", b"low", b"average", b"normal", b"good", b"great", b"excellent"]
+WORDS = [
+    "windows",
+    "linux",
+    "unix",
+    "multi",
+    "smb",
+    "http",
+    "apache",
+    "tomcat",
+    "struts",
+    "eternalblue",
+    "scanner",
+    "login",
+    "ftp",
+    "ssh",
+    "mysql",
+    "wordpress",
+    "plugin",
+    "upload",
+    "overflow",
+    "injection",
+    "deserialization",
+    "gather",
+    "manage",
+    "enum",
+]
+MODULE_TYPE_SHARES = {
+    "exploit": 0.4,
+    "auxiliary": 0.22,
+    "post": 0.08,
+    "payload": 0.26,
+    "encoder": 0.02,
+    "nop": 0.01,
+    "evasion": 0.01,
+}
+MODULE_LIST_ENDPOINTS = {
+    "module.exploits": "exploit",
+    "module.auxiliary": "auxiliary",
+    "module.post": "post",
+    "module.payloads": "payload",
+    "module.encoders": "encoder",
+    "module.nops": "nop",
+    "module.evasion": "evasion",
+}
+SUCCESS = {b"result": b"success"}
+
+
+def error(message: str, code: int = 500, error_class: str = "Msf::RPC::Exception") -> dict:
+    """
+    Create an error response the same way msfrpcd does.
+    """
+    return {
+        "error": True,
+        "error_class": error_class,
+        "error_string": error_class,
+        "error_backtrace": ["lib/msf/core/rpc/v10/rpc_base.rb:26:in `error'"],
+        "error_message": message.encode(),
+        "error_code": code,
+    }
+
+
+class _Output:
+    def __init__(self):
+        """
+        Output of a session or a console. Each chunk becomes readable at its own time.
+        """
+        self._lock = threading.Lock()
+        self._chunks: List[Tuple[float, bytes]] = []
+
+    def add(self, data: bytes, delay: float) -> None:
+        with self._lock:
+            self._chunks.append((time.time() + delay, data))
+
+    def read(self) -> bytes:
+        now = time.time()
+        with self._lock:
+            ready = [data for ready_at, data in self._chunks if ready_at <= now]
+            self._chunks = [(ready_at, data) for ready_at, data in self._chunks if ready_at > now]
+
+        return b"".join(ready)
+
+    def pending(self) -> bool:
+        with self._lock:
+            return bool(self._chunks)
+
+
+class MsfRpcd:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        username: str = "msf",
+        password: str = "root",
+        latency: float = 0,
+        latencies: Dict[str, float] = None,
+        output_delay: float = 0.01,
+        output_lines: int = 20,
+        sessions: int = 200,
+        modules: int = 5000,
+        hosts: int = 500,
+        module_duration: float = 0,
+        seed: int = 0,
+    ):
+        """
+        Offline stand-in for msfrpcd.
+        :param host: Host to listen on
+        :param port: Port to listen on (0 picks a free one, see `port`)
+        :param username: Username accepted by `auth.login`
+        :param password: Password accepted by `auth.login`
+        :param latency: Delay added to each call in seconds
+        :param latencies: Endpoints and delays overriding `latency`
+        :param output_delay: Time it takes a command in a session or a console to produce its output
+        :param output_lines: Number of lines a command produces
+        :param sessions: Number of open sessions (shell and meterpreter)
+        :param modules: Number of modules
+        :param hosts: Number of hosts (with services and vulnerabilities) in the database
+        :param module_duration: Time it takes a module execution to finish
+        :param seed: Seed used to generate the data
+        """
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.output_delay = output_delay
+        self.output_lines = output_lines
+        self.module_duration = module_duration
+
+        self.calls: Dict[str, int] = {}
+        self._calls_lock = threading.Lock()
+        self._tokens = set()
+        self._generator = random.Random(seed)
+
+        self._sessions = {session_id: self._create_session(session_id) for session_id in range(1, sessions + 1)}
+        self._session_output = {session_id: _Output() for session_id in self._sessions}
+        self._exit_codes = {session_id: 0 for session_id in self._sessions}
+        self._consoles: Dict[str, _Output] = {}
+        self._console_counter = 0
+        self._modules = self._create_modules(modules)
+        self._jobs: Dict[int, dict] = {}
+        self._job_counter = 0
+        self._results: Dict[bytes, dict] = {}
+        self._finish_times: Dict[bytes, float] = {}
+        self._globals: Dict[str, bytes] = {}
+        self._database = self._create_database(hosts)
+
+        self._handlers: Dict[str, Callable[[list], Any]] = {
+            "auth.login": self._login,
+            "auth.logout": self._logout,
+            "auth.token_add": self._token_add,
+            "auth.token_remove": self._token_remove,
+            "auth.token_list": lambda arguments: {b"tokens": [token.encode() for token in self._tokens]},
+            "auth.token_generate": self._token_generate,
+            "health.check": lambda arguments: {"status": b"UP"},
+            "core.version": lambda arguments: {b"version": "6.3.31-dev", b"ruby": b"3.0.5", b"api": b"1.0"},
+            "core.module_stats": self._module_stats,
+            "core.reload_modules": self._module_stats,
+            "core.add_module_path": self._module_stats,
+            "core.getg": self._global_get,
+            "core.setg": self._global_set,
+            "core.unsetg": self._global_unset,
+            "core.save": lambda arguments: SUCCESS,
+            "core.thread_list": self._thread_list,
+            "core.thread_kill": lambda arguments: SUCCESS,
+            "session.list": lambda arguments: self._sessions,
+            "session.stop": self._session_stop,
+            "session.shell_read": self._shell_read,
+            "session.shell_write": self._shell_write,
+            "session.shell_upgrade": lambda arguments: SUCCESS,
+            "session.meterpreter_read": self._meterpreter_read,
+            "session.meterpreter_write": self._meterpreter_write,
+            "session.meterpreter_run_single": self._meterpreter_write,
+            "session.meterpreter_script": lambda arguments: SUCCESS,
+            "session.meterpreter_session_detach": lambda arguments: SUCCESS,
+            "session.meterpreter_session_kill": lambda arguments: SUCCESS,
+            "session.meterpreter_tabs": lambda arguments: {b"tabs": [b"bg", b"bgrun", b"bgkill", b"bglist"]},
+            "session.meterpreter_transport_change": lambda arguments: SUCCESS,
+            "session.meterpreter_directory_separator": lambda arguments: {b"separator": b"/"},
+            "session.compatible_modules": lambda arguments: {b"modules": [b"post/multi/recon/local_exploit_suggester"]},
+            "session.ring_read": self._ring_read,
+            "session.ring_put": self._shell_write,
+            "session.ring_last": lambda arguments: {b"seq": 0},
+            "session.ring_clear": self._ring_clear,
+            "console.create": self._console_create,
+            "console.destroy": self._console_destroy,
+            "console.list": self._console_list,
+            "console.read": self._console_read,
+            "console.write": self._console_write,
+            "console.tabs": self._console_tabs,
+            "console.session_kill": self._console_action,
+            "console.session_detach": self._console_action,
+            "module.search": self._module_search,
+            "module.info": self._module_info,
+            "module.options": self._module_options,
+            "module.compatible_payloads": self._compatible_payloads,
+            "module.compatible_evasion_payloads": self._compatible_payloads,
+            "module.target_compatible_payloads": self._compatible_payloads,
+            "module.target_compatible_evasion_payloads": self._compatible_payloads,
+            "module.compatible_sessions": lambda arguments: {b"sessions": list(self._sessions)[:10]},
+            "module.running_stats": self._running_stats,
+            "module.execute": self._module_execute,
+            "module.check": self._module_execute,
+            "module.results": self._module_results,
+            "module.executable_formats": lambda arguments: [b"asp", b"aspx", b"elf", b"exe", b"psh", b"war"],
+            "module.transform_formats": lambda arguments: [b"base32", b"base64", b"bash", b"c", b"python"],
+            "module.encryption_formats": lambda arguments: [b"xor", b"aes256", b"rc4", b"base64"],
+            "module.platforms": lambda arguments: ["aix", "android", "linux", "osx", "unix", "windows"],
+            "module.architectures": lambda arguments: [b"aarch64", b"armle", b"x64", b"x86"],
+            "module.encode_formats": lambda arguments: [b"base32", b"base64", b"c", b"raw"],
+            "module.encode": lambda arguments: {b"encoded": b'unsigned char buf[] = \n"\\xd9\\xcd\\xd9\\x74";\n'},
+            "job.list": lambda arguments: {str(job_id): job["name"] for job_id, job in self._jobs.items()},
+            "job.info": self._job_info,
+            "job.stop": self._job_stop,
+            "db.status": lambda arguments: {b"driver": b"postgresql", b"db": b"msf"},
+            "db.driver": lambda arguments: {b"driver": b"postgresql"},
+            "db.workspaces": lambda arguments: {b"workspaces": [self._database["workspace"]]},
+            "db.current_workspace": lambda arguments: {b"workspace": b"default", b"workspace_id": 1},
+            "db.get_workspace": lambda arguments: {b"workspace": [self._database["workspace"]]},
+            "db.hosts": lambda arguments: {b"hosts": self._database["hosts"]},
+            "db.services": lambda arguments: {b"services": self._database["services"]},
+            "db.vulns": lambda arguments: {b"vulns": self._database["vulns"]},
+            "db.creds": lambda arguments: {b"creds": self._database["creds"]},
+            "db.notes": lambda arguments: {b"notes": []},
+            "db.loots": lambda arguments: {b"loots": []},
+            "db.events": lambda arguments: {b"events": []},
+            "db.clients": lambda arguments: {b"clients": []},
+        }
+        for endpoint, module_type in MODULE_LIST_ENDPOINTS.items():
+            self._handlers[endpoint] = lambda arguments, listed_type=module_type: self._list_modules(listed_type)
+
+        self._server = ThreadingHTTPServer((host, port), self._create_handler_class(), bind_and_activate=False)
+        self._server.daemon_threads = True
+        self._server.request_queue_size = 128  # Many clients connect at once when the pools are being filled
+        self._server.server_bind()
+        self._server.server_activate()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "MsfRpcd":
+        """
+        Serve in a background thread.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        Serve in the current thread.
+        """
+        self._server.serve_forever()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MsfRpcd":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    def _create_handler_class(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately, so Nagle's algorithm would delay each response
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                response = server.handle(msgpack.loads(body, strict_map_key=False))
+                content = msgpack.dumps(response)
+                # Like msfrpcd, the errors are sent with their code as the status
+                is_error = isinstance(response, dict) and response.get("error") is True
+                self.send_response(response["error_code"] if is_error else 200)
+                self.send_header("Content-Type", "binary/message-pack")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+    def handle(self, request: list) -> Any:
+        """
+        Process a single call.
+        :param request: Endpoint name followed by its arguments
+        :return: Response
+        """
+        endpoint, arguments = request[0], request[1:]
+        with self._calls_lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+        delay = self.latencies.get(endpoint, self.latency)
+        if delay:
+            time.sleep(delay)
+
+        handler = self._handlers.get(endpoint)
+        if handler is None:
+            return error(f"Unknown API Call: '{endpoint}'", 404)
+
+        if endpoint not in ("auth.login", "health.check"):
+            if not arguments or arguments[0] not in self._tokens:
+                return error("Invalid Authentication Token", 401)
+            arguments = arguments[1:]
+
+        if endpoint.startswith("console.") and arguments:
+            arguments[0] = str(arguments[0])  # msfrpcd converts console IDs using `to_s`
+
+        try:
+            return handler(arguments)
+        except (IndexError, KeyError, TypeError, ValueError) as ex:
+            return error(f"Invalid arguments: {ex!r}")
+
+    # Data
+
+    def _create_session(self, session_id: int) -> dict:
+        session_type = b"shell" if session_id % 2 else b"meterpreter"
+        address = f"10.0.{session_id // 250}.{session_id % 250}".encode()
+
+        return {
+            b"type": session_type,
+            b"tunnel_local": b"192.168.0.222:4444",
+            b"tunnel_peer": address + f":{40000 + session_id}".encode(),
+            b"via_exploit": b"exploit/multi/handler",
+            b"via_payload": b"payload/python/" + (b"shell" if session_type == b"shell" else b"meterpreter/reverse_tcp"),
+            b"desc": b"Command shell" if session_type == b"shell" else b"Meterpreter",
+            b"info": b"" if session_type == b"shell" else b"root @ target",
+            b"workspace": b"default",
+            b"session_host": address,
+            b"session_port": 40000 + session_id,
+            b"target_host": "",
+            b"username": b"unknown",
+            b"uuid": secrets.token_hex(4).encode(),
+            b"exploit_uuid": secrets.token_hex(4).encode(),
+            b"routes": "",
+            b"arch": b"python",
+            b"platform": b"linux",
+        }
+
+    def _create_modules(self, count: int) -> List[dict]:
+        modules = []
+        for module_type, share in MODULE_TYPE_SHARES.items():
+            for i in range(max(int(count * share), 1)):
+                path = "/".join(self._generator.choices(WORDS, k=3))
+                modules.append(
+                    {
+                        b"type": module_type,
+                        b"name": " ".join(self._generator.choices(WORDS, k=6)).title(),
+                        b"fullname": f"{module_type}/{path}_{i}",
+                        b"rank": self._generator.choice(RANKS),
+                        b"disclosuredate": self._generator.choice([b"", b"2012-04-01", b"2017-03-14", b"2021-12-10"]),
+                    }
+                )
+
+        return modules
+
+    def _create_database(self, count: int) -> dict:
+        hosts, services, vulns, creds = [], [], [], []
+        for i in range(count):
+            address = f"10.1.{i // 250}.{i % 250}".encode()
+            hosts.append(
+                {
+                    b"created_at": 1700170400 + i,
+                    b"address": address,
+                    b"mac": b"",
+                    b"name": f"host-{i}".encode(),
+                    b"state": b"alive",
+                    b"os_name": b"Linux",
+                    b"os_flavor": b"",
+                    b"os_sp": b"",
+                    b"os_lang": b"",
+                    b"updated_at": 1700170400 + i,
+                    b"purpose": b"server",
+                    b"info": b"",
+                }
+            )
+            for port, name in ((22, b"ssh"), (80, b"http"), (443, b"https")):
+                services.append(
+                    {
+                        b"host": address,
+                        b"created_at": 1700170400 + i,
+                        b"updated_at": 1700170400 + i,
+                        b"port": port,
+                        b"proto": b"tcp",
+                        b"state": b"open",
+                        b"name": name,
+                        b"info": b"OpenSSH 8.9p1 Ubuntu 3ubuntu0.4" if port == 22 else b"Apache httpd 2.4.52",
+                    }
+                )
+            vulns.append(
+                {
+                    b"port": 80,
+                    b"proto": b"tcp",
+                    b"time": 1700170400 + i,
+                    b"host": address,
+                    b"name": b"Apache HTTP Server Path Traversal",
+                    b"refs": b"CVE-2021-41773,URL-https://httpd.apache.org/security/vulnerabilities_24.html",
+                }
+            )
+            creds.append(
+                {
+                    b"host": address,
+                    b"time": 1700170400 + i,
+                    b"port": 22,
+                    b"proto": b"tcp",
+                    b"sname": b"ssh",
+                    b"type": b"password",
+                    b"user": b"root",
+                    b"pass": b"toor",
+                    b"updated_at": 1700170400 + i,
+                }
+            )
+
+        workspace = {b"id": 1, b"name": b"default", b"created_at": 1700170400, b"updated_at": 1700170400}
+
+        return {"hosts": hosts, "services": services, "vulns": vulns, "creds": creds, "workspace": workspace}
+
+    def _command_output(self, command: str) -> bytes:
+        """
+        Create output of a generic command.
+        """
+        return "".join(
+            f"{command.strip()}: {self.output_lines - line} lines of output left, {'-' * 24}\n"
+            for line in range(self.output_lines)
+        ).encode()
+
+    def _run_in_shell(
+        self, session_id: int, data: str, errors: Optional[List[str]] = None
+    ) -> List[Tuple[float, bytes]]:
+        """
+        Emulate a shell, commands are separated by newlines or semicolons. `sleep N` delays the following output,
+        `fail` writes to the error output, and `read` waits for input forever (the following commands never run).
+        :param errors: Collects the error output, it's a part of the output if None
+        :return: Output chunks and their delays
+        """
+        output = []
+        delay = 0.0
+        for command in re.split(r"[;\n]", data):
+            command = command.strip()
+            if not command:
+                continue
+            if command.startswith("echo"):
+                text = " ".join(shlex.split(command[4:].replace("$?", str(self._exit_codes[session_id]))))
+                output.append((delay, f"{text}\n".encode()))
+                self._exit_codes[session_id] = 0
+            elif command == "false":
+                self._exit_codes[session_id] = 1
+            elif command.startswith("fail"):
+                message = f"{command}: failed\n"
+                if errors is None:
+                    output.append((delay, message.encode()))
+                else:
+                    errors.append(message)
+                self._exit_codes[session_id] = 1
+            elif command == "read":
+                break
+            elif command.startswith("sleep "):
+                delay += float(command[6:])
+                self._exit_codes[session_id] = 0
+            else:
+                output.append((delay, self._command_output(command)))
+                self._exit_codes[session_id] = 0
+
+        return output
+
+    # Auth
+
+    def _login(self, arguments: list) -> dict:
+        if arguments[:2] != [self.username, self.password]:
+            return error("Login Failed", 401, "Msf::RPC::Exception")
+
+        token = f"TEMP{secrets.token_hex(14)}"
+        self._tokens.add(token)
+
+        return {b"result": b"success", b"token": token.encode()}
+
+    def _logout(self, arguments: list) -> dict:
+        self._tokens.discard(arguments[0])
+
+        return SUCCESS
+
+    def _token_add(self, arguments: list) -> dict:
+        self._tokens.add(arguments[0])
+
+        return SUCCESS
+
+    def _token_remove(self, arguments: list) -> dict:
+        self._tokens.discard(arguments[0])
+
+        return SUCCESS
+
+    def _token_generate(self, arguments: list) -> dict:
+        token = f"TEMP{secrets.token_hex(14)}"
+        self._tokens.add(token)
+
+        return {b"result": b"success", b"token": token.encode()}
+
+    # Core
+
+    def _module_stats(self, arguments: list) -> dict:
+        counts = {module_type: 0 for module_type in MODULE_TYPE_SHARES}
+        for module in self._modules:
+            counts[module[b"type"]] += 1
+
+        return {
+            b"exploits": counts["exploit"],
+            b"auxiliary": counts["auxiliary"],
+            b"post": counts["post"],
+            b"encoders": counts["encoder"],
+            b"nops": counts["nop"],
+            b"payloads": counts["payload"],
+            b"evasions": counts["evasion"],
+        }
+
+    def _global_get(self, arguments: list) -> dict:
+        return {arguments[0].encode(): self._globals.get(arguments[0], "")}
+
+    def _global_set(self, arguments: list) -> dict:
+        self._globals[arguments[0]] = str(arguments[1]).encode()
+
+        return SUCCESS
+
+    def _global_unset(self, arguments: list) -> dict:
+        self._globals.pop(arguments[0], None)
+
+        return SUCCESS
+
+    @staticmethod
+    def _thread_list(arguments: list) -> dict:
+        return {
+            0: {
+                "status": b"sleep",
+                "critical": True,
+                "name": "MetasploitRPCServer",
+                "started": "2023-11-13 08:47:35 +0000",
+            }
+        }
+
+    # Sessions
+
+    def _session_stop(self, arguments: list) -> dict:
+        if self._sessions.pop(arguments[0], None) is None:
+            return error("Unknown Session ID", 500)
+
+        return SUCCESS
+
+    def _shell_read(self, arguments: list) -> dict:
+        data = self._session_output[arguments[0]].read()
+
+        return {b"seq": 0, b"data": data if data else ""}
+
+    def _shell_write(self, arguments: list) -> dict:
+        session_id, data = arguments
+        for delay, chunk in self._run_in_shell(session_id, data):
+            self._session_output[session_id].add(chunk, self.output_delay + delay)
+
+        return {b"write_count": str(len(data))}
+
+    def _meterpreter_read(self, arguments: list) -> dict:
+        return {b"data": self._session_output[arguments[0]].read()}
+
+    def _meterpreter_write(self, arguments: list) -> dict:
+        session_id, data = arguments
+        output = self._session_output[session_id]
+        if data.startswith("execute -f "):
+            output.add(f"Process {4000 + session_id} created.\nChannel 1 created.\n".encode(), 0)
+            for delay, chunk in self._execute_process(session_id, data):
+                output.add(chunk, self.output_delay + delay)
+        elif data.strip() == "getuid":
+            output.add(b"Server username: root\n", self.output_delay)
+        else:
+            output.add(self._command_output(data), self.output_delay)
+
+        return SUCCESS
+
+    def _execute_process(self, session_id: int, data: str) -> List[Tuple[float, bytes]]:
+        """
+        Emulate `execute -f <executable> -c -i -a <arguments>`, including the shell wrapper used by the client.
+        """
+        words = shlex.split(data)
+        executable = words[words.index("-f") + 1]
+        arguments = words[words.index("-a") + 1] if "-a" in words else ""
+        if executable != "/bin/sh" or not arguments.startswith("-c "):
+            return self._run_in_shell(session_id, f"{executable} {arguments}")
+
+        script = shlex.split(arguments[3:])[0]
+        wrapper = re.match(
+            r"\{ e=\$\( \( (.*) \) 2>&1 1>&3; s=\$\?; echo \.; exit \$s \); s=\$\?; \} 3>&1; (.*)", script, re.DOTALL
+        )
+        if wrapper is None:
+            return self._run_in_shell(session_id, script)
+
+        errors: List[str] = []
+        output = self._run_in_shell(session_id, wrapper.group(1), errors)
+        delay = output[-1][0] if output else 0
+        exit_code = str(self._exit_codes[session_id])
+        for command in wrapper.group(2).split(";"):
+            command = command.strip().replace("$s", exit_code)
+            if command.startswith("printf"):
+                output.append((delay, "".join(errors).encode()))
+            else:
+                output.append((delay, f"{' '.join(shlex.split(command[4:]))}\n".encode()))
+
+        return output
+
+    def _ring_read(self, arguments: list) -> dict:
+        data = self._session_output[arguments[0]].read()
+
+        return {b"seq": 0, b"data": data if data else ""}
+
+    def _ring_clear(self, arguments: list) -> dict:
+        self._session_output[arguments[0]].read()
+
+        return SUCCESS
+
+    # Consoles
+
+    # Like msfrpcd, console IDs are converted to strings
+
+    def _console_create(self, arguments: list) -> dict:
+        self._console_counter += 1
+        console_id = str(self._console_counter)
+        self._consoles[console_id] = _Output()
+        self._consoles[console_id].add(b"\n      =[ metasploit v6.3.31-dev ]\n\n", 0)
+
+        return {b"id": console_id, b"prompt": b"", b"busy": False}
+
+    def _console_destroy(self, arguments: list) -> dict:
+        if self._consoles.pop(str(arguments[0]), None) is None:
+            return {b"result": b"failure"}
+
+        return SUCCESS
+
+    def _console_list(self, arguments: list) -> dict:
+        return {b"consoles": [{b"id": key, b"prompt": b"msf6 > ", b"busy": False} for key in self._consoles]}
+
+    def _console_read(self, arguments: list) -> dict:
+        console = self._consoles.get(str(arguments[0]))
+        if console is None:
+            return {b"result": b"failure"}
+
+        return {b"data": console.read(), b"prompt": b"msf6 > ", b"busy": console.pending()}
+
+    def _console_write(self, arguments: list) -> dict:
+        console_id, data = arguments
+        console = self._consoles.get(str(console_id))
+        if console is None:
+            return {b"result": b"failure"}
+
+        for position, line in enumerate(line.strip() for line in data.splitlines()):
+            if not line:
+                continue
+            if line.startswith("echo "):
+                output = f"[*] exec: {line}\n\n{' '.join(shlex.split(line[5:]))}\n".encode()
+            else:
+                output = self._command_output(line)
+            console.add(output, self.output_delay * (position + 1))
+
+        return {b"wrote": len(data)}
+
+    def _console_tabs(self, arguments: list) -> dict:
+        if str(arguments[0]) not in self._consoles:
+            return {b"result": b"failure"}
+
+        prefix = arguments[1].rpartition(" ")[2]
+        matches = [module[b"fullname"] for module in self._modules if module[b"fullname"].startswith(prefix)]
+
+        return {b"tabs": [f"use {name}".encode() for name in matches[:50]]}
+
+    def _console_action(self, arguments: list) -> dict:
+        if str(arguments[0]) not in self._consoles:
+            return {b"result": b"failure"}
+
+        return SUCCESS
+
+    # Modules
+
+    def _list_modules(self, module_type: str) -> dict:
+        prefix_length = len(module_type) + 1
+
+        return {
+            b"modules": [
+                module[b"fullname"][prefix_length:] for module in self._modules if module[b"type"] == module_type
+            ]
+        }
+
+    def _module_search(self, arguments: list) -> List[dict]:
+        query = arguments[0]
+        module_type = None
+        keyword = re.search(r"type:(\w+)", query)
+        if keyword:
+            module_type = keyword.group(1)
+            query = query.replace(keyword.group(0), "")
+        query = query.strip().lower()
+
+        return [
+            module
+            for module in self._modules
+            if (module_type is None or module[b"type"] == module_type)
+            and (query in module[b"fullname"].lower() or query in module[b"name"].lower())
+        ]
+
+    def _find_module(self, module_type: str, module_name: str) -> Optional[dict]:
+        fullname = f"{module_type}/{module_name}"
+        for module in self._modules:
+            if module[b"fullname"] == fullname:
+                return module
+
+        return None
+
+    @staticmethod
+    def _options(count: int = 40) -> dict:
+        options = {
+            f"OPTION_{i}".encode(): {
+                b"type": b"string",
+                b"required": i % 3 == 0,
+                b"advanced": i % 2 == 0,
+                b"evasion": False,
+                b"desc": b"Some quite long description of the option that is there to have a realistic size",
+                b"default": str(i).encode(),
+                b"enums": [b"first", b"second", b"third"] if i % 5 == 0 else [],
+            }
+            for i in range(count)
+        }
+        options[b"RHOSTS"] = {b"type": b"rhosts", b"required": True, b"advanced": False, b"desc": b"Target address"}
+
+        return options
+
+    def _module_info(self, arguments: list) -> dict:
+        module = self._find_module(*arguments[:2])
+        if module is None:
+            return error("Invalid Module", 500)
+
+        return {
+            b"type": module[b"type"].encode(),
+            b"name": module[b"name"].encode(),
+            b"fullname": module[b"fullname"].encode(),
+            b"rank": module[b"rank"],
+            b"disclosuredate": module[b"disclosuredate"],
+            b"description": b"A longer description of the module. " * 10,
+            b"license": b"Metasploit Framework License (BSD)",
+            b"filepath": f"/usr/src/metasploit-framework/modules/{module[b'fullname']}.rb".encode(),
+            b"arch": [b"x86", b"x64"],
+            b"platform": [b"Msf::Module::Platform::Linux"],
+            b"authors": [b"author one", b"author two"],
+            b"privileged": False,
+            b"check": True,
+            b"references": [[b"CVE", b"2021-41773"], [b"URL", b"https://httpd.apache.org/"]],
+            b"targets": {0: b"Automatic"},
+            b"default_target": 0,
+            b"stance": b"aggressive",
+            b"options": self._options(),
+        }
+
+    def _module_options(self, arguments: list) -> dict:
+        if self._find_module(*arguments[:2]) is None:
+            return error("Invalid Module", 500)
+
+        return self._options()
+
+    def _compatible_payloads(self, arguments: list) -> dict:
+        return {
+            b"payloads": [
+                module[b"fullname"][len("payload/") :] for module in self._modules if module[b"type"] == "payload"
+            ][:200]
+        }
+
+    def _module_result(self, uuid: bytes) -> Optional[dict]:
+        if time.time() < self._finish_times.get(uuid, 0):
+            return {b"status": b"running"}
+
+        return self._results.get(uuid)
+
+    def _running_stats(self, arguments: list) -> dict:
+        running, finished = [], []
+        for uuid in list(self._results):
+            (running if self._module_result(uuid)[b"status"] == b"running" else finished).append(uuid)
+
+        return {b"waiting": [], b"running": running, b"results": finished}
+
+    def _module_execute(self, arguments: list) -> dict:
+        module_type, module_name = arguments[:2]
+        self._job_counter += 1
+        job_id = self._job_counter
+        uuid = secrets.token_urlsafe(18)[:24].encode()
+        self._jobs[job_id] = {
+            "name": f"{module_type.capitalize()}: {module_name}".encode(),
+            "datastore": arguments[2] if len(arguments) > 2 else {},
+            "start_time": int(time.time()),
+        }
+        self._results[uuid] = {b"status": b"completed", b"result": {"10.0.0.1": None}}
+        self._finish_times[uuid] = time.time() + self.module_duration
+
+        return {b"job_id": job_id, b"uuid": uuid}
+
+    def _module_results(self, arguments: list) -> dict:
+        result = self._module_result(arguments[0].encode() if isinstance(arguments[0], str) else arguments[0])
+        if result is None:
+            return error(f"Results not found for module instance {arguments[0]}", 404)
+
+        return result
+
+    # Jobs
+
+    def _job_info(self, arguments: list) -> dict:
+        job = self._jobs.get(arguments[0])
+        if job is None:
+            return error("Invalid Job", 500)
+
+        return {
+            "jid": arguments[0],
+            "name": job["name"],
+            "start_time": job["start_time"],
+            "datastore": job["datastore"],
+        }
+
+    def _job_stop(self, arguments: list) -> dict:
+        if self._jobs.pop(arguments[0], None) is None:
+            return error("Invalid Job", 500)
+
+        return SUCCESS
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline stand-in for msfrpcd (plain HTTP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=55553)
+    parser.add_argument("--username", default="msf")
+    parser.add_argument("--password", default="root")
+    parser.add_argument("--latency", type=float, default=0, help="delay added to each call in seconds")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--modules", type=int, default=5000)
+    parser.add_argument("--hosts", type=int, default=500)
+    parsed = parser.parse_args()
+
+    stand_in = MsfRpcd(
+        parsed.host,
+        parsed.port,
+        parsed.username,
+        parsed.password,
+        parsed.latency,
+        sessions=parsed.sessions,
+        modules=parsed.modules,
+        hosts=parsed.hosts,
+    )
+    print(f"Listening on http://{parsed.host}:{stand_in.port}/api/")
+    try:
+        stand_in.serve_forever()
+    except KeyboardInterrupt:
+        stand_in.stop()
@@ -0,0 +1,83 @@
+"""
+Measure queries answered by the in-memory module search index (`ModuleSearchIndex`).
+Run with `poetry run python tests/benchmark/search.py`.
+"""
+
+import os
+import random
+import sys
+import timeit
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from snek_sploit.lib.rpc.modules import ModuleShortInfo, ModuleSearchIndex  # noqa: E402
+from snek_sploit.util.enums import ModuleRank, SearchMode  # noqa: E402
+
+WORDS = [
+    "windows",
+    "linux",
+    "unix",
+    "multi",
+    "smb",
+    "http",
+    "apache",
+    "tomcat",
+    "eternalblue",
+    "ms17",
+    "scanner",
+    "login",
+    "ftp",
+    "ssh",
+    "wordpress",
+    "plugin",
+    "upload",
+    "overflow",
+    "injection",
+    "deserialization",
+]
+
+
+def modules(count: int = 5000) -> List[ModuleShortInfo]:
+    """
+    Create modules with a realistic amount of text.
+    """
+    generator = random.Random(0)
+    module_types = ["exploit", "auxiliary", "post"]
+    ranks = [rank.value for rank in ModuleRank]
+    dates = ["", "2012-04-01", "2017-03-14", "2021-12-10"]
+
+    return [
+        ModuleShortInfo(
+            module_types[i % 3],
+            " ".join(generator.choices(WORDS, k=6)).title(),
+            f"{module_types[i % 3]}/{'/'.join(generator.choices(WORDS, k=3))}_{i}",
+            generator.choice(ranks),
+            generator.choice(dates),
+        )
+        for i in range(count)
+    ]
+
+
+def measure(name: str, index: ModuleSearchIndex, number: int = 1000, **kwargs) -> None:
+    elapsed = timeit.timeit(lambda: index.search(**kwargs), number=number)
+    print(f"{name:<30} {len(index.search(**kwargs)):>6} matches   {elapsed / number * 1_000_000:>8.1f} us")
+
+
+if __name__ == "__main__":
+    all_modules = modules()
+    build = timeit.timeit(lambda: ModuleSearchIndex(all_modules).search(), number=5)
+    print(f"{'build (5000 modules)':<30} {build / 5 * 1000:>15.1f} ms")
+
+    search_index = ModuleSearchIndex(all_modules)
+    measure("prefix 'eter'", search_index, query="eter", limit=20)
+    measure("token 'eternalblue smb'", search_index, query="eternalblue smb", mode=SearchMode.TOKEN)
+    measure("substring 'rnalbl'", search_index, query="rnalbl", mode=SearchMode.SUBSTRING, limit=20)
+    measure(
+        "prefix + filters",
+        search_index,
+        query="tom",
+        module_type="exploit",
+        minimum_rank=ModuleRank.GREAT,
+        disclosed_after="2017-01-01",
+    )
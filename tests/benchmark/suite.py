@@ -0,0 +1,157 @@
+"""
+End-to-end benchmark of the client against the offline msfrpcd stand-in (`msfrpcd.py`), no Metasploit needed.
+The stand-in runs in a separate process, so the reported CPU time and memory belong to the client only.
+Run with `poetry run python tests/benchmark/suite.py` (see `--help` for the options).
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import tracemalloc
+from statistics import quantiles
+from typing import Callable, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from msfrpcd import MsfRpcd  # noqa: E402
+from snek_sploit import MetasploitClient, ExponentialBackoff, MetricsRegistry  # noqa: E402
+from snek_sploit.util.enums import ModuleType  # noqa: E402
+
+
+def serve(port_queue: multiprocessing.Queue, options: dict) -> None:
+    """
+    Run the stand-in and report its port.
+    """
+    stand_in = MsfRpcd(**options)
+    port_queue.put(stand_in.port)
+    stand_in.serve_forever()
+
+
+def create_benchmarks(client: MetasploitClient) -> Dict[str, Callable[[], object]]:
+    """
+    Create the measured operations.
+    """
+    polling = ExponentialBackoff(initial=0.001, maximum=0.05)
+    shell = client.sessions.get(1)
+    console = client.consoles.create()
+    console.clear_buffer()
+    exploit = client.modules.rpc.list_exploit_modules()[0]
+    index = client.modules.catalog.search_index()
+
+    def db_export():
+        client.db.rpc.hosts({})
+        client.db.rpc.services({})
+        client.db.rpc.vulns({})
+        client.db.rpc.creds("default")
+
+    return {
+        "session list": client.sessions.all,
+        "session polling (execute)": lambda: shell.execute("id", polling=polling),
+        "console execute": lambda: console.execute("version", polling=polling),
+        "module search (server)": lambda: client.modules.rpc.search("smb"),
+        "module search (index)": lambda: index.search("smb", limit=20),
+        "module info": lambda: client.modules.rpc.info(ModuleType.EXPLOIT, exploit),
+        "db export": db_export,
+    }
+
+
+def count_calls(metrics: MetricsRegistry) -> int:
+    """
+    Get the number of calls made so far.
+    """
+    return sum(endpoint["calls"] for endpoint in metrics.as_dict().values())
+
+
+def measure(operation: Callable[[], object], iterations: int, metrics: MetricsRegistry) -> dict:
+    """
+    Run an operation repeatedly and collect its statistics.
+    """
+    operation()  # Warm up (connections, caches)
+
+    durations = []
+    calls_before = count_calls(metrics)
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        operation()
+        durations.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    made_calls = count_calls(metrics) - calls_before
+
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    percentiles = quantiles(durations, n=100, method="inclusive")
+
+    return {
+        "operations_per_second": iterations / wall,
+        "calls_per_second": made_calls / wall,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "cpu_ms_per_operation": cpu / iterations * 1000,
+        "cpu_utilization": cpu / wall,
+        "peak_memory_kib": peak / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the client against the offline msfrpcd stand-in")
+    parser.add_argument("--iterations", type=int, default=50, help="iterations of each operation")
+    parser.add_argument("--latency", type=float, default=0.0005, help="delay added to each call in seconds")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--modules", type=int, default=5000)
+    parser.add_argument("--hosts", type=int, default=500)
+    parser.add_argument("--filter", default="", help="run only the benchmarks containing the text")
+    parser.add_argument("--output", help="store the results in a JSON file")
+    parser.add_argument("--prometheus", action="store_true", help="print the collected per-endpoint metrics")
+    arguments = parser.parse_args()
+
+    port_queue = multiprocessing.Queue()
+    options = {
+        "latency": arguments.latency,
+        "sessions": arguments.sessions,
+        "modules": arguments.modules,
+        "hosts": arguments.hosts,
+    }
+    server = multiprocessing.Process(target=serve, args=(port_queue, options), daemon=True)
+    server.start()
+
+    results = {}
+    metrics = MetricsRegistry()
+    try:
+        port = port_queue.get(timeout=30)
+        with MetasploitClient("msf", "root", port=port, ssl=False, metrics=metrics, session_cache_ttl=0) as client:
+            print(
+                f"{'benchmark':<28} {'ops/s':>9} {'calls/s':>9} {'p50 ms':>9} {'p99 ms':>9} "
+                f"{'cpu ms/op':>10} {'cpu %':>6} {'peak KiB':>10}"
+            )
+            for name, operation in create_benchmarks(client).items():
+                if arguments.filter not in name:
+                    continue
+                result = results[name] = measure(operation, arguments.iterations, metrics)
+                print(
+                    f"{name:<28} {result['operations_per_second']:>9.1f} {result['calls_per_second']:>9.1f} "
+                    f"{result['p50_ms']:>9.2f} {result['p99_ms']:>9.2f} {result['cpu_ms_per_operation']:>10.2f} "
+                    f"{result['cpu_utilization'] * 100:>6.1f} {result['peak_memory_kib']:>10.1f}"
+                )
+    finally:
+        server.terminate()
+
+    if arguments.prometheus:
+        print(metrics.to_prometheus())
+
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,7 @@ def create_connection(target, port=4444):
         so.send(o)
 
 
-if __name__ == '__main__':
+if __name__ == "__main__":
     client = MetasploitClient("msf", "root", disable_https_warnings=True, verbose=True)
     for each in client.modules.rpc.search("payload/python"):
         print(each.fullname)
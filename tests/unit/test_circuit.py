@@ -0,0 +1,85 @@
+import unittest
+
+from snek_sploit.util.circuit import CircuitBreaker
+from snek_sploit.util.enums import CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=self.clock)
+
+    def open(self):
+        for _ in range(self.breaker.failure_threshold):
+            self.breaker.record_failure()
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertIs(self.breaker.before_call(), CircuitState.CLOSED)
+        self.breaker.record_failure()
+        self.assertIs(self.breaker.state, CircuitState.OPEN)
+        self.assertIs(self.breaker.before_call(), CircuitState.OPEN)
+
+    def test_success_resets_the_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertIs(self.breaker.state, CircuitState.CLOSED)
+
+    def test_half_open_after_reset_timeout(self):
+        self.open()
+        self.clock.now += 9.9
+        self.assertIs(self.breaker.before_call(), CircuitState.OPEN)
+        self.clock.now += 0.1
+        self.assertIs(self.breaker.before_call(), CircuitState.HALF_OPEN)
+        # Only a single caller probes the server
+        self.assertIs(self.breaker.before_call(), CircuitState.OPEN)
+        self.assertIs(self.breaker.state, CircuitState.HALF_OPEN)
+
+    def test_closes_after_successful_probe(self):
+        self.open()
+        self.clock.now += 10
+        self.assertIs(self.breaker.before_call(), CircuitState.HALF_OPEN)
+        self.breaker.record_success()
+        self.assertIs(self.breaker.before_call(), CircuitState.CLOSED)
+
+    def test_reopens_after_failed_probe(self):
+        self.open()
+        self.clock.now += 10
+        self.assertIs(self.breaker.before_call(), CircuitState.HALF_OPEN)
+        self.breaker.record_failure()
+        self.assertIs(self.breaker.state, CircuitState.OPEN)
+        # The reset timeout starts again from the failed probe
+        self.clock.now += 9
+        self.assertIs(self.breaker.before_call(), CircuitState.OPEN)
+        self.clock.now += 1
+        self.assertIs(self.breaker.before_call(), CircuitState.HALF_OPEN)
+
+    def test_slow_call_counts_as_failure(self):
+        breaker = CircuitBreaker(failure_threshold=1, slow_call_threshold=2, clock=self.clock)
+        breaker.record_success(1.9)
+        self.assertIs(breaker.state, CircuitState.CLOSED)
+        breaker.record_success(2.1)
+        self.assertIs(breaker.state, CircuitState.OPEN)
+
+    def test_copy(self):
+        self.open()
+        copy = self.breaker.copy()
+        self.assertIs(copy.state, CircuitState.CLOSED)
+        self.assertIs(copy.clock, self.clock)
+        self.assertEqual((copy.failure_threshold, copy.reset_timeout), (3, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from types import SimpleNamespace
+from typing import Dict
+
+from snek_sploit.lib.async_cluster import AsyncMetasploitCluster
+from snek_sploit.lib.cluster import MetasploitCluster
+from snek_sploit.util import exceptions
+
+
+def fake_client(sessions: Dict[int, str] = None, error: Exception = None) -> SimpleNamespace:
+    """
+    Client, whose `sessions.all` returns the sessions or raises the error.
+    """
+
+    def list_sessions() -> Dict[int, str]:
+        if error is not None:
+            raise error
+        return sessions
+
+    return SimpleNamespace(sessions=SimpleNamespace(all=list_sessions))
+
+
+def fake_async_client(sessions: Dict[int, str] = None, error: Exception = None) -> SimpleNamespace:
+    async def list_sessions() -> Dict[int, str]:
+        return fake_client(sessions, error).sessions.all()
+
+    return SimpleNamespace(sessions=SimpleNamespace(all=list_sessions))
+
+
+class TestMetasploitCluster(unittest.TestCase):
+    def test_no_clients(self):
+        self.assertRaises(exceptions.InputError, MetasploitCluster, [])
+
+    def test_merge(self):
+        cluster = MetasploitCluster([fake_client({1: "a", 2: "b"}), fake_client({1: "c"})])
+        self.assertEqual(cluster.sessions.all(), {(0, 1): "a", (0, 2): "b", (1, 1): "c"})
+        self.assertEqual(cluster.last_errors, {})
+
+    def test_merge_leaves_out_failed_servers(self):
+        error = ConnectionError("unreachable")
+        cluster = MetasploitCluster([fake_client({1: "a"}), fake_client(error=error), fake_client({3: "c"})])
+        with self.assertLogs("snek_sploit.lib.cluster", "WARNING"):
+            self.assertEqual(cluster.sessions.all(), {(0, 1): "a", (2, 3): "c"})
+        self.assertEqual(cluster.last_errors, {1: error})
+
+    def test_merge_without_available_servers(self):
+        cluster = MetasploitCluster([fake_client(error=ConnectionError()), fake_client(error=TimeoutError())])
+        self.assertRaises(TimeoutError, cluster.sessions.all)
+        self.assertEqual(len(cluster.last_errors), 2)
+
+
+class TestServerLoad(unittest.TestCase):
+    def setUp(self):
+        self.cluster = MetasploitCluster([fake_client(), fake_client()])
+
+    def test_idle_threads_dont_count(self):
+        self.cluster._update_loads([(0, 12, 0, 0), (0, 30, 0, 0)])
+        self.assertEqual([load.score for load in self.cluster._loads.values()], [0, 0])
+
+        self.cluster._update_loads([(1, 13, 0, 0), (0, 30, 2, 0)])
+        self.assertEqual([(load.threads, load.score) for load in self.cluster._loads.values()], [(1, 2), (0, 2)])
+
+    def test_baseline_is_the_fewest_threads_seen(self):
+        self.cluster._update_loads([(2, 20, 0, 0), (0, 10, 0, 0)])
+        self.cluster._update_loads([(0, 15, 0, 0), (0, 10, 0, 0)])
+        self.cluster._update_loads([(0, 18, 0, 0), (0, 10, 0, 0)])
+        self.assertEqual([load.threads for load in self.cluster._loads.values()], [3, 0])
+
+    def test_reserve_picks_the_least_loaded_server(self):
+        self.cluster._update_loads([(0, 12, 0, 0), (0, 30, 0, 0)])
+        self.cluster._update_loads([(0, 14, 0, 0), (1, 30, 0, 0)])
+        self.assertEqual(self.cluster._reserve("modules"), 1)
+        self.assertEqual(self.cluster._reserve("modules"), 0)
+
+    def test_unavailable_server(self):
+        self.cluster._update_loads([ConnectionError(), (0, 12, 0, 0)])
+        self.assertEqual(list(self.cluster._loads), [1])
+        self.assertRaises(ConnectionError, self.cluster._update_loads, [TimeoutError(), ConnectionError()])
+
+
+class TestAsyncMetasploitCluster(unittest.IsolatedAsyncioTestCase):
+    async def test_merge_leaves_out_failed_servers(self):
+        error = ConnectionError("unreachable")
+        cluster = AsyncMetasploitCluster([fake_async_client(error=error), fake_async_client({1: "a"})])
+        with self.assertLogs("snek_sploit.lib.cluster", "WARNING"):
+            self.assertEqual(await cluster.sessions.all(), {(1, 1): "a"})
+        self.assertEqual(cluster.last_errors, {0: error})
+
+    async def test_merge_without_available_servers(self):
+        cluster = AsyncMetasploitCluster([fake_async_client(error=ConnectionError())])
+        with self.assertRaises(ConnectionError):
+            await cluster.sessions.all()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import re
+import unittest
+from collections import deque
+from typing import List
+
+from snek_sploit.lib.rpc.consoles import Console, ConsoleData
+from snek_sploit.util.polling import FixedDelay
+
+NO_DELAY = FixedDelay(0)
+
+
+class FakeConsole(Console):
+    """
+    Console, that answers the `set` and `echo` commands like msfconsole, one line per read.
+    """
+
+    def __init__(self, stop_at: str = None):
+        super().__init__(None, 1)
+        self.stop_at = stop_at
+        self.written: List[str] = []
+        self.lines = deque()
+
+    def write(self, data: str, add_new_line: bool = True) -> None:
+        self.written.append(data)
+        for command in data.splitlines():
+            if command == self.stop_at:
+                break
+            if command.startswith("set "):
+                _, name, value = command.split(" ", 2)
+                self.lines.append(f"{name.upper()} => {value}\n")
+            elif command.startswith("echo "):
+                self.lines.extend([f"[*] exec: {command}\n", "\n", re.sub(r"'|\s", "", command[5:]) + "\n"])
+
+    def read(self) -> ConsoleData:
+        return ConsoleData(prompt="msf6 > ", busy=bool(self.lines), data=self.lines.popleft() if self.lines else "")
+
+
+class TestExecuteMany(unittest.TestCase):
+    def test_results_and_single_write(self):
+        console = FakeConsole()
+        results = list(console.execute_many(["set LHOST 10.0.0.1", "set LPORT 4444"], polling=NO_DELAY))
+        self.assertEqual(
+            [(result.command, result.output) for result in results],
+            [("set LHOST 10.0.0.1", "LHOST => 10.0.0.1\n"), ("set LPORT 4444", "LPORT => 4444\n")],
+        )
+        self.assertEqual(len(console.written), 1)
+
+    def test_many_commands(self):
+        console = FakeConsole()
+        commands = [f"set OPTION{i} {i}" for i in range(200)]
+        results = list(console.execute_many(commands, polling=NO_DELAY))
+        self.assertEqual([result.output for result in results], [f"OPTION{i} => {i}\n" for i in range(200)])
+
+    def test_command_without_output(self):
+        console = FakeConsole()
+        results = list(console.execute_many(["use exploit/multi/handler", "set LPORT 1"], polling=NO_DELAY))
+        self.assertEqual([result.output for result in results], ["", "LPORT => 1\n"])
+
+    def test_results_are_yielded_before_the_rest_arrives(self):
+        console = FakeConsole()
+        results = console.execute_many(["set A 1", "set B 2"], polling=NO_DELAY)
+        self.assertEqual(next(results).output, "A => 1\n")
+        self.assertTrue(console.lines)
+        self.assertEqual(next(results).output, "B => 2\n")
+
+    def test_unfinished_commands_once_the_time_runs_out(self):
+        console = FakeConsole(stop_at="set B 2")
+        results = list(console.execute_many(["set A 1", "set B 2", "set C 3"], 0.05, polling=FixedDelay(0.01)))
+        self.assertEqual([result.output for result in results], ["A => 1\n", "", ""])
+
+    def test_default_polling_backs_off(self):
+        console = FakeConsole()
+        results = list(console.execute_many(["set A 1", "set B 2"]))
+        self.assertEqual([result.output for result in results], ["A => 1\n", "B => 2\n"])
+        self.assertLess(console.last_polling_statistics.elapsed, 0.5)
+
+    def test_empty_batch(self):
+        console = FakeConsole()
+        self.assertEqual(list(console.execute_many([])), [])
+        self.assertEqual(console.written, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+import unittest
+from typing import Dict, List, Union
+
+import msgpack
+import requests
+
+from snek_sploit.lib.context import Context
+from snek_sploit.util import exceptions
+from snek_sploit.util.circuit import CircuitBreaker
+from snek_sploit.util.enums import CircuitState
+from snek_sploit.util.retry import RetryBudget, RetryPolicy, retry
+
+PRIMARY = "http://primary:55553/api/"
+STANDBY = "http://standby:55553/api/"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeContext(Context):
+    """
+    Context, whose servers are either up (answering every call with its endpoint) or down.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__("", "", "primary", ssl=False, token="token", **kwargs)
+        self.down: Dict[str, bool] = {PRIMARY: False, STANDBY: False}
+        self.requests: List[tuple] = []
+
+    def _post(self, url: str, data: bytes, timeout: Union[float, tuple]) -> bytes:
+        endpoint = msgpack.loads(data)[0]
+        self.requests.append((url, endpoint))
+        if self.down[url]:
+            raise requests.ConnectionError(url)
+        if endpoint == "health.check":
+            return msgpack.dumps({"status": b"UP"})
+
+        return msgpack.dumps({"result": url})
+
+
+def no_delay_policy(**kwargs) -> RetryPolicy:
+    return RetryPolicy(base_delay=0, max_delay=0, jitter=False, **kwargs)
+
+
+class TestFailover(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.context = FakeContext(
+            standby=[("standby", 55553)], circuit_breaker=CircuitBreaker(failure_threshold=2, clock=self.clock)
+        )
+        self.context.retry_policy = RetryPolicy(attempts=1)
+
+    def call(self) -> str:
+        return self.context.call("core.version")["result"]
+
+    def test_calls_go_to_the_primary(self):
+        self.assertEqual(self.call(), PRIMARY)
+
+    def test_failover_to_standby_once_the_circuit_opens(self):
+        self.context.down[PRIMARY] = True
+        for _ in range(2):
+            self.assertRaises(requests.ConnectionError, self.call)
+        self.assertIs(self.context.circuit_breakers[0].state, CircuitState.OPEN)
+
+        self.context.requests.clear()
+        self.assertEqual(self.call(), STANDBY)
+        self.assertEqual(self.context.requests, [(STANDBY, "core.version")])
+
+    def test_back_to_primary_after_successful_probe(self):
+        self.context.down[PRIMARY] = True
+        for _ in range(2):
+            self.assertRaises(requests.ConnectionError, self.call)
+
+        self.context.down[PRIMARY] = False
+        self.clock.now += 5
+        self.context.requests.clear()
+        self.assertEqual(self.call(), PRIMARY)
+        self.assertEqual(self.context.requests, [(PRIMARY, "health.check"), (PRIMARY, "core.version")])
+        self.assertIs(self.context.circuit_breakers[0].state, CircuitState.CLOSED)
+
+    def test_failed_probe_keeps_using_standby(self):
+        self.context.down[PRIMARY] = True
+        for _ in range(2):
+            self.assertRaises(requests.ConnectionError, self.call)
+
+        self.clock.now += 5
+        self.assertEqual(self.call(), STANDBY)
+        self.assertIs(self.context.circuit_breakers[0].state, CircuitState.OPEN)
+        self.context.requests.clear()
+        self.assertEqual(self.call(), STANDBY)
+        self.assertEqual(self.context.requests, [(STANDBY, "core.version")])
+
+    def test_no_server_available(self):
+        self.context.down = {PRIMARY: True, STANDBY: True}
+        for _ in range(4):
+            self.assertRaises(requests.ConnectionError, self.call)
+        self.context.requests.clear()
+        self.assertRaises(exceptions.CircuitOpenError, self.call)
+        self.assertEqual(self.context.requests, [])
+
+
+class TestRetries(unittest.TestCase):
+    def setUp(self):
+        self.context = FakeContext()
+        self.context.down[PRIMARY] = True
+
+    def attempts(self, endpoint: str) -> int:
+        self.context.requests.clear()
+        self.assertRaises(requests.ConnectionError, self.context.call, endpoint)
+        return len(self.context.requests)
+
+    def test_safe_endpoint_is_retried(self):
+        self.context.retry_policy = no_delay_policy(attempts=3)
+        self.assertEqual(self.attempts("core.version"), 3)
+
+    def test_unsafe_endpoints_are_never_retried(self):
+        self.context.retry_policy = no_delay_policy(attempts=5)
+        for endpoint in ("session.shell_write", "module.execute", "console.write", "unknown.endpoint"):
+            self.assertEqual(self.attempts(endpoint), 1, endpoint)
+
+    def test_unsafe_endpoints_arent_retried_on_idempotency_opt_in(self):
+        self.context.retry_policy = no_delay_policy(attempts=5, retry_on=["safe", "idempotent"])
+        self.assertEqual(self.attempts("job.stop"), 5)
+        self.assertEqual(self.attempts("session.shell_write"), 1)
+
+    def test_retry_budget_runs_out(self):
+        self.context.retry_policy = no_delay_policy(attempts=3, budget=RetryBudget(ratio=0.25, reserve=2))
+        # The reserve is spent by the first call, each call deposits a quarter of a token and a retry takes a whole one
+        self.assertEqual(self.attempts("core.version"), 3)
+        for _ in range(3):
+            self.assertEqual(self.attempts("core.version"), 1)
+        self.assertEqual(self.attempts("core.version"), 2)
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_reserve_and_ratio(self):
+        budget = RetryBudget(ratio=0.25, reserve=2)
+        self.assertTrue(budget.withdraw())
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        for _ in range(3):
+            budget.deposit()
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+    def test_deposits_dont_exceed_the_reserve(self):
+        budget = RetryBudget(ratio=1, reserve=1)
+        for _ in range(10):
+            budget.deposit()
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+
+
+class TestRetryDecorator(unittest.TestCase):
+    def test_deprecated(self):
+        with self.assertWarns(DeprecationWarning):
+            retry(lambda: None)
+
+    def test_retries_until_success(self):
+        calls = []
+
+        def flaky():
+            calls.append(None)
+            if len(calls) < 3:
+                raise ConnectionError()
+            return "done"
+
+        with self.assertWarns(DeprecationWarning):
+            wrapped = retry(attempts=3, on_errors=(ConnectionError,), wait_on_error=False)(flaky)
+        self.assertEqual(wrapped(), "done")
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_arent_retried(self):
+        calls = []
+
+        def failing():
+            calls.append(None)
+            raise ValueError()
+
+        with self.assertWarns(DeprecationWarning):
+            wrapped = retry(attempts=3, on_errors=(ConnectionError,), wait_on_error=False)(failing)
+        self.assertRaises(ValueError, wrapped)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,257 @@
+import re
+import unittest
+
+import subprocess
+
+from snek_sploit.util.matching import StreamMatcher, CommandMarkers, CommandDemultiplexer, EchoMarker
+
+
+def feed_all(matcher: StreamMatcher, chunks):
+    """
+    Feed the chunks one by one and return the results of the feeds.
+    """
+    return [matcher.feed(chunk) for chunk in chunks]
+
+
+class TestStreamMatcher(unittest.TestCase):
+    def test_flag_in_single_chunk(self):
+        matcher = StreamMatcher("DONE")
+        self.assertEqual(feed_all(matcher, ["output\n", "more DONE\n"]), [None, "DONE"])
+        self.assertTrue(matcher.matched)
+
+    def test_flag_split_across_chunks(self):
+        matcher = StreamMatcher("END_OF_OUTPUT")
+        self.assertEqual(feed_all(matcher, ["data END_", "OF_OU", "TPUT\n"]), [None, None, "END_OF_OUTPUT"])
+
+    def test_flag_split_into_single_characters(self):
+        matcher = StreamMatcher("flag")
+        self.assertEqual(feed_all(matcher, list("xxflxagfla")), [None] * 10)
+        self.assertEqual(matcher.feed("g"), "flag")
+
+    def test_flag_not_reported_twice_from_the_tail(self):
+        matcher = StreamMatcher(["abc", "bcd"])
+        self.assertEqual(matcher.feed("xabc"), "abc")
+        # The match is sticky, later chunks don't replace it
+        self.assertEqual(matcher.feed("d"), "abc")
+
+    def test_longest_flag_wins_at_the_same_position(self):
+        matcher = StreamMatcher(["sh", "shell>"])
+        self.assertEqual(matcher.feed("prompt shell> "), "shell>")
+
+    def test_any_of_many_flags(self):
+        matcher = StreamMatcher([f"FLAG{i}" for i in range(100)])
+        self.assertIsNone(matcher.feed("FLAG"))
+        self.assertEqual(matcher.feed("42 "), "FLAG42")
+
+    def test_regex(self):
+        matcher = StreamMatcher(re.compile(r"msf\d \w+\(.+\) > "))
+        self.assertIsNone(matcher.feed("[*] Started\nmsf6 exploit(multi/"))
+        self.assertEqual(matcher.feed("handler) > "), "msf6 exploit(multi/handler) > ")
+
+    def test_regex_and_literal(self):
+        matcher = StreamMatcher(["literal", re.compile(r"code=(\d+)")])
+        self.assertEqual(feed_all(matcher, ["code", "=12", "3\n"]), [None, "code=12", "code=12"])
+
+    def test_regex_window_limits_the_match(self):
+        matcher = StreamMatcher(re.compile(r"START.*END", re.DOTALL), regex_window=16)
+        matcher.feed("START" + "x" * 32)
+        self.assertIsNone(matcher.feed("END"))
+
+    def test_regex_early_in_a_chunk_longer_than_the_window(self):
+        matcher = StreamMatcher(re.compile(r"msf\d > "))
+        self.assertEqual(matcher.feed("msf6 > " + "x" * 8192), "msf6 > ")
+
+    def test_regex_window_doesnt_limit_a_single_chunk(self):
+        matcher = StreamMatcher(re.compile(r"START.*END", re.DOTALL), regex_window=16)
+        self.assertEqual(matcher.feed("START" + "x" * 32 + "END"), "START" + "x" * 32 + "END")
+
+    def test_empty_chunk(self):
+        matcher = StreamMatcher("flag")
+        self.assertIsNone(matcher.feed(""))
+
+    def test_no_patterns(self):
+        matcher = StreamMatcher([])
+        self.assertFalse(matcher)
+        self.assertIsNone(matcher.feed("anything"))
+        self.assertTrue(StreamMatcher("flag"))
+        self.assertTrue(StreamMatcher(re.compile("flag")))
+
+    def test_reset(self):
+        matcher = StreamMatcher("flag")
+        matcher.feed("fl")
+        matcher.feed("ag")
+        matcher.reset()
+        self.assertFalse(matcher.matched)
+        self.assertIsNone(matcher.feed("ag"))
+
+
+def run_shell(script: str) -> str:
+    return subprocess.run(["/bin/sh"], input=script, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True).stdout
+
+
+class TestCommandMarkers(unittest.TestCase):
+    def test_markers_are_unique(self):
+        first, second = CommandMarkers(), CommandMarkers()
+        self.assertEqual(len({first.start, first.stderr, first.end, second.start, second.end}), 5)
+
+    def test_written_input_doesnt_contain_the_markers(self):
+        markers = CommandMarkers()
+        self.assertNotIn(markers.start, markers.wrap("id"))
+        self.assertNotIn(markers.end, markers.wrap("id"))
+        self.assertIsNone(StreamMatcher(markers.end_pattern).feed(markers.wrap("id")))
+
+    def test_windows_input_doesnt_contain_the_markers(self):
+        markers = CommandMarkers(windows=True)
+        wrapped = markers.wrap("whoami")
+        self.assertNotIn(markers.end, wrapped)
+        self.assertIn(":%errorlevel%:", wrapped)
+        self.assertTrue(wrapped.endswith("\r\n"))
+
+    def test_parse(self):
+        markers = CommandMarkers()
+        output = f"leftover\n{markers.start}\nline 1\nline 2\n{markers.end}:3:\nprompt $ "
+        self.assertEqual(markers.parse(output), ("line 1\nline 2\n", 3))
+
+    def test_parse_negative_exit_code(self):
+        markers = CommandMarkers(windows=True)
+        self.assertEqual(
+            markers.parse(f"{markers.start}\r\nout\r\n{markers.end}:-1073741510:\r\n"), ("out\r\n", -1073741510)
+        )
+
+    def test_parse_without_end_marker(self):
+        markers = CommandMarkers()
+        self.assertEqual(markers.parse(f"{markers.start}\npartial"), ("partial", None))
+
+    def test_shell_prints_the_markers(self):
+        markers = CommandMarkers()
+        self.assertEqual(markers.parse(run_shell(markers.wrap("echo hello; false"))), ("hello\n", 1))
+        self.assertEqual(markers.parse(run_shell(markers.wrap("printf 'a\\nb\\n'"))), ("a\nb\n", 0))
+
+    def test_end_marker_halves_in_separate_chunks(self):
+        markers = CommandMarkers()
+        output = run_shell(markers.wrap("echo hello; (exit 7)"))
+        matcher = StreamMatcher(markers.end_pattern)
+        end = output.index(markers.end)
+        chunks = [output[: end + 5], output[end + 5 : end + 15], output[end + 15 :]]
+        self.assertEqual([matcher.feed(chunk) for chunk in chunks][:2], [None, None])
+        self.assertTrue(matcher.matched)
+        self.assertEqual(markers.parse("".join(chunks)), ("hello\n", 7))
+
+    def test_exit_code_split_from_the_marker(self):
+        markers = CommandMarkers()
+        matcher = StreamMatcher(markers.end_pattern)
+        self.assertIsNone(matcher.feed(f"out\n{markers.end}:12"))
+        self.assertEqual(matcher.feed("7:\n"), f"{markers.end}:127:")
+
+
+class TestProcessMarkers(unittest.TestCase):
+    def run_process(self, markers: CommandMarkers, command: str) -> str:
+        shell, arguments = markers.wrap_process(command)
+        return subprocess.run(f"{shell} {arguments}", shell=True, stdout=subprocess.PIPE, text=True).stdout
+
+    def test_stdout_stderr_and_exit_code(self):
+        markers = CommandMarkers()
+        output = self.run_process(markers, "echo out; echo err >&2; echo more; exit 3")
+        self.assertEqual(markers.parse_process(output), ("out\nmore\n", "err\n", 3))
+
+    def test_quotes_in_the_command(self):
+        markers = CommandMarkers()
+        output = self.run_process(markers, "echo \"it's\" 'quoted'")
+        self.assertEqual(markers.parse_process(output), ("it's quoted\n", "", 0))
+
+    def test_output_without_trailing_newline(self):
+        markers = CommandMarkers()
+        output = self.run_process(markers, "printf 'no newline'; printf 'error' >&2")
+        self.assertEqual(markers.parse_process(output), ("no newline", "error", 0))
+
+    def test_unfinished_process(self):
+        markers = CommandMarkers()
+        self.assertEqual(markers.parse_process("partial"), ("partial", "", None))
+
+    def test_windows(self):
+        markers = CommandMarkers(windows=True)
+        shell, arguments = markers.wrap_process("dir")
+        self.assertEqual(shell, "cmd.exe")
+        self.assertTrue(arguments.startswith("/v:on /c dir & "))
+        self.assertNotIn(markers.end, arguments)
+        output = f"listing\r\n{markers.stderr}\r\n{markers.end}:0:\r\n"
+        self.assertEqual(markers.parse_process(output), ("listing\r\n", "", 0))
+
+
+class TestCommandDemultiplexer(unittest.TestCase):
+    def setUp(self):
+        self.markers = [CommandMarkers() for _ in range(3)]
+        self.output = run_shell(
+            "".join(m.wrap(c) for m, c in zip(self.markers, ["echo one", "echo two; false", "true"]))
+        )
+
+    def test_single_chunk(self):
+        demultiplexer = CommandDemultiplexer(self.markers)
+        self.assertEqual(demultiplexer.feed(self.output), [(0, "one\n", 0), (1, "two\n", 1), (2, "", 0)])
+        self.assertTrue(demultiplexer.done)
+        self.assertEqual(demultiplexer.flush(), [])
+
+    def test_results_as_soon_as_each_marker_arrives(self):
+        demultiplexer = CommandDemultiplexer(self.markers)
+        second_end = self.output.index(self.markers[1].end)
+        self.assertEqual(demultiplexer.feed(self.output[:second_end]), [(0, "one\n", 0)])
+        self.assertEqual(demultiplexer.feed(self.output[second_end:]), [(1, "two\n", 1), (2, "", 0)])
+
+    def test_every_split_of_the_output(self):
+        expected = [(0, "one\n", 0), (1, "two\n", 1), (2, "", 0)]
+        for size in (1, 2, 3, 7, 16):
+            demultiplexer = CommandDemultiplexer(self.markers)
+            results = [
+                result
+                for i in range(0, len(self.output), size)
+                for result in demultiplexer.feed(self.output[i : i + size])
+            ]
+            self.assertEqual(results, expected, size)
+
+    def test_line_end_split_from_the_marker(self):
+        first, second = CommandMarkers(windows=True), CommandMarkers(windows=True)
+        demultiplexer = CommandDemultiplexer([first, second])
+        self.assertEqual(demultiplexer.feed(f"{first.start}\r\na\r\n{first.end}:0:\r"), [(0, "a\r\n", 0)])
+        self.assertEqual(demultiplexer.feed(f"\n{second.start}\r\nb\r\n{second.end}:2:\r\n"), [(1, "b\r\n", 2)])
+
+    def test_flush_unfinished_commands(self):
+        demultiplexer = CommandDemultiplexer(self.markers)
+        second_end = self.output.index(self.markers[1].end)
+        self.assertEqual(demultiplexer.feed(self.output[:second_end]), [(0, "one\n", 0)])
+        self.assertFalse(demultiplexer.done)
+        self.assertEqual(demultiplexer.flush(), [(1, "two\n", None), (2, "", None)])
+        self.assertTrue(demultiplexer.done)
+
+    def test_flush_skips_the_line_end_of_the_last_marker(self):
+        first, second = CommandMarkers(), CommandMarkers()
+        demultiplexer = CommandDemultiplexer([first, second])
+        self.assertEqual(demultiplexer.feed(f"{first.start}\na\n{first.end}:0:"), [(0, "a\n", 0)])
+        self.assertEqual(demultiplexer.feed("\npartial"), [])
+        self.assertEqual(demultiplexer.flush(), [(1, "partial", None)])
+
+
+class TestEchoMarker(unittest.TestCase):
+    def test_written_input_doesnt_contain_the_marker(self):
+        marker = EchoMarker()
+        self.assertNotIn(marker.end, marker.wrap("use exploit/multi/handler"))
+        self.assertEqual(run_shell(marker.command), f"{marker.end}\n")
+
+    def test_parse(self):
+        marker = EchoMarker()
+        output = f"PAYLOAD => generic/shell\n[*] exec: {marker.command}\n\n{marker.end}\n"
+        self.assertEqual(marker.parse(output), ("PAYLOAD => generic/shell\n", None))
+
+    def test_parse_without_marker(self):
+        marker = EchoMarker()
+        self.assertEqual(marker.parse("partial output"), ("partial output", None))
+
+    def test_demultiplexing(self):
+        markers = [EchoMarker(), EchoMarker()]
+        output = "".join(f"out {i}\n[*] exec: {m.command}\n\n{m.end}\n" for i, m in enumerate(markers))
+        demultiplexer = CommandDemultiplexer(markers)
+        results = [result for i in range(0, len(output), 4) for result in demultiplexer.feed(output[i : i + 4])]
+        self.assertEqual(results, [(0, "out 0\n", None), (1, "out 1\n", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.async_rpc.modules import AsyncModuleResultWaiter
+from snek_sploit.lib.context import Context
+from snek_sploit.lib.rpc.modules import ModuleResult, ModuleResultWaiter
+from snek_sploit.util.polling import FixedDelay
+
+
+class FakeWaiter(ModuleResultWaiter):
+    """
+    Waiter, whose executions never finish on their own.
+    """
+
+    def poll(self) -> int:
+        return 0
+
+
+class FakeAsyncWaiter(AsyncModuleResultWaiter):
+    async def poll(self) -> int:
+        return 0
+
+
+class TestModuleResultWaiter(unittest.TestCase):
+    def setUp(self):
+        self.waiter = FakeWaiter(Context("", ""), FixedDelay(0.01))
+        self.addCleanup(self.waiter.stop)
+
+    def test_wait_timeout(self):
+        # The builtin TimeoutError, even before Python 3.11
+        self.assertRaises(TimeoutError, self.waiter.wait, "uuid", 0.02)
+        self.assertEqual(self.waiter._pending(), ["uuid"])
+
+    def test_wait(self):
+        result = ModuleResult("uuid", "completed")
+        self.waiter._set_future(self.waiter.add("uuid"), result, None)
+        self.assertEqual(self.waiter.wait("uuid", 0.02), result)
+
+    def test_as_completed_timeout(self):
+        result = ModuleResult("first", "completed")
+        self.waiter._set_future(self.waiter.add("first"), result, None)
+        results = self.waiter.as_completed(["first", "second"], 0.02)
+        self.assertEqual(next(results), result)
+        self.assertRaises(TimeoutError, next, results)
+
+
+class TestAsyncModuleResultWaiter(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.waiter = FakeAsyncWaiter(AsyncContext("", ""), FixedDelay(0.01))
+
+    async def asyncTearDown(self):
+        await self.waiter.stop()
+
+    async def test_wait_timeout(self):
+        with self.assertRaises(TimeoutError):
+            await self.waiter.wait("uuid", 0.02)
+        self.assertFalse(self.waiter.add("uuid").cancelled())
+
+    async def test_as_completed_timeout(self):
+        result = ModuleResult("first", "completed")
+        self.waiter._set_future(self.waiter.add("first"), result, None)
+        results = []
+        with self.assertRaises(TimeoutError):
+            async for each in self.waiter.as_completed(["first", "second"], 0.02):
+                results.append(each)
+        self.assertEqual(results, [result])
+
+
+if __name__ == "__main__":
+    unittest.main()
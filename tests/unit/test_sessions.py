@@ -0,0 +1,285 @@
+import re
+import shlex
+import subprocess
+import unittest
+from collections import deque
+from types import SimpleNamespace
+from typing import Callable, List
+
+from snek_sploit.lib.rpc.sessions import (
+    SessionInformation,
+    SessionShell,
+    SessionRing,
+    SessionMeterpreter,
+    SessionWatcher,
+)
+from snek_sploit.util.matching import CommandMarkers
+from snek_sploit.util.polling import FixedDelay
+
+NO_DELAY = FixedDelay(0)
+
+
+def run_shell(script: str) -> str:
+    return subprocess.run(["/bin/sh"], input=script, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True).stdout
+
+
+def split(data: str, size: int = 5) -> List[str]:
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class FakeShell(SessionShell):
+    """
+    Shell session, whose written input is answered with prepared output chunks (one per read).
+    """
+
+    def __init__(self, respond: Callable[[str], List[str]], info: SessionInformation = None):
+        super().__init__(None, 1, info or SessionInformation(type="shell", platform="", via_payload=""))
+        self.respond = respond
+        self.written: List[str] = []
+        self.chunks = deque()
+
+    def write(self, data: str) -> bool:
+        self.written.append(data)
+        self.chunks.extend(self.respond(data))
+        return True
+
+    def read(self) -> str:
+        return self.chunks.popleft() if self.chunks else ""
+
+
+class FakeRing(SessionRing):
+    def __init__(self, respond: Callable[[str], List[str]]):
+        super().__init__(None, 1, SessionInformation(type="ring"))
+        self.respond = respond
+        self.chunks = deque()
+
+    def write(self, data: str) -> bool:
+        self.chunks.extend(self.respond(data))
+        return True
+
+    def read(self) -> str:
+        return self.chunks.popleft() if self.chunks else ""
+
+
+class FakeMeterpreter(SessionMeterpreter):
+    """
+    Meterpreter session, that runs the executed processes locally and prints the banner before their output.
+    """
+
+    def __init__(self):
+        super().__init__(None, 1, SessionInformation(type="meterpreter", platform="linux", via_payload=""))
+        self.commands: List[str] = []
+        self.chunks = deque()
+
+    def run_single(self, data: str) -> bool:
+        self.commands.append(data)
+        found = re.fullmatch(r'execute -f (\S+) -c -i -a "((?:[^"\\]|\\.)*)"', data)
+        arguments = re.sub(r"\\(.)", r"\1", found.group(2))
+        output = subprocess.run([found.group(1), *shlex.split(arguments)], stdout=subprocess.PIPE, text=True).stdout
+        self.chunks.extend(split("Process 4242 created.\nChannel 3 created.\n" + output))
+        return True
+
+    def read(self) -> str:
+        return self.chunks.popleft() if self.chunks else ""
+
+
+def real_shell(data: str) -> List[str]:
+    return split(run_shell(data))
+
+
+def with_pause(data: str) -> List[str]:
+    """
+    Answer with the output, but pause (return nothing) between its halves.
+    """
+    output = run_shell(data)
+    half = len(output) // 2
+    return [output[:half], "", "", output[half:]]
+
+
+class TestExecuteWithMarkers(unittest.TestCase):
+    def test_output_and_exit_code(self):
+        session = FakeShell(real_shell)
+        self.assertEqual(session.execute("echo hello; echo world; false", polling=NO_DELAY), "hello\nworld\n")
+        self.assertEqual(session.last_exit_code, 1)
+        self.assertEqual(session.execute("echo ok", polling=NO_DELAY), "ok\n")
+        self.assertEqual(session.last_exit_code, 0)
+
+    def test_ring(self):
+        session = FakeRing(real_shell)
+        self.assertEqual(session.execute("echo ring", polling=NO_DELAY), "ring\n")
+        self.assertEqual(session.last_exit_code, 0)
+
+    def test_pause_with_timeout(self):
+        session = FakeShell(with_pause)
+        self.assertEqual(session.execute("echo first; echo second", timeout=5, polling=NO_DELAY), "first\nsecond\n")
+        self.assertEqual(session.last_exit_code, 0)
+
+    def test_pause_without_timeout(self):
+        # The pause doesn't end the gathering, the end marker does
+        session = FakeShell(with_pause)
+        self.assertEqual(session.execute("echo first; echo second", polling=NO_DELAY), "first\nsecond\n")
+        self.assertEqual(session.last_exit_code, 0)
+
+    def test_long_pause_without_timeout(self):
+        def respond(data: str) -> List[str]:
+            output = run_shell(data)
+            return [output[:10], *[""] * 50, output[10:]]
+
+        session = FakeShell(respond)
+        results = list(session.execute_batch(["echo first", "echo second; false"], polling=FixedDelay(0.001)))
+        self.assertEqual([(result.output, result.exit_code) for result in results], [("first\n", 0), ("second\n", 1)])
+
+    def test_default_polling_backs_off(self):
+        # The end marker is awaited, so the readings start with short delays without cutting the output short
+        session = FakeShell(with_pause)
+        self.assertEqual(session.execute("echo first; echo second"), "first\nsecond\n")
+        self.assertEqual(session.last_exit_code, 0)
+        self.assertLess(session.last_polling_statistics.elapsed, 0.5)
+
+    def test_never_finishing_command_without_timeout(self):
+        # E.g. a command waiting for input, the end marker never arrives
+        session = FakeShell(lambda data: ["prompt: "])
+        session.idle_timeout = 0.05
+        self.assertEqual(session.execute("read answer", polling=FixedDelay(0.01)), "prompt: ")
+        self.assertIsNone(session.last_exit_code)
+        self.assertGreaterEqual(session.last_polling_statistics.elapsed, 0.05)
+
+    def test_no_output_without_timeout(self):
+        session = FakeShell(lambda data: [])
+        session.idle_timeout = 0.05
+        self.assertEqual(session.execute("sleep 100", polling=FixedDelay(0.01)), "")
+        self.assertIsNone(session.last_exit_code)
+
+    def test_never_finishing_command_with_timeout(self):
+        session = FakeShell(lambda data: ["prompt: "])
+        self.assertEqual(session.execute("read answer", timeout=0.05, polling=FixedDelay(0.01)), "prompt: ")
+        self.assertIsNone(session.last_exit_code)
+
+    def test_windows_syntax(self):
+        session = FakeShell(lambda data: [], SessionInformation(type="shell", platform="windows", via_payload=""))
+        self.assertTrue(session.windows)
+        session.execute("dir", timeout=0.01, polling=NO_DELAY)
+        self.assertIn("%errorlevel%", session.written[0])
+
+
+class TestExecuteBatch(unittest.TestCase):
+    def test_results_and_single_write(self):
+        session = FakeShell(real_shell)
+        results = list(session.execute_batch(["echo one", "echo two; false", "printf three"], polling=NO_DELAY))
+        self.assertEqual(
+            [(result.command, result.output, result.exit_code) for result in results],
+            [("echo one", "one\n", 0), ("echo two; false", "two\n", 1), ("printf three", "three", 0)],
+        )
+        self.assertEqual(session.last_exit_code, 0)
+        self.assertEqual(len(session.written), 1)
+
+    def test_results_are_yielded_before_the_rest_arrives(self):
+        session = FakeShell(real_shell)
+        batch = session.execute_batch(["echo one", "echo two"], polling=NO_DELAY)
+        self.assertEqual(next(batch).output, "one\n")
+        self.assertTrue(session.chunks)
+        self.assertEqual(next(batch).output, "two\n")
+
+    def test_unfinished_commands_once_the_time_runs_out(self):
+        def respond(data: str) -> List[str]:
+            # The second command waits for input, so its end marker and the following ones never arrive
+            return [run_shell(data[: data.index("read answer")])]
+
+        session = FakeShell(respond)
+        results = list(session.execute_batch(["echo one", "read answer", "echo three"], 0.05, polling=FixedDelay(0.01)))
+        self.assertEqual(
+            [(result.output, result.exit_code) for result in results], [("one\n", 0), ("", None), ("", None)]
+        )
+        self.assertIsNone(session.last_exit_code)
+
+    def test_empty_batch(self):
+        session = FakeShell(real_shell)
+        self.assertEqual(list(session.execute_batch([])), [])
+        self.assertEqual(session.written, [])
+
+    def test_meterpreter_executes_one_by_one(self):
+        session = FakeMeterpreter()
+        session.execute = lambda command, *args: f"{command} done\n"
+        results = list(session.execute_batch(["sysinfo", "getuid"]))
+        self.assertEqual(
+            [(result.output, result.exit_code) for result in results],
+            [("sysinfo done\n", None), ("getuid done\n", None)],
+        )
+
+
+class TestSessionInformation(unittest.TestCase):
+    def setUp(self):
+        self.snapshot = SessionInformation(type="shell", platform="linux")
+        self.fetched = SessionInformation(type="shell", platform="linux", info="fetched")
+        registry = SimpleNamespace(cached=lambda session_id: self.snapshot, get=lambda session_id: self.fetched)
+        self.session = SessionShell(None, 1, SessionInformation(type="shell"), registry)
+
+    def test_registry_snapshot(self):
+        self.assertIs(self.session.info, self.snapshot)
+
+    def test_assignment(self):
+        assigned = SessionInformation(type="shell", platform="windows")
+        self.session.info = assigned
+        self.assertIs(self.session.info, assigned)
+        self.assertTrue(self.session.windows)
+
+    def test_fetch_replaces_the_assignment(self):
+        self.session.info = SessionInformation(type="shell", platform="windows")
+        self.assertIs(self.session.fetch_information(), self.fetched)
+        self.assertIs(self.session.info, self.snapshot)
+
+    def test_assignment_without_registry(self):
+        session = FakeShell(real_shell)
+        session.info = SessionInformation(type="shell", platform="windows")
+        self.assertTrue(session.windows)
+
+
+class TestSessionWatcher(unittest.TestCase):
+    def setUp(self):
+        self.watcher = SessionWatcher(SimpleNamespace(snapshot=lambda max_age: {}), FixedDelay(0.01))
+        self.addCleanup(self.watcher.stop)
+
+    def test_poller_runs_while_there_are_listeners(self):
+        first = self.watcher.add_listener()
+        second = self.watcher.add_listener()
+        self.watcher.remove_listener(first)
+        self.assertTrue(self.watcher._thread.is_alive())
+        thread = self.watcher._thread
+        self.watcher.remove_listener(second)
+        self.assertIsNone(self.watcher._thread)
+        self.assertFalse(thread.is_alive())
+
+    def test_listener_added_while_the_last_one_is_removed(self):
+        first = self.watcher.add_listener()
+        # The last listener is removed, but before the poller is stopped, another one is added
+        with self.watcher._lock:
+            self.watcher._listeners.pop(first)
+        self.watcher.add_listener()
+        self.watcher._stop(if_unused=True)
+        self.assertTrue(self.watcher._thread.is_alive())
+
+
+class TestMeterpreterExecuteInShell(unittest.TestCase):
+    def test_result(self):
+        session = FakeMeterpreter()
+        result = session.execute_in_shell("echo", ['"out"', "&&", "echo", "err", ">&2", "&&", "false"], 5, 0, NO_DELAY)
+        self.assertEqual((result.pid, result.channel_id), (4242, 3))
+        self.assertEqual((result.stdout, result.stderr, result.exit_code), ("out\n", "err\n", 1))
+        self.assertEqual(session.last_exit_code, 1)
+        self.assertEqual(len(session.commands), 1)
+
+    def test_banner_without_channel(self):
+        markers = CommandMarkers()
+        output = f"Process 7 created.\nout\n{markers.stderr}\n{markers.end}:0:\n"
+        result = SessionMeterpreter._parse_process_output(markers, output)
+        self.assertEqual((result.pid, result.channel_id, result.stdout, result.exit_code), (7, None, "out\n", 0))
+
+    def test_banner_isnt_searched_in_the_output(self):
+        markers = CommandMarkers()
+        output = f"Process 5 created.\nProcess 6 created.\n{markers.stderr}\n{markers.end}:0:\n"
+        result = SessionMeterpreter._parse_process_output(markers, output)
+        self.assertEqual((result.pid, result.stdout), (5, "Process 6 created.\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
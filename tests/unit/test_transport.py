@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import unittest
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import msgpack
+import requests
+
+from snek_sploit.lib.async_context import AsyncContext
+from snek_sploit.lib.context import Context
+from snek_sploit.util import exceptions
+from snek_sploit.util.retry import RetryPolicy
+
+VERSION = {"version": b"6.4.0"}
+RPC_ERROR = {"error": True, "error_class": "Msf::RPC::Exception", "error_message": b"Invalid Job", "error_code": 500}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Status, content type, and body of the responses
+    response = (200, "binary/message-pack", msgpack.dumps(VERSION))
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        status, content_type, body = self.response
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.response = (200, "binary/message-pack", msgpack.dumps(VERSION))
+        port = self.server.server_address[1]
+        self.context = Context("", "", port=port, ssl=False, token="token")
+        self.async_context = AsyncContext("", "", port=port, ssl=False, token="token")
+        self.addCleanup(self.context.close)
+        self.context.retry_policy = self.async_context.retry_policy = RetryPolicy(base_delay=0, jitter=False)
+
+    def async_call(self, endpoint: str, close: bool = True):
+        async def call():
+            try:
+                return await self.async_context.call(endpoint)
+            finally:
+                if close:
+                    await self.async_context.close()
+
+        return asyncio.run(call())
+
+    def test_response(self):
+        self.assertEqual(self.context.call("core.version"), VERSION)
+        self.assertEqual(self.async_call("core.version"), VERSION)
+
+    def test_rpc_error_with_status(self):
+        Handler.response = (500, "binary/message-pack", msgpack.dumps(RPC_ERROR))
+        self.assertRaises(exceptions.RPCError, self.context.call, "job.info")
+        self.assertRaises(exceptions.RPCError, self.async_call, "job.info")
+
+    def test_foreign_error_page(self):
+        Handler.response = (502, "text/html", b"<html>Bad Gateway</html>")
+        self.assertRaises(requests.HTTPError, self.context.call, "job.info")
+        with self.assertRaises(exceptions.HTTPError) as raised:
+            self.async_call("job.info")
+        self.assertIn("502", str(raised.exception))
+
+    def test_foreign_error_page_is_a_transport_error(self):
+        # Like a dropped connection, so the safe calls are retried
+        Handler.response = (502, "text/html", b"<html>Bad Gateway</html>")
+        self.assertRaises(ConnectionError, self.async_call, "core.version")
+
+    def test_new_event_loop(self):
+        # The pooled connections and the semaphore of a finished loop aren't used by the next one
+        with warnings.catch_warnings():
+            # The connections left open by the finished loop can't be closed anymore
+            warnings.simplefilter("ignore", ResourceWarning)
+            for _ in range(2):
+                self.assertEqual(self.async_call("core.version", close=False), VERSION)
+            self.assertEqual(self.async_call("core.version"), VERSION)
+
+
+if __name__ == "__main__":
+    unittest.main()